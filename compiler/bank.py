@@ -1,4 +1,5 @@
 import sys
+import factory
 from tech import drc, parameter
 import debug
 import design
@@ -223,27 +224,27 @@ class bank(design.design):
         #self.wordline_driver.logic_effort_sizing(self.num_cols)
         self.add_mod(self.wordline_driver)
 
-        self.inv = pinv(nmos_width=drc["minwidth_tx"], 
-                        beta=parameter["pinv_beta"], 
-                        height=self.bitcell_height)
+        self.inv = factory.create(pinv, nmos_width=drc["minwidth_tx"], 
+                                  beta=parameter["pinv_beta"], 
+                                  height=self.bitcell_height)
         self.add_mod(self.inv)
         
     # 4x Inverter
-        self.inv4x = pinv(nmos_width=4*drc["minwidth_tx"], 
-                          beta=parameter["pinv_beta"], 
-                          height=self.bitcell_height)
+        self.inv4x = factory.create(pinv, nmos_width=4*drc["minwidth_tx"], 
+                                    beta=parameter["pinv_beta"], 
+                                    height=self.bitcell_height)
         self.add_mod(self.inv4x)
 
-        self.NAND2 = nand_2(nmos_width=2*drc["minwidth_tx"], 
-                            height=self.bitcell_height)
+        self.NAND2 = factory.create(nand_2, nmos_width=2*drc["minwidth_tx"], 
+                                    height=self.bitcell_height)
         self.add_mod(self.NAND2)
 
-        self.NOR2 = nor_2(nmos_width=drc["minwidth_tx"], 
-                          height=self.bitcell_height)
+        self.NOR2 = factory.create(nor_2, nmos_width=drc["minwidth_tx"], 
+                                   height=self.bitcell_height)
         self.add_mod(self.NOR2)
 
         # These aren't for instantiating, but we use them to get the dimensions
-        self.m1m2_via = contact(layer_stack=("metal1", "via1", "metal2"))
+        self.m1m2_via = factory.create(contact, layer_stack=("metal1", "via1", "metal2"))
 
         # Vertical metal rail gap definition
         self.metal2_extend_contact = (self.m1m2_via.second_layer_height 
@@ -1380,8 +1381,8 @@ class bank(design.design):
         # Connections of Tri_gate GND to the left hand GND rail
 
         # This is only used to compute teh sizes below
-        gnd_contact = contact(layer_stack=("metal1", "via1", "metal2"), 
-                              dimensions=(2, 1))
+        gnd_contact = factory.create(contact, layer_stack=("metal1", "via1", "metal2"), 
+                                     dimensions=(2, 1))
 
         x_off = (self.left_gnd_x_offset + self.power_rail_width 
                                 - gnd_contact.width)
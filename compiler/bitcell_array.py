@@ -59,42 +59,23 @@ class bitcell_array(design.design):
         self.add_mod(self.cell)
 
     def add_cells(self):
-        xoffset = 0.0
-        for col in range(self.column_size):
-            yoffset = 0.0
-            for row in range(self.row_size):
-                name = "bit_r{0}_c{1}".format(row, col)
-
-                if row % 2:
-                    tempy = yoffset + self.cell.height
-                    dir_key = "MX"
-                else:
-                    tempy = yoffset
-                    dir_key = "R0"
-
-                if OPTS.trim_noncritical == True:
-                    if row == self.row_size - 1:
-                        self.add_inst(name=name,
-                                      mod=self.cell,
-                                      offset=[xoffset, tempy],
-                                      mirror=dir_key)
-                        self.connect_inst(["bl[{0}]".format(col),
-                                           "br[{0}]".format(col),
-                                           "wl[{0}]".format(row),
-                                           "vdd",
-                                           "gnd"])
-                else:
-                    self.add_inst(name=name,
-                                  mod=self.cell,
-                                  offset=[xoffset, tempy],
-                                  mirror=dir_key)
-                    self.connect_inst(["bl[{0}]".format(col),
-                                       "br[{0}]".format(col),
-                                       "wl[{0}]".format(row),
-                                       "vdd",
-                                       "gnd"])
-                yoffset += self.cell.height
-            xoffset += self.cell.width
+        # the odd rows are flipped to share the vdd and gnd rails
+        self.cell_array = self.add_inst_array(name="bit_r{row}_c{col}",
+                                              mod=self.cell,
+                                              offset=[0, 0],
+                                              cols=self.column_size,
+                                              rows=self.row_size,
+                                              pitch=[self.cell.width, self.cell.height],
+                                              mirror_rows=True)
+        self.connect_inst_array(self.cell_conns)
+
+    def cell_conns(self, row, col):
+        """ Returns the nets of the cell in a row and column. """
+        return ["bl[{0}]".format(col),
+                "br[{0}]".format(col),
+                "wl[{0}]".format(row),
+                "vdd",
+                "gnd"]
 
     def add_labels(self):
         offset = vector(0.0, 0.0)
@@ -171,6 +152,44 @@ class bitcell_array(design.design):
         bl_wire.wire_c =spice["min_tx_drain_c"] + bl_wire.wire_c # 1 access tx d/s per cell
         return bl_wire
 
+    def sp_write_reduced(self, sp, usedMODS, rows, cols):
+        """ Writes the array subcircuit with only the cells in the given
+        rows and columns for characterization. Each wordline and bitline
+        keeps the load of its removed cells as a lumped RC: half of the
+        wire resistance and all of the wire and access transistor
+        capacitance of the removed segments. The layout is unchanged. """
+        for i in self.mods:
+            if i.name in usedMODS:
+                continue
+            usedMODS.add(i.name)
+            i.sp_write_file(sp, usedMODS)
+
+        sp.write("\n.SUBCKT {0} {1}\n".format(self.name, " ".join(self.pins)))
+        for (name, row, col) in self.cell_array.instances():
+            if row in rows or col in cols:
+                sp.write("X{0} {1} {2}\n".format(name,
+                                                 " ".join(self.cell_conns(row, col)),
+                                                 self.cell.name))
+
+        removed_cols = self.column_size - len(cols)
+        removed_rows = self.row_size - len(rows)
+        wl_wire = self.gen_wl_wire()
+        for row in range(self.row_size):
+            if row not in rows and removed_cols > 0:
+                self.write_lumped_load(sp, "wl[{0}]".format(row), removed_cols, wl_wire)
+        bl_wire = self.gen_bl_wire()
+        for col in range(self.column_size):
+            if col not in cols and removed_rows > 0:
+                self.write_lumped_load(sp, "bl[{0}]".format(col), removed_rows, bl_wire)
+                self.write_lumped_load(sp, "br[{0}]".format(col), removed_rows, bl_wire)
+        sp.write(".ENDS {0}\n".format(self.name))
+
+    def write_lumped_load(self, sp, net, segments, wire):
+        """ Writes the RC load of a number of removed wire segments. """
+        load = net.replace("[", "_load[")
+        sp.write("R{0} {0} {1} {2}\n".format(net, load, 0.5*segments*wire.wire_r))
+        sp.write("C{0} {1} gnd {2}f\n".format(net, load, segments*wire.wire_c))
+
     def output_load(self, bl_pos=0):
         bl_wire = self.gen_bl_wire()
         return bl_wire.wire_c # sense amp only need to charge small portion of the bl
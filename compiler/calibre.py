@@ -63,12 +63,23 @@ import re
 import time
 import debug
 import globals
+import scratch
 import subprocess
 
 
 def run_drc(name, gds_name):
     """Run DRC check on a given top-level name which is
        implemented in gds_name."""
+    # all of the calibre files go into a private job directory
+    with scratch.scratch_dir("drc") as job:
+        errors = drc_job(job.path, name, gds_name)
+        if errors > 0:
+            job.fail()
+    return errors
+
+
+def drc_job(run_dir, name, gds_name):
+    """Run DRC in the given run directory and return the error count."""
     OPTS = globals.get_opts()
 
     # the runset file contains all the options to run calibre
@@ -77,34 +88,31 @@ def run_drc(name, gds_name):
 
     drc_runset = {
         'drcRulesFile': drc_rules,
-        'drcRunDir': OPTS.openram_temp,
+        'drcRunDir': run_dir,
         'drcLayoutPaths': gds_name,
         'drcLayoutPrimary': name,
         'drcLayoutSystem': 'GDSII',
         'drcResultsformat': 'ASCII',
-        'drcResultsFile': OPTS.openram_temp + name + ".drc.db",
-        'drcSummaryFile': OPTS.openram_temp + name + ".drc.summary",
+        'drcResultsFile': run_dir + name + ".drc.db",
+        'drcSummaryFile': run_dir + name + ".drc.summary",
         'cmnFDILayerMapFile': drc["layer_map"],
         'cmnFDIUseLayerMap': 1
     }
 
     # write the runset file
-    f = open(OPTS.openram_temp + "drc_runset", "w")
+    f = open(run_dir + "drc_runset", "w")
     for k in sorted(drc_runset.iterkeys()):
         f.write("*%s: %s\n" % (k, drc_runset[k]))
     f.close()
 
-    # run drc
-    cwd = os.getcwd()
-    os.chdir(OPTS.openram_temp)
-    errfile = "%s%s.drc.err" % (OPTS.openram_temp, name)
-    outfile = "%s%s.drc.out" % (OPTS.openram_temp, name)
+    # run drc in the job directory without changing our own directory
+    errfile = "%s%s.drc.err" % (run_dir, name)
+    outfile = "%s%s.drc.out" % (run_dir, name)
 
     cmd = "{0} -gui -drc {1}drc_runset -batch 2> {2} 1> {3}".format(
-        OPTS.calibre_exe, OPTS.openram_temp, errfile, outfile)
+        OPTS.calibre_exe, run_dir, errfile, outfile)
     debug.info(1, cmd)
-    os.system(cmd)
-    os.chdir(cwd)
+    subprocess.call(cmd, cwd=run_dir, shell=True)
 
     # check the result for these lines in the summary:
     # TOTAL Original Layer Geometries: 106 (157)
@@ -136,27 +144,37 @@ def run_drc(name, gds_name):
 def run_lvs(name, gds_name, sp_name):
     """Run LVS check on a given top-level name which is
        implemented in gds_name and sp_name. """
+    # all of the calibre files go into a private job directory
+    with scratch.scratch_dir("lvs") as job:
+        errors = lvs_job(job.path, name, gds_name, sp_name)
+        if errors > 0:
+            job.fail()
+    return errors
+
+
+def lvs_job(run_dir, name, gds_name, sp_name):
+    """Run LVS in the given run directory and return the error count."""
     OPTS = globals.get_opts()
     from tech import drc
     lvs_rules = drc["lvs_rules"]
     lvs_runset = {
         'lvsRulesFile': lvs_rules,
-        'lvsRunDir': OPTS.openram_temp,
+        'lvsRunDir': run_dir,
         'lvsLayoutPaths': gds_name,
         'lvsLayoutPrimary': name,
         'lvsSourcePath': sp_name,
         'lvsSourcePrimary': name,
         'lvsSourceSystem': 'SPICE',
-        'lvsSpiceFile': OPTS.openram_temp + "extracted.sp",
+        'lvsSpiceFile': run_dir + "extracted.sp",
         'lvsPowerNames': 'vdd',
         'lvsGroundNames': 'gnd',
         'lvsIncludeSVRFCmds': 1,
         'lvsSVRFCmds': '{VIRTUAL CONNECT NAME VDD? GND? ?}',
         'lvsIgnorePorts': 1,
-        'lvsERCDatabase': OPTS.openram_temp + name + ".erc.db",
-        'lvsERCSummaryFile': OPTS.openram_temp + name + ".erc.summary",
-        'lvsReportFile': OPTS.openram_temp + name + ".lvs.report",
-        'lvsMaskDBFile': OPTS.openram_temp + name + ".maskdb",
+        'lvsERCDatabase': run_dir + name + ".erc.db",
+        'lvsERCSummaryFile': run_dir + name + ".erc.summary",
+        'lvsReportFile': run_dir + name + ".lvs.report",
+        'lvsMaskDBFile': run_dir + name + ".maskdb",
         'cmnFDILayerMapFile': drc["layer_map"],
         'cmnFDIUseLayerMap': 1,
         'cmnVConnectNames': 'vdd, gnd',
@@ -164,22 +182,19 @@ def run_lvs(name, gds_name, sp_name):
     }
 
     # write the runset file
-    f = open(OPTS.openram_temp + "lvs_runset", "w")
+    f = open(run_dir + "lvs_runset", "w")
     for k in sorted(lvs_runset.iterkeys()):
         f.write("*%s: %s\n" % (k, lvs_runset[k]))
     f.close()
 
-    # run LVS
-    cwd = os.getcwd()
-    os.chdir(OPTS.openram_temp)
-    errfile = "%s%s.lvs.err" % (OPTS.openram_temp, name)
-    outfile = "%s%s.lvs.out" % (OPTS.openram_temp, name)
+    # run LVS in the job directory without changing our own directory
+    errfile = "%s%s.lvs.err" % (run_dir, name)
+    outfile = "%s%s.lvs.out" % (run_dir, name)
 
     cmd = "calibre -gui -lvs %slvs_runset -batch 2> %s 1> %s" % (
-        OPTS.openram_temp, errfile, outfile)
+        run_dir, errfile, outfile)
     debug.info(2, cmd)
-    os.system(cmd)
-    os.chdir(cwd)
+    subprocess.call(cmd, cwd=run_dir, shell=True)
 
     # check the result for these lines in the summary:
     f = open(lvs_runset['lvsReportFile'], "r")
@@ -243,7 +258,7 @@ def run_pex(name, gds_name, sp_name, output=None):
     OPTS = globals.get_opts()
     from tech import drc
     if output == None:
-        output = name + ".pex.netlist"
+        output = OPTS.openram_temp + name + ".pex.netlist"
 
     # check if lvs report has been done
     # if not run drc and lvs
@@ -251,10 +266,23 @@ def run_pex(name, gds_name, sp_name, output=None):
         run_drc(name, gds_name)
         run_lvs(name, gds_name, sp_name)
 
+    # all of the calibre files go into a private job directory
+    with scratch.scratch_dir("pex") as job:
+        errors = pex_job(job.path, name, gds_name, sp_name, output)
+        if errors > 0:
+            job.fail()
+    return errors
+
+
+def pex_job(run_dir, name, gds_name, sp_name, output):
+    """Run PEX in the given run directory and return the error count."""
+    OPTS = globals.get_opts()
+    from tech import drc
+
     pex_rules = drc["xrc_rules"]
     pex_runset = {
         'pexRulesFile': pex_rules,
-        'pexRunDir': OPTS.openram_temp,
+        'pexRunDir': run_dir,
         'pexLayoutPaths': gds_name,
         'pexLayoutPrimary': name,
         #'pexSourcePath' : OPTS.openram_temp+"extracted.sp",
@@ -268,24 +296,21 @@ def run_pex(name, gds_name, sp_name, output=None):
     }
 
     # write the runset file
-    f = open(OPTS.openram_temp + "pex_runset", "w")
+    f = open(run_dir + "pex_runset", "w")
     for k in sorted(pex_runset.iterkeys()):
         f.write("*{0}: {1}\n".format(k, pex_runset[k]))
     f.close()
 
-    # run pex
-    cwd = os.getcwd()
-    os.chdir(OPTS.openram_temp)
-    errfile = "{0}{1}.pex.err".format(OPTS.openram_temp, name)
-    outfile = "{0}{1}.pex.out".format(OPTS.openram_temp, name)
+    # run pex in the job directory without changing our own directory
+    errfile = "{0}{1}.pex.err".format(run_dir, name)
+    outfile = "{0}{1}.pex.out".format(run_dir, name)
 
     cmd = "{0} -gui -pex {1}pex_runset -batch 2> {2} 1> {3}".format(OPTS.calibre_exe,
-                                                                    OPTS.openram_temp,
+                                                                    run_dir,
                                                                     errfile,
                                                                     outfile)
     debug.info(2, cmd)
-    os.system(cmd)
-    os.chdir(cwd)
+    subprocess.call(cmd, cwd=run_dir, shell=True)
 
     # also check the output file
     f = open(outfile, "r")
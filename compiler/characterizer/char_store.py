@@ -0,0 +1,114 @@
+"""
+This is a persistent SQLite database of characterization results. Every
+measured arc (e.g. the rise delay of DATA at one slew and load) is a
+row keyed by the macro, the corner, the pin, the metric, the slew and
+load, the hash of the netlist and a hash of the conditions (device
+models, supply, temperature, simulator and the options that change the
+results). Each row also records where it came from: the simulator, the
+OpenRAM version, the user and the time it was measured.
+
+The .lib writer reads the arcs from the store and only simulates the
+ones that are missing, so regenerating a .lib (e.g. after a template
+change) does not need any simulations and adding a load point only
+simulates that point. For constraint arcs (setup/hold), the slew is the
+related pin slew and the load is the constrained pin slew.
+"""
+import os
+import time
+import getpass
+import hashlib
+import sqlite3
+import globals
+import debug
+import tech
+import sim_cache
+import charutils as ch
+
+OPTS = globals.get_opts()
+
+schema = """CREATE TABLE IF NOT EXISTS arcs (
+    macro TEXT NOT NULL,
+    corner TEXT NOT NULL,
+    pin TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    slew REAL NOT NULL,
+    load REAL NOT NULL,
+    netlist TEXT NOT NULL,
+    conditions TEXT NOT NULL,
+    value REAL NOT NULL,
+    simulator TEXT,
+    version TEXT,
+    user TEXT,
+    created TEXT,
+    PRIMARY KEY (macro, corner, pin, metric, slew, load, netlist, conditions))"""
+
+
+def round_index(value):
+    """ Rounds a slew or load so that the same point computed in
+    different ways is the same key. """
+    return round(float(value), 12)
+
+
+def conditions_hash(extra=""):
+    """ Returns the hash of the conditions of the current corner that
+    the results depend on besides the netlist. """
+    digest = hashlib.sha1()
+    digest.update(sim_cache.models_id(tech.spice["fet_models"]))
+    digest.update("vdd {0} temp {1}\n".format(tech.spice["supply_voltage"], tech.spice["temp"]))
+    digest.update(sim_cache.simulator_id())
+    digest.update("trim {0} waveforms {1}\n".format(OPTS.trim_noncritical, OPTS.measure_waveforms))
+    # the time step changes the delays and slews and the search arity
+    # changes where the min period search stops in its tolerance
+    digest.update("steps {0} arity {1}\n".format(OPTS.tran_steps_per_period, ch.search_arity()))
+    if OPTS.surrogate_tables:
+        digest.update("surrogate {0}\n".format(OPTS.surrogate_tolerance))
+    digest.update(extra)
+    return digest.hexdigest()
+
+
+class char_store():
+    """
+    A connection to the characterization database. Each process opens
+    its own connection and SQLite serializes the writers.
+    """
+
+    def __init__(self, db_name=None):
+        if db_name == None:
+            db_name = OPTS.char_store_file
+        db_dir = os.path.dirname(db_name)
+        if db_dir != "" and not os.path.isdir(db_dir):
+            try:
+                os.makedirs(db_dir, 0o750)
+            except OSError:
+                pass
+        debug.info(1, "Characterization store is " + db_name)
+        self.db = sqlite3.connect(db_name, timeout=60)
+        self.db.execute(schema)
+        self.db.commit()
+
+    def fetch(self, key, pin, metric, points):
+        """ Returns the stored value of a metric at each (slew, load)
+        point or None for the ones that are not stored. The key is the
+        (macro, corner, netlist, conditions) of the arcs. """
+        (macro, corner, netlist, conditions) = key
+        rows = self.db.execute("SELECT slew, load, value FROM arcs WHERE macro=? AND corner=? "
+                               "AND netlist=? AND conditions=? AND pin=? AND metric=?",
+                               (macro, corner, netlist, conditions, pin, metric))
+        values = dict(((slew, load), value) for (slew, load, value) in rows)
+        return [values.get((round_index(slew), round_index(load))) for (slew, load) in points]
+
+    def store(self, key, pin, metric, points, values):
+        """ Stores the values of a metric at (slew, load) points with
+        their provenance. """
+        (macro, corner, netlist, conditions) = key
+        created = time.strftime("%Y-%m-%d %H:%M:%S")
+        rows = [(macro, corner, pin, metric, round_index(slew), round_index(load),
+                 netlist, conditions, float(value), OPTS.spice_version, globals.VERSION,
+                 getpass.getuser(), created)
+                for ((slew, load), value) in zip(points, values)]
+        self.db.executemany("INSERT OR REPLACE INTO arcs VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+        self.db.commit()
+        debug.info(2, "Stored {0} {1} arcs of {2}".format(len(rows), metric, macro))
+
+    def close(self):
+        self.db.close()
@@ -1,30 +1,286 @@
 import globals
 import re
 import debug
+import atexit
+import multiprocessing
+import multiprocessing.util
+import tech
 
 OPTS = globals.get_opts()
 
+# The worker processes of parallel_map and the state of this process
+# that they were forked with. They live for the whole characterization
+# so that each one keeps its simulator session (see sim_session).
+pool = None
+pool_state = None
+
         
 def relative_compare(value1,value2,error_tolerance=0.001):
     """ This is used to compare relative values for convergence. """
     return (abs(value1 - value2) / max(value1,value2) <= error_tolerance)
 
 
-def parse_output(filename, key):
-    """Parses a hspice output.lis file for a key value"""
-    full_filename="{0}{1}.lis".format(OPTS.openram_temp, filename)
+# A measure result starts a line: "delay0 = 1.2e-10 targ= ..." (ngspice)
+# or "  delay0=  1.2e-10  targ= ..." (hspice).
+measure_pattern = re.compile(r"^\s*(\w+)\s*=\s*(\S+)")
+
+# The measure name of a point in a batched simulation, e.g. delay0_p3
+batch_name_pattern = re.compile(r"^(\w+)_p(\d+)$")
+
+# A number with an optional spice scale suffix and trailing units (e.g. 1.2ns)
+spice_number_pattern = re.compile(r"^([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)(meg|mil|[tgkmunpfa])?[a-z]*$",
+                                  re.IGNORECASE)
+
+spice_scales = {"t": 1e12,
+                "g": 1e9,
+                "meg": 1e6,
+                "k": 1e3,
+                "mil": 25.4e-6,
+                "m": 1e-3,
+                "u": 1e-6,
+                "n": 1e-9,
+                "p": 1e-12,
+                "f": 1e-15,
+                "a": 1e-18}
+
+
+def parse_spice_list(filename, temp_dir=None):
+    """Parses a spice output .lis file in a single pass and returns a
+    dictionary of all of the measure results. The names are lower case
+    and the values are floats or False if the measure failed."""
+    if temp_dir == None:
+        temp_dir = OPTS.openram_temp
+    full_filename="{0}{1}.lis".format(temp_dir, filename)
+    try:
+        f = open(full_filename, "r")
+    except IOError:
+        debug.error("Unable to open spice output file: {0}".format(full_filename),1)
+
+    measures = {}
+    for line in f:
+        result = measure_pattern.match(line)
+        if result == None:
+            continue
+        key = result.group(1).lower()
+        # the first result of a name is the one we want
+        if key in measures:
+            continue
+        measures[key] = measure_value(result.group(2))
+    f.close()
+
+    debug.info(3, "Measures: {0}".format(measures))
+    return measures
+
+def parse_spice_batch(filename, num_points, temp_dir=None):
+    """Parses the output of a batched simulation (see
+    stimuli.write_batch_control) in a single pass and returns a list
+    with a dictionary of measure results for each point. The result of
+    a point is either named with a _p<index> suffix (ngspice) or is the
+    n-th result of its name (hspice .alter runs)."""
+    if temp_dir == None:
+        temp_dir = OPTS.openram_temp
+    full_filename="{0}{1}.lis".format(temp_dir, filename)
     try:
         f = open(full_filename, "r")
     except IOError:
         debug.error("Unable to open spice output file: {0}".format(full_filename),1)
-    contents = f.read()
-    val = re.search(r"{0}\s*=\s*(-?\d+.?\d*\S*)\s+.*".format(key), contents)
-    if val != None:
-        debug.info(3, "Key = " + key + " Val = " + val.group(1))
-        return val.group(1)
+
+    results = [{} for i in range(num_points)]
+    counts = {}
+    for line in f:
+        result = measure_pattern.match(line)
+        if result == None:
+            continue
+        key = result.group(1).lower()
+        point = batch_name_pattern.match(key)
+        if point:
+            key = point.group(1)
+            index = int(point.group(2))
+        else:
+            index = counts.get(key, 0)
+            counts[key] = index + 1
+        if index < num_points and key not in results[index]:
+            results[index][key] = measure_value(result.group(2))
+    f.close()
+
+    debug.info(3, "Batch measures: {0}".format(results))
+    return results
+
+def measure_value(text):
+    """ Returns the float value of a measure result or False if it is
+    not a number (e.g. failed). """
+    if spice_number_pattern.match(text):
+        return convert_to_float(text)
+    return False
+
+def run_job(job):
+    """ Runs a single (function, arguments) job in a worker process. A
+    debug.error in the worker raises SystemExit which would otherwise
+    kill the worker and hang the pool, so it is returned instead. """
+    (func, args) = job
+    try:
+        return (True, func(args))
+    except SystemExit as e:
+        return (False, e.code)
+
+def init_worker():
+    """ Stops the simulator sessions of a pool worker when it exits.
+    The workers leave with os._exit so the atexit functions don't
+    run, but the multiprocessing finalizers do. """
+    import sim_session
+    multiprocessing.util.Finalize(None, sim_session.close_sessions, exitpriority=10)
+
+def process_state():
+    """ Returns a description of the state of this process that the
+    pool workers copy when they are forked: the options that were
+    changed and the corner of the simulations. """
+    return repr((sorted(OPTS.__dict__.items()),
+                 tech.spice["fet_models"],
+                 tech.spice["supply_voltage"],
+                 tech.spice["temp"]))
+
+def get_pool():
+    """ Returns the pool of worker processes, starting it the first
+    time. The workers are started again if the state that they were
+    forked with has changed since. """
+    global pool, pool_state
+    state = process_state()
+    if pool != None and state != pool_state:
+        debug.info(2, "Restarting the worker processes for the changed options.")
+        close_pool()
+    if pool == None:
+        debug.info(2, "Starting {0} worker processes".format(OPTS.num_procs))
+        pool = multiprocessing.Pool(OPTS.num_procs, initializer=init_worker)
+        pool_state = state
+    return pool
+
+def close_pool():
+    """ Stops the worker processes (and their simulator sessions). """
+    global pool, pool_state
+    if pool == None:
+        return
+    pool.close()
+    pool.join()
+    pool = None
+    pool_state = None
+
+atexit.register(close_pool)
+
+def parallel_map(func, args_list):
+    """ Maps func over args_list using up to OPTS.num_procs worker
+    processes. The results are returned in the order of args_list. func
+    must be a module level function so that it can be pickled. The jobs
+    run on the workers of get_pool. """
+    num_procs = min(OPTS.num_procs, len(args_list))
+    # pool workers can't start their own pools so they run their jobs
+    # in order
+    if num_procs <= 1 or multiprocessing.current_process().daemon:
+        return map(func, args_list)
+
+    debug.info(2, "Running {0} jobs on {1} processes".format(len(args_list), num_procs))
+    results = get_pool().map(run_job, [(func, args) for args in args_list])
+
+    for (success, value) in results:
+        if not success:
+            debug.error("Parallel job failed.", value)
+    return [value for (success, value) in results]
+
+def search_arity():
+    """ Returns the number of ways (K) that a bracket search divides its
+    bracket in each round. It doesn't depend on OPTS.num_procs, which
+    only decides how many of the K-1 probes are simulated at once. """
+    return max(2, OPTS.search_arity)
+
+def secant_estimate(feasible, feasible_result, infeasible, infeasible_result):
+    """ Returns where the pass/fail metric of a bracket crosses zero by
+    linear interpolation or None if either end has no metric. """
+    feasible_metric = feasible_result[1]
+    infeasible_metric = infeasible_result[1]
+    if feasible_metric == None or infeasible_metric == None:
+        return None
+    if feasible_metric > 0 or infeasible_metric <= 0:
+        return None
+    fraction = -feasible_metric / float(infeasible_metric - feasible_metric)
+    return feasible + fraction * (infeasible - feasible)
+
+def bracket_probes(feasible, infeasible, estimate, num_probes, tolerance):
+    """ Returns the probe points of a search round in order from the
+    feasible to the infeasible end of the bracket. Without an estimate,
+    they divide the bracket evenly. With an estimate, they are
+    clustered around it at geometrically growing distances starting at
+    half of the tolerance so that a good estimate converges in one
+    round. """
+    width = infeasible - feasible
+    if estimate == None:
+        fractions = [(i + 1.0) / (num_probes + 1) for i in range(num_probes)]
     else:
-        return "Failed"
-    
+        center = (estimate - feasible) / width
+        step = 0.5 * tolerance * max(abs(feasible), abs(infeasible)) / abs(width)
+        if num_probes % 2 == 1:
+            fractions = [center]
+        else:
+            fractions = []
+        distance = step
+        while len(fractions) < num_probes:
+            fractions.extend([center - distance, center + distance])
+            distance *= 2
+        # stay strictly inside of the bracket
+        fractions = sorted(set(min(max(f, 0.05), 0.95) for f in fractions))
+    return [feasible + f * width for f in fractions]
+
+def bracket_search(evaluate, feasible, infeasible, tolerance, feasible_result=(True, None, None), time_out=25):
+    """Searches for the boundary between a feasible and an infeasible
+    value (in either order) until they are within a relative tolerance.
+
+    evaluate(points) simulates a list of points (in parallel) and
+    returns a (passed, metric, data) result for each one. The metric is
+    negative or zero when a point passes and positive when it fails. It
+    may be None when the simulation gives no number (e.g. it failed).
+
+    Each round evaluates the K-1 interior points that divide the
+    bracket in K parts, so it shrinks by K instead of 2. Once the
+    metrics of the bracket are monotone, the next probes are placed
+    around the secant estimate of the boundary instead. With a single
+    probe, a secant round that does not halve the bracket is followed
+    by a bisection round.
+
+    Returns the last feasible point and the data of its result."""
+    num_probes = search_arity() - 1
+    infeasible_result = (False, None, None)
+    secant_stalled = False
+    while not relative_compare(feasible, infeasible, error_tolerance=tolerance):
+        time_out -= 1
+        if (time_out <= 0):
+            debug.error("Timed out, could not converge on {0} vs {1}.".format(feasible, infeasible),2)
+
+        estimate = None
+        if not secant_stalled:
+            estimate = secant_estimate(feasible, feasible_result, infeasible, infeasible_result)
+        probes = bracket_probes(feasible, infeasible, estimate, num_probes, tolerance)
+        debug.info(2, "Bracket search: feasible {0} infeasible {1} probes {2}".format(feasible, infeasible, probes))
+        results = evaluate(probes)
+
+        previous_width = abs(infeasible - feasible)
+        metrics = [feasible_result[1]]
+        for (point, result) in zip(probes, results):
+            metrics.append(result[1])
+            if result[0]:
+                (feasible, feasible_result) = (point, result)
+            else:
+                # the boundary is before the first failing point
+                (infeasible, infeasible_result) = (point, result)
+                break
+
+        # the secant is only trusted if the metric is monotone
+        metrics = [m for m in metrics + [infeasible_result[1]] if m != None]
+        monotone = all(m1 <= m2 for (m1, m2) in zip(metrics, metrics[1:]))
+        if not monotone:
+            infeasible_result = (False, None, None)
+        secant_stalled = (estimate != None and num_probes == 1
+                          and abs(infeasible - feasible) > 0.5 * previous_width)
+
+    return (feasible, feasible_result[2])
+
 def round_time(time,time_precision=3):
     # times are in ns, so this is how many digits of precision
     # 3 digits = 1ps
@@ -42,34 +298,69 @@ def round_voltage(voltage,voltag_precision=5):
     return round(voltage,voltage_precision)
 
 def convert_to_float(number):
-    """Converts a string into a (float) number; also converts units(m,u,n,p)"""
+    """Converts a string into a (float) number; also converts scientific
+    notation and spice units (meg,k,m,u,n,p,f,etc.)"""
     if number == "Failed":
         return False
-    
-    # start out with a binary value
-    float_value = False
-    try:  
-        # checks if string is a float without letter units
-        float_value = float(number)
+
+    # float() handles plain and scientific notation
+    try:
+        return float(number)
     except ValueError:
-        # see if it is in scientific notation
-        unit = re.search(r"(-?\d+\.?\d*)e(\-?\+?\d+)", number)
-        if unit != None:
-            float_value=float(unit.group(1)) * (10 ^ float(unit.group(2)))
-            
-        # see if it is in spice notation
-        unit = re.search(r"(-?\d+\.?\d*)(m?u?n?p?f?)", number)
-        if unit != None:
-            float_value = {
-                'm': lambda x: x * 0.001,  # milli
-                'u': lambda x: x * 0.000001,  # micro
-                'n': lambda x: x * 0.000000001,  # nano
-                'p': lambda x: x * 0.000000000001,  # pico
-                'f': lambda x: x * 0.000000000000001  # femto
-                }[unit.group(2)](float(unit.group(1)))
-
-    # if we weren't able to convert it to a float then error out
-    if not type(float_value)==float:
+        pass
+
+    # see if it is in spice notation
+    unit = spice_number_pattern.match(number)
+    if unit == None:
+        # if we weren't able to convert it to a float then error out
         debug.error("Invalid number: {0}".format(number),1)
 
+    float_value = float(unit.group(1))
+    if unit.group(2) != None:
+        float_value *= spice_scales[unit.group(2).lower()]
     return float_value
+
+def read_subckt(sp_file, name):
+    """ Returns the pins and the lines (with the continuation lines
+    joined and without comments) of a subcircuit of a spice file. """
+    lines = []
+    for line in open(sp_file):
+        line = line.strip()
+        if line == "" or line.startswith("*"):
+            continue
+        if line.startswith("+") and len(lines) > 0:
+            lines[-1] += " " + line[1:]
+        else:
+            lines.append(line)
+
+    pins = None
+    body = []
+    for line in lines:
+        words = line.split()
+        if words[0].lower() == ".subckt" and words[1] == name:
+            pins = words[2:]
+        elif pins == None:
+            continue
+        elif words[0].lower() == ".ends":
+            break
+        else:
+            body.append(line)
+    debug.check(pins != None, "Couldn't find subcircuit {0} in {1}.".format(name, sp_file))
+    return (pins, body)
+
+def storage_nodes(lines):
+    """ Returns the (q, qb) storage nodes of the lines of a bitcell: the
+    nodes that the access transistors (gate on wl) connect to bl and
+    br. """
+    nodes = {}
+    for line in lines:
+        words = line.split()
+        if words[0][0] not in "mM" or words[2] != "wl":
+            continue
+        (drain, source) = (words[1], words[3])
+        if drain in ["bl", "br"]:
+            nodes[drain] = source
+        elif source in ["bl", "br"]:
+            nodes[source] = drain
+    debug.check(len(nodes) == 2, "Couldn't find the storage nodes of the bitcell.")
+    return (nodes["bl"], nodes["br"])
@@ -5,11 +5,26 @@ import debug
 import tech
 import math
 import stimuli
+import scratch
 import charutils as ch
+import measure
+import rawfile
+import trim_spice
+import sim_session
+import simulator
+import surrogate
+import numpy as np
 import utils
 
 OPTS = globals.get_opts()
 
+# The values of a simulated point after its success flag (see
+# check_delays): the delays and slews (ns) and the average powers (mW)
+# of the read and write cycles
+point_values = ["delay1", "slew1", "delay0", "slew0",
+                "read0_internal_power", "read1_internal_power",
+                "write0_internal_power", "write1_internal_power"]
+
 class delay():
     """
     Functions to measure the delay of the SRAM at a given address and
@@ -17,33 +32,51 @@ class delay():
     """
 
     def __init__(self,sram,spfile):
+        self.sram = sram
         self.name = sram.name
         self.num_words = sram.num_words
         self.word_size = sram.word_size
         self.addr_size = sram.addr_size
         self.sram_sp_file = spfile
+        # the analytic simulator answers the measures from its model
+        simulator.add_model(sram)
         
         self.vdd = tech.spice["supply_voltage"]
         self.gnd = tech.spice["gnd_voltage"]
 
+        # the period whose time step every simulation uses or None for
+        # the step of the simulated period (see tran_step)
+        self.step_period = None
+
     def check_arguments(self):
         """Checks if arguments given for write_stimulus() meets requirements"""
-        try:
-            int(self.probe_address, 2)
-        except ValueError:
-            debug.error("Probe Address is not of binary form: {0}".format(self.probe_address),1)
+        for (probe_address, probe_data) in self.probes:
+            try:
+                int(probe_address, 2)
+            except ValueError:
+                debug.error("Probe Address is not of binary form: {0}".format(probe_address),1)
+
+            if len(probe_address) != self.addr_size:
+                debug.error("Probe Address's number of bits does not correspond to given SRAM",1)
 
-        if len(self.probe_address) != self.addr_size:
-            debug.error("Probe Address's number of bits does not correspond to given SRAM",1)
+            if not isinstance(probe_data, int) or probe_data>self.word_size or probe_data<0:
+                debug.error("Given probe_data is not an integer to specify a data bit",1)
 
-        if not isinstance(self.probe_data, int) or self.probe_data>self.word_size or self.probe_data<0:
-            debug.error("Given probe_data is not an integer to specify a data bit",1)
 
+    def __getstate__(self):
+        """ Drop the (closed) stimulus file so that the characterizer can
+        be pickled and sent to the simulation worker processes. """
+        state = self.__dict__.copy()
+        state.pop("sf", None)
+        # the workers only simulate and do not need the design
+        state.pop("sram", None)
+        return state
 
-    def write_stimulus(self, period, load, slew):
+    def write_stimulus(self, period, load, slew, temp_dir=None):
         """Creates a stimulus file for simulations to probe a certain bitcell, given an address and data-position of the data-word 
         (probe-address form: '111010000' LSB=0, MSB=1)
         (probe_data form: number corresponding to the bit position of data-bus, begins with position 0) 
+        With several probes, each one is written and read in its own cycles.
         """
         self.check_arguments()
 
@@ -51,9 +84,108 @@ class delay():
         self.obtain_cycle_times(period)
 
         # creates and opens stimulus file for writing
-        temp_stim = "{0}/stim.sp".format(OPTS.openram_temp)
+        if temp_dir == None:
+            temp_dir = OPTS.openram_temp
+        temp_stim = "{0}/stim.sp".format(temp_dir)
         self.sf = open(temp_stim, "w")
         self.sf.write("* Stimulus for period of {0}n load={1} slew={2}\n\n".format(period,load,slew))
+        if sim_session.use_sessions():
+            # only the parameters change between the stimuli of a search
+            # so the session reuses the loaded netlist
+            stimuli.write_params(self.sf, {"stim_period": period, "stim_slew": slew, "stim_load": load})
+            numeric_period = period
+            period = stimuli.param_time(a=1)
+            slew = stimuli.param_time(b=1)
+            load = None
+            self.obtain_cycle_times(period)
+
+        self.write_circuit(period, load, slew)
+        self.write_measures(period)
+
+        # run until the end of the final idle cycle
+        stimuli.write_control(self.sf,
+                              self.end_time,
+                              step=self.tran_step(period),
+                              save_signals=self.saved_signals())
+
+        self.sf.close()
+        if sim_session.use_sessions():
+            # measuring the waveform needs the numeric cycle times
+            self.obtain_cycle_times(numeric_period)
+
+    def write_batch_stimulus(self, points, temp_dir):
+        """Creates a single stimulus file that simulates a list of
+        (period, load, slew) points. The period, slew and load are
+        parameters of the stimulus and only the delays and slews are
+        measured for each point."""
+        self.check_arguments()
+
+        params = []
+        end_times = []
+        steps = []
+        for (period, load, slew) in points:
+            params.append({"stim_period": period, "stim_slew": slew, "stim_load": load})
+            self.obtain_cycle_times(period)
+            end_times.append(self.end_time)
+            steps.append(self.tran_step(period))
+
+        # the cycle times and edges are expressions of the parameters
+        period = stimuli.param_time(a=1)
+        slew = stimuli.param_time(b=1)
+        self.obtain_cycle_times(period)
+
+        self.sf = open(temp_dir + "stim.sp", "w")
+        self.sf.write("* Batched stimulus of {0} points\n\n".format(len(points)))
+        stimuli.write_params(self.sf, params[0])
+        self.write_circuit(period, None, slew)
+        if simulator.get_simulator().batch == "alter":
+            # the same measures are repeated for each .alter point
+            self.write_delay_measures(period)
+            self.write_power_measures(period)
+
+        def write_point_measures(index):
+            (period, load, slew) = points[index]
+            self.obtain_cycle_times(period)
+            self.write_delay_measures(period, suffix="_P{0}".format(index), control=True)
+            self.write_power_measures(period, suffix="_P{0}".format(index), control=True)
+
+        stimuli.write_batch_control(self.sf, params, end_times, steps, write_point_measures,
+                                    save_signals=self.saved_signals())
+
+        self.sf.close()
+
+    def saved_signals(self):
+        """ Returns the signals that the measures (and measure_waveform)
+        need, which are the only ones a simulation has to keep. """
+        return (["v(clk)"]
+                + ["v(D[{0}])".format(bit) for bit in self.probe_bits()]
+                + ["v({0})".format(stimuli.vdd_name),
+                   "i(v{0})".format(stimuli.vdd_name)])
+
+    def probe_bits(self):
+        """ Returns the data bits of the probes in order. """
+        bits = []
+        for (probe_address, probe_data) in self.probes:
+            if probe_data not in bits:
+                bits.append(probe_data)
+        return bits
+
+    def probe_suffix(self, index):
+        """ Returns the suffix of the measure names of a probe. A single
+        probe has the plain names. """
+        if len(self.probes) == 1:
+            return ""
+        return "_PROBE{0}".format(index)
+
+    def probe_cycle(self, cycle, index):
+        """ Returns the cycle of a probe that is the cycle of the first
+        probe (e.g. read0_cycle). """
+        return cycle + index * self.cycles_per_probe
+
+    def write_circuit(self, period, load, slew):
+        """ Writes the SRAM, its loads and the input signals to the
+        stimulus file. A load of None is the load parameter of a batched
+        stimulus. """
 
         # include files in stimulus file
         model_list = tech.spice["fet_models"] + [self.sram_sp_file]
@@ -73,7 +205,7 @@ class delay():
 
         self.sf.write("* SRAM output loads\n")
         for i in range(self.word_size):
-            self.sf.write("CD{0} D[{0}] 0 {1}f\n".format(i,load))
+            self.sf.write("CD{0} D[{0}] 0 {1}\n".format(i,stimuli.load_str(load)))
         
         # add access transistors for data-bus
         self.sf.write("* Transmission Gates for data-bus and control signals\n")
@@ -82,12 +214,13 @@ class delay():
         # generate data and addr signals
         self.sf.write("* Generation of data and address signals\n")
         for i in range(self.word_size):
-            if i == self.probe_data:
+            if i in self.probe_bits():
                 stimuli.gen_data(stim_file=self.sf,
                                  clk_times=self.cycle_times,
                                  sig_name="DATA[{0}]".format(i),
                                  period=period,
-                                 slew=slew)
+                                 slew=slew,
+                                 probed=[probe_data == i for (probe_address, probe_data) in self.probes])
             else:
                 stimuli.gen_constant(stim_file=self.sf,
                                      sig_name="D[{0}]".format(i),
@@ -95,15 +228,15 @@ class delay():
 
         stimuli.gen_addr(self.sf,
                          clk_times=self.cycle_times,
-                         addr=self.probe_address,
+                         addr=[probe_address for (probe_address, probe_data) in self.probes],
                          period=period,
                          slew=slew)
 
         # generate control signals
         self.sf.write("* Generation of control signals\n")
-        stimuli.gen_csb(self.sf, self.cycle_times, period, slew)
-        stimuli.gen_web(self.sf, self.cycle_times, period, slew)
-        stimuli.gen_oeb(self.sf, self.cycle_times, period, slew)
+        stimuli.gen_csb(self.sf, self.cycle_times, period, slew, len(self.probes))
+        stimuli.gen_web(self.sf, self.cycle_times, period, slew, len(self.probes))
+        stimuli.gen_oeb(self.sf, self.cycle_times, period, slew, len(self.probes))
 
         self.sf.write("* Generation of global clock signal\n")
         stimuli.gen_pulse(stim_file=self.sf,
@@ -114,100 +247,141 @@ class delay():
                           period=period,
                           t_rise = slew,
                           t_fall = slew)
-                          
-        self.write_measures(period)
-
-        # run until the last cycle time
-        stimuli.write_control(self.sf,self.cycle_times[-1])
-
-        self.sf.close()
 
     def write_measures(self,period):
         # meas statement for delay and power measurements
         self.sf.write("* Measure statements for delay and power\n")
-
+        self.write_delay_measures(period)
+        self.write_power_measures(period)
+
+    def write_delay_measures(self, period, suffix="", control=False):
+        """ Writes the delay and slew measures of each probe. The suffix
+        makes the names unique for each point of a batched stimulus and
+        control writes them as ngspice control commands. """
+        for index in range(len(self.probes)):
+            self.write_probe_delay_measures(period, index, self.probe_suffix(index) + suffix, control)
+
+    def write_probe_delay_measures(self, period, index, suffix, control):
+        """ Writes the delay and slew measures of a probe. """
         trig_name = "clk"
-        targ_name = "{0}".format("D[{0}]".format(self.probe_data))
+        targ_name = "{0}".format("D[{0}]".format(self.probes[index][1]))
         trig_val = targ_val = 0.5 * self.vdd
+        read0_td = self.cycle_times[self.probe_cycle(self.read0_cycle, index)]+0.5*period
+        read1_td = self.cycle_times[self.probe_cycle(self.read1_cycle, index)]+0.5*period
         # add measure statments for delay0
         # delay the target to measure after the negetive edge
         stimuli.gen_meas_delay(stim_file=self.sf,
-                               meas_name="DELAY0",
+                               meas_name="DELAY0"+suffix,
                                trig_name=trig_name,
                                targ_name=targ_name,
                                trig_val=trig_val,
                                targ_val=targ_val,
                                trig_dir="FALL",
                                targ_dir="FALL",
-                               td=self.cycle_times[self.read0_cycle]+0.5*period)
+                               td=read0_td,
+                               control=control)
 
         stimuli.gen_meas_delay(stim_file=self.sf,
-                               meas_name="DELAY1",
+                               meas_name="DELAY1"+suffix,
                                trig_name=trig_name,
                                targ_name=targ_name,
                                trig_val=trig_val,
                                targ_val=targ_val,
                                trig_dir="FALL",
                                targ_dir="RISE",
-                               td=self.cycle_times[self.read1_cycle]+0.5*period)
+                               td=read1_td,
+                               control=control)
 
         stimuli.gen_meas_delay(stim_file=self.sf,
-                               meas_name="SLEW0",
+                               meas_name="SLEW0"+suffix,
                                trig_name=targ_name,
                                targ_name=targ_name,
                                trig_val=0.9*self.vdd,
                                targ_val=0.1*self.vdd,
                                trig_dir="FALL",
                                targ_dir="FALL",
-                               td=self.cycle_times[self.read0_cycle]+0.5*period)
+                               td=read0_td,
+                               control=control)
 
         stimuli.gen_meas_delay(stim_file=self.sf,
-                               meas_name="SLEW1",
+                               meas_name="SLEW1"+suffix,
                                trig_name=targ_name,
                                targ_name=targ_name,
                                trig_val=0.1*self.vdd,
                                targ_val=0.9*self.vdd,
                                trig_dir="RISE",
                                targ_dir="RISE",
-                               td=self.cycle_times[self.read1_cycle]+0.5*period)
-        
-        # add measure statements for power
-        t_initial = self.cycle_times[self.write0_cycle]
-        t_final = self.cycle_times[self.write0_cycle+1]
+                               td=read1_td,
+                               control=control)
+
+    def write_power_measures(self, period, suffix="", control=False):
+        """ Writes the average power measures of the read and write
+        cycles of each probe and the leakage power. The suffix and
+        control are the same as write_delay_measures. """
+        power_cycles = [("WRITE0_POWER", self.write0_cycle),
+                        ("WRITE1_POWER", self.write1_cycle),
+                        ("READ0_POWER", self.read0_cycle),
+                        ("READ1_POWER", self.read1_cycle)]
+        for index in range(len(self.probes)):
+            for (name, cycle) in power_cycles:
+                cycle = self.probe_cycle(cycle, index)
+                stimuli.gen_meas_power(stim_file=self.sf,
+                                       meas_name=name+self.probe_suffix(index)+suffix,
+                                       t_initial=self.cycle_times[cycle],
+                                       t_final=self.cycle_times[cycle+1],
+                                       control=control)
+
+        (t_initial, t_final) = self.leakage_window(period)
         stimuli.gen_meas_power(stim_file=self.sf,
-                               meas_name="WRITE0_POWER",
+                               meas_name="LEAKAGE_POWER"+suffix,
                                t_initial=t_initial,
-                               t_final=t_final)
-
-        t_initial = self.cycle_times[self.write1_cycle]
-        t_final = self.cycle_times[self.write1_cycle+1]
-        stimuli.gen_meas_power(stim_file=self.sf,
-                               meas_name="WRITE1_POWER",
-                               t_initial=t_initial,
-                               t_final=t_final)
+                               t_final=t_final,
+                               control=control)
+
+    def tran_step(self, period):
+        """ Returns the largest time step (ns) of a simulation of a
+        period. While the step_period is set, it is the step of that
+        period so that the delays of a search are compared with the
+        same numerical error. """
+        if self.step_period != None:
+            return stimuli.tran_step(self.step_period)
+        return stimuli.tran_step(period)
+
+    def leakage_window(self, period):
+        """ Returns the idle window (ns) that the leakage power is
+        averaged over. It is the last quarter of the final idle cycle:
+        the SRAM has been deselected for most of a cycle after the last
+        operation and the clock is low. The idle cycle before the first
+        cycle isn't used since it is dominated by the charging of the
+        circuit after the initial conditions. """
+        return (self.cycle_times[self.idle_cycle] + 0.75*period, self.end_time)
         
-        t_initial = self.cycle_times[self.read0_cycle]
-        t_final = self.cycle_times[self.read0_cycle+1]
-        stimuli.gen_meas_power(stim_file=self.sf,
-                               meas_name="READ0_POWER",
-                               t_initial=t_initial,
-                               t_final=t_final)
+    def predict_delay(self, load, slew):
+        """ Returns the read delay (ns) of the analytical model of the
+        SRAM or None if there is no prediction. """
+        model = self.sram.analytical_model([slew], [load])
+        # a float and not a NumPy scalar (the lib loads are arrays)
+        predicted_delay = float(max(model["delay1"][0], model["delay0"][0]))
+        if predicted_delay <= 0:
+            return None
+        debug.info(1, "Analytical read delay: {0}ns".format(predicted_delay))
+        return predicted_delay
 
-        t_initial = self.cycle_times[self.read1_cycle]
-        t_final = self.cycle_times[self.read1_cycle+1]
-        stimuli.gen_meas_power(stim_file=self.sf,
-                               meas_name="READ1_POWER",
-                               t_initial=t_initial,
-                               t_final=t_final)
-        
     def find_feasible_period(self, load, slew):
         """Uses an initial period and finds a feasible period before we
         run the binary search algorithm to find min period. We check if
         the given clock period is valid and if it's not, we continue to
         double the period until we find a valid period to use as a
-        starting point. """
-
-        feasible_period = tech.spice["feasible_period"]
+        starting point. The read has to fit in half of a cycle, so the
+        initial period is four times the analytical read delay, which
+        leaves a factor of two for the model error. Without a prediction
+        it is the feasible period of the technology. """
+
+        predicted_delay = self.predict_delay(load, slew)
+        if predicted_delay == None:
+            feasible_period = tech.spice["feasible_period"]
+        else:
+            feasible_period = ch.round_time(4.0 * predicted_delay)
         time_out = 8
         while True:
             debug.info(1, "Trying feasible period: {0}ns".format(feasible_period))
@@ -216,7 +390,7 @@ class delay():
             if (time_out <= 0):
                 debug.error("Timed out, could not find a feasible period.",2)
 
-            (success, feasible_delay1, feasible_slew1, feasible_delay0, feasible_slew0)=self.run_simulation(feasible_period,load,slew)
+            (success, feasible_delay1, feasible_slew1, feasible_delay0, feasible_slew0)=self.run_simulation(feasible_period,load,slew)[0:5]
             if not success:
                 feasible_period = 2 * feasible_period
                 continue
@@ -230,101 +404,219 @@ class delay():
         works. If so, it returns True and the delays and slews."""
 
         # Checking from not data_value to data_value
-        self.write_stimulus(period, load, slew)
-        stimuli.run_sim()
-        delay0 = ch.convert_to_float(ch.parse_output("timing", "delay0"))
-        delay1 = ch.convert_to_float(ch.parse_output("timing", "delay1"))        
-        slew0 = ch.convert_to_float(ch.parse_output("timing", "slew0"))
-        slew1 = ch.convert_to_float(ch.parse_output("timing", "slew1"))        
-        
+        with scratch.scratch_dir("delay") as job:
+            self.write_stimulus(period, load, slew, job.path)
+            measures = self.simulate(period, job.path)
+        # The power is only used from the feasible period simulation
+        self.power = {}
+        for power_name in ["read0_power", "read1_power", "write0_power", "write1_power", "leakage_power"]:
+            self.power[power_name] = measures.get(power_name, False)
+        return self.check_delays(period, load, slew, measures)
+
+    def simulate(self, period, temp_dir):
+        """ Runs the stimulus in temp_dir and returns its measures. With
+        OPTS.measure_waveforms (ngspice only), they are computed from the
+        saved waveform instead of the .meas results. """
+        if OPTS.measure_waveforms and simulator.get_simulator().saves_waveforms:
+            stimuli.run_sim(temp_dir, save_waveform=True)
+            return self.worst_probe(self.measure_waveform(rawfile.rawfile(temp_dir + "timing.raw"), period))
+        stimuli.run_sim(temp_dir)
+        return self.worst_probe(ch.parse_spice_list("timing", temp_dir))
+
+    def worst_probe(self, measures):
+        """ Returns the measures of the worst probe: the largest of each
+        delay, slew and power of the probes. A measure fails if it
+        failed for any probe. """
+        if len(self.probes) == 1:
+            return measures
+        # the leakage is measured once for every probe
+        worst = {"leakage_power": measures.get("leakage_power", False)}
+        for name in ["delay0", "delay1", "slew0", "slew1",
+                     "read0_power", "read1_power", "write0_power", "write1_power"]:
+            values = [measures.get(name + self.probe_suffix(index).lower(), False)
+                      for index in range(len(self.probes))]
+            if False in [type(value) == float for value in values]:
+                worst[name] = False
+                continue
+            worst[name] = max(values)
+            index = values.index(worst[name])
+            debug.info(3, "Worst {0} is probe {1}".format(name, self.probes[index]))
+        return worst
+
+    def measure_waveform(self, waveform, period):
+        """ Computes the delay, slew and power measures of write_measures
+        from a simulated waveform. The names and units are the same as
+        the .meas results. """
+        time = waveform.time()
+        clk = waveform.signal("v(clk)")
+        half_vdd = 0.5 * self.vdd
+
+        measures = {}
+        power_names = []
+        cycles = []
+        for (index, (probe_address, probe_data)) in enumerate(self.probes):
+            data = waveform.signal("v(D[{0}])".format(probe_data))
+            suffix = self.probe_suffix(index).lower()
+
+            # the reads are measured after the negative clock edge
+            read0_td = 1e-9 * (self.cycle_times[self.probe_cycle(self.read0_cycle, index)] + 0.5*period)
+            read1_td = 1e-9 * (self.cycle_times[self.probe_cycle(self.read1_cycle, index)] + 0.5*period)
+            measures["delay0"+suffix] = measure.delay(time, clk, half_vdd, "FALL", data, half_vdd, "FALL", read0_td)[0]
+            measures["delay1"+suffix] = measure.delay(time, clk, half_vdd, "FALL", data, half_vdd, "RISE", read1_td)[0]
+            measures["slew0"+suffix] = measure.slew(time, data, self.vdd, "FALL", read0_td)[0]
+            measures["slew1"+suffix] = measure.slew(time, data, self.vdd, "RISE", read1_td)[0]
+
+            power_names += [name + suffix for name in ["write0_power", "write1_power", "read0_power", "read1_power"]]
+            cycles += [self.probe_cycle(cycle, index)
+                       for cycle in [self.write0_cycle, self.write1_cycle, self.read0_cycle, self.read1_cycle]]
+
+        # the average power of all of the cycles and the leakage in one pass
+        power_names.append("leakage_power")
+        (leakage_initial, leakage_final) = self.leakage_window(period)
+        t_initial = 1e-9 * np.array([self.cycle_times[cycle] for cycle in cycles] + [leakage_initial])
+        t_final = 1e-9 * np.array([self.cycle_times[cycle+1] for cycle in cycles] + [leakage_final])
+        power = measure.average_power(time,
+                                      waveform.signal("v({0})".format(stimuli.vdd_name)),
+                                      waveform.signal("i(v{0})".format(stimuli.vdd_name)),
+                                      t_initial,
+                                      t_final)
+        measures.update(zip(power_names, power))
+
+        measures = dict((name, measure.as_measure(value)) for (name, value) in measures.items())
+        debug.info(3, "Waveform measures: {0}".format(measures))
+        return measures
+
+    def run_batch(self, points):
+        """ Simulates a list of (period, load, slew) points with a single
+        simulator invocation and returns the result of each point like
+        run_simulation. """
+        with scratch.scratch_dir("batch") as job:
+            self.write_batch_stimulus(points, job.path)
+            stimuli.run_sim(job.path)
+            results = ch.parse_spice_batch("timing", len(points), job.path)
+        return [self.check_delays(period, load, slew, self.worst_probe(measures))
+                for ((period, load, slew), measures) in zip(points, results)]
+
+    def check_delays(self, period, load, slew, measures):
+        """ Checks the measured delays and slews of a simulation. If they
+        are valid, it returns True and the values of point_values: the
+        delays and slews in ns and the powers in mW. """
+        delay0 = measures.get("delay0", False)
+        delay1 = measures.get("delay1", False)
+        slew0 = measures.get("slew0", False)
+        slew1 = measures.get("slew1", False)
+
         # if it failed or the read was longer than a period
         if type(delay0)!=float or type(delay1)!=float or type(slew1)!=float or type(slew0)!=float:
-            return (False,0,0,0,0)
+            return (False,) + (0,)*len(point_values)
         delay0 *= 1e9
         delay1 *= 1e9
         slew0 *= 1e9
         slew1 *= 1e9
         if delay0>period or delay1>period or slew0>period or slew1>period:
-            return (False,0,0,0,0)
+            return (False,) + (0,)*len(point_values)
         else:
             debug.info(2,"Successful simulation: period {0} load {1} slew {2}, delay0={3}n delay1={4}ns slew0={5}n slew1={6}n".format(period,load,slew,delay0,delay1,slew0,slew1))
         #key=raw_input("press return to continue")
 
+        # a power that failed (or wasn't measured) is zero like the
+        # power scalars
+        powers = []
+        for name in ["read0_power", "read1_power", "write0_power", "write1_power"]:
+            power = measures.get(name, False)
+            powers.append(1e3*power if type(power)==float else 0.0)
+
         # The delay is from the negative edge for our SRAM
-        return (True,delay1,slew1,delay0,slew0)
+        return (True,delay1,slew1,delay0,slew0) + tuple(powers)
 
 
 
-    def find_min_period(self,feasible_period, load, slew, feasible_delay1, feasible_delay0):
+    def find_min_period(self,feasible_period, load, slew, feasible_delay1, feasible_delay0, lower_bound=0.0):
         """Searches for the smallest period with output delays being within 5% of 
-        long period. """
-
-        previous_period = ub_period = feasible_period
-        lb_period = 0.0
-
-        # Binary search algorithm to find the min period (max frequency) of design
-        time_out = 25
-        while True:
-            time_out -= 1
-            if (time_out <= 0):
-                debug.error("Timed out, could not converge on minimum period.",2)
-
-            target_period = 0.5 * (ub_period + lb_period)
-            debug.info(1, "MinPeriod Search: {0}ns (ub: {1} lb: {2})".format(target_period,
-                                                                             ub_period,
-                                                                             lb_period))
-
-            if self.try_period(target_period, load, slew, feasible_delay1, feasible_delay0):
-                ub_period = target_period
-            else:
-                lb_period = target_period
-
-            if ch.relative_compare(ub_period, lb_period, error_tolerance=0.05):
-                # ub_period is always feasible
-                return ub_period
-
-
-    def try_period(self, period, load, slew, feasible_delay1, feasible_delay0):
-        """ This tries to simulate a period and checks if the result
-        works. If it does and the delay is within 5% still, it returns True."""
-
-        # Checking from not data_value to data_value
-        self.write_stimulus(period,load,slew)
-        stimuli.run_sim()
-        delay0 = ch.convert_to_float(ch.parse_output("timing", "delay0"))
-        delay1 = ch.convert_to_float(ch.parse_output("timing", "delay1"))
-        slew0 = ch.convert_to_float(ch.parse_output("timing", "slew0"))
-        slew1 = ch.convert_to_float(ch.parse_output("timing", "slew1"))
+        long period. Each round of the search simulates several periods
+        in parallel (see ch.bracket_search). The lower bound is assumed to
+        be infeasible. If the search converges on it anyway, the search
+        continues down to zero. """
+
+        def evaluate(periods):
+            debug.info(1, "MinPeriod Search: {0}ns".format(periods))
+            results = self.run_points([(period, load, slew) for period in periods])
+            return [self.period_result(period, result, feasible_delay1, feasible_delay0)
+                    for (period, result) in zip(periods, results)]
+
+        # The feasible period has the feasible delays, so it is 5% from failing
+        (min_period, data) = ch.bracket_search(evaluate,
+                                               feasible=feasible_period,
+                                               infeasible=lower_bound,
+                                               tolerance=0.05,
+                                               feasible_result=(True, -0.05, None),
+                                               time_out=25)
+        if lower_bound > 0 and ch.relative_compare(min_period, lower_bound, error_tolerance=0.05):
+            debug.info(1, "Min period is at the lower bound {0}ns, searching below it.".format(lower_bound))
+            return self.find_min_period(min_period, load, slew, feasible_delay1, feasible_delay0)
+        return min_period
+
+
+    def period_result(self, period, result, feasible_delay1, feasible_delay0):
+        """ Checks the result of a period simulation for a bracket search.
+        The metric is how much further the delays are from the feasible
+        delays than the 5% that is allowed. """
+        (success, delay1, slew1, delay0, slew0) = result[0:5]
         # if it failed or the read was longer than a period
-        if type(delay0)!=float or type(delay1)!=float or type(slew1)!=float or type(slew0)!=float:
-            debug.info(2,"Invalid measures: Period {0}, delay0={1}ns, delay1={2}ns slew0={3}ns slew1={4}ns".format(period, delay0, delay1, slew0, slew1))
-            return False
-        delay0 *= 1e9
-        delay1 *= 1e9
-        slew0 *= 1e9
-        slew1 *= 1e9
-        if delay0>period or delay1>period or slew0>period or slew1>period:
-            debug.info(2,"Too long delay/slew: Period {0}, delay0={1}ns, delay1={2}ns slew0={3}ns slew1={4}ns".format(period, delay0, delay1, slew0, slew1))
-            return False
+        if not success:
+            debug.info(2,"Invalid or too long delay/slew: Period {0}".format(period))
+            return (False, None, None)
+
+        error1 = abs(delay1 - feasible_delay1) / max(delay1, feasible_delay1)
+        error0 = abs(delay0 - feasible_delay0) / max(delay0, feasible_delay0)
+        metric = max(error1, error0) - 0.05
+        if error1 > 0.05:
+            debug.info(2,"Delay too big {0} vs {1}".format(delay1,feasible_delay1))
+        elif error0 > 0.05:
+            debug.info(2,"Delay too big {0} vs {1}".format(delay0,feasible_delay0))
         else:
-            if not ch.relative_compare(delay1,feasible_delay1,error_tolerance=0.05):
-                debug.info(2,"Delay too big {0} vs {1}".format(delay1,feasible_delay1))
-                return False
-            elif not ch.relative_compare(delay0,feasible_delay0,error_tolerance=0.05):
-                debug.info(2,"Delay too big {0} vs {1}".format(delay0,feasible_delay0))
-                return False
-
-
-        #key=raw_input("press return to continue")
-
-        debug.info(2,"Successful period {0}, delay0={1}ns, delay1={2}ns slew0={3}ns slew1={4}ns".format(period, delay0, delay1, slew0, slew1))
-        return True
+            debug.info(2,"Successful period {0}, delay0={1}ns, delay1={2}ns slew0={3}ns slew1={4}ns".format(period, delay0, delay1, slew0, slew1))
+        return (metric <= 0, metric, None)
+
+    def run_points(self, points):
+        """ Simulates a list of (period, load, slew) points in parallel and
+        returns the result of each like run_simulation. If
+        OPTS.batch_sims is set, each worker simulates its share of the
+        points in one batched stimulus. """
+        if OPTS.batch_sims and simulator.get_simulator().batch != None:
+            num_batches = max(1, min(OPTS.num_procs, len(points)))
+            size = int(math.ceil(len(points) / float(num_batches)))
+            batches = [(self, points[i:i+size]) for i in range(0, len(points), size)]
+            return [result for batch in ch.parallel_map(run_batch, batches) for result in batch]
+        return ch.parallel_map(run_point, [(self,) + point for point in points])
     
+    def fill_table(self, period, slews, loads):
+        """ Returns the results of every slew/load point from the
+        simulations of a few of them and a fitted model. """
+        def evaluate(indices):
+            points = [(period, loads[j], slews[i]) for (i, j) in indices]
+            results = self.run_points(points)
+            for result in results:
+                debug.check(result[0], "Couldn't run a simulation properly.\n")
+            return [result[1:] for result in results]
+
+        table = surrogate.fill_table(evaluate, slews, loads, OPTS.surrogate_tolerance)
+        return [(True,) + values for values in table]
+
     def set_probe(self,probe_address, probe_data):
         """ Probe address and data can be set separately to utilize other
         functions in this characterizer besides analyze."""
-        self.probe_address = probe_address
-        self.probe_data = probe_data
+        self.set_probes([(probe_address, probe_data)])
+
+    def set_probes(self, probes):
+        """ Sets a list of (address, data bit) probes that are simulated
+        in consecutive cycles of each simulation. The results are the
+        worst of the probes (see worst_probe). """
+        self.probes = probes
+        (self.probe_address, self.probe_data) = probes[0]
+        if OPTS.trim_noncritical:
+            # simulate a netlist with only the probed rows and columns
+            self.sram_sp_file = trim_spice.trimmed_netlist(self.sram, probes)
 
     def analyze(self,probe_address, probe_data, slews, loads):
         """main function to calculate the min period for a low_to_high
@@ -332,35 +624,69 @@ class delay():
         that contains all both the min period and associated delays
         Dictionary Keys: min_period1, delay1, min_period0, delay0
         """
+        return self.analyze_probes([(probe_address, probe_data)], slews, loads)
+
+    def analyze_probes(self, probes, slews, loads):
+        """ Like analyze but each simulation writes and reads a list of
+        (address, data bit) probes and the results are the worst arcs of
+        the probes. """
         
-        self.set_probe(probe_address, probe_data)
+        self.set_probes(probes)
 
+        self.step_period = None
         (feasible_period, feasible_delay1, feasible_delay0) = self.find_feasible_period(max(loads), max(slews))
+        # the table points are simulated at this period (see lib.stored_delay)
+        self.feasible_period = feasible_period
+        # the min period search and the table points use the time step of
+        # the feasible period simulation that they are compared with
+        self.step_period = feasible_period
         debug.check(feasible_delay1>0,"Negative delay may not be possible")
         debug.check(feasible_delay0>0,"Negative delay may not be possible")
 
         # The power variables are just scalars. These use the final feasible period simulation
         # which should have worked.
-        read0_power=ch.convert_to_float(ch.parse_output("timing", "read0_power"))
-        write0_power=ch.convert_to_float(ch.parse_output("timing", "write0_power"))
-        read1_power=ch.convert_to_float(ch.parse_output("timing", "read1_power"))
-        write1_power=ch.convert_to_float(ch.parse_output("timing", "write1_power"))
+        read0_power=self.power["read0_power"]
+        write0_power=self.power["write0_power"]
+        read1_power=self.power["read1_power"]
+        write1_power=self.power["write1_power"]
+        leakage_power=self.power["leakage_power"]
         
+        # Each slew/load point is an independent simulation, so run them
+        # in parallel with their own scratch directories and gather them in order.
+        if OPTS.surrogate_tables:
+            results = self.fill_table(feasible_period, slews, loads)
+        else:
+            points = []
+            for slew in slews:
+                for load in loads:
+                    points.append((feasible_period, load, slew))
+            results = self.run_points(points)
+
         LH_delay = []
         HL_delay = []
         LH_slew = []
         HL_slew = []
-        for slew in slews:
-            for load in loads:
-                (success, delay1, slew1, delay0, slew0) = self.run_simulation(feasible_period, load, slew)
-                debug.check(success,"Couldn't run a simulation properly.\n")
-                LH_delay.append(delay1)
-                HL_delay.append(delay0)
-                LH_slew.append(slew1)
-                HL_slew.append(slew0)
+        for (success, delay1, slew1, delay0, slew0) in [result[0:5] for result in results]:
+            debug.check(success,"Couldn't run a simulation properly.\n")
+            LH_delay.append(delay1)
+            HL_delay.append(delay0)
+            LH_slew.append(slew1)
+            HL_slew.append(slew0)
+        # the power tables of the same simulations (see lib.write_data_bus)
+        self.power_tables = {}
+        for name in point_values[4:]:
+            index = 1 + point_values.index(name)
+            self.power_tables[name] = [result[index] for result in results]
                 
         # finds the minimum period without degrading the delays by X%
-        min_period = self.find_min_period(feasible_period, max(loads), max(slews), feasible_delay1, feasible_delay0)
+        # A period of half of the analytical read delay leaves a margin
+        # for the model error and is the lower bound of the search.
+        predicted_delay = self.predict_delay(max(loads), max(slews))
+        if predicted_delay == None:
+            lower_bound = 0.0
+        else:
+            lower_bound = min(0.5 * predicted_delay, 0.5 * feasible_period)
+        min_period = self.find_min_period(feasible_period, max(loads), max(slews), feasible_delay1, feasible_delay0, lower_bound)
         debug.check(type(min_period)==float,"Couldn't find minimum period.")
         debug.info(1, "Min Period: {0}n with a delay of {1}".format(min_period, feasible_delay1))
 
@@ -373,15 +699,16 @@ class delay():
                 "read0_power": read0_power*1e3,
                 "read1_power": read1_power*1e3,
                 "write0_power": write0_power*1e3,
-                "write1_power": write1_power*1e3
+                "write1_power": write1_power*1e3,
+                "leakage_power": leakage_power*1e3
                 }
         return data
 
 
     def obtain_cycle_times(self, period):
         """Returns a list of key time-points [ns] of the waveform (each rising edge)
-        of the cycles to do a timing evaluation. The last time is the end of the simulation
-        and does not need a rising edge."""
+        of the cycles to do a timing evaluation. The last time is the final idle cycle
+        and self.end_time is the end of the simulation."""
 
         # idle cycle, no operation
         t_current = period 
@@ -419,8 +746,30 @@ class delay():
         self.read1_cycle=6
         t_current += period
 
-        # cycle7: wait a clock period to end the simulation
+        # the other probes repeat cycles 0-6 with their own address and
+        # data bit
+        self.cycles_per_probe = 7
+        for probe in range(1, len(self.probes)):
+            for cycle in range(self.cycles_per_probe):
+                self.cycle_times.append(t_current)
+                t_current += period
+
+        # cycle7: idle for a clock period to measure the leakage and
+        # end the simulation
         self.cycle_times.append(t_current)
+        self.idle_cycle = len(self.cycle_times) - 1
         t_current += period
+        self.end_time = t_current
+
 
+def run_point(args):
+    """ Runs the simulation of a single slew/load point. This is a module
+    function so it can be used by a pool."""
+    (d, period, load, slew) = args
+    return d.run_simulation(period, load, slew)
 
+def run_batch(args):
+    """ Runs the simulation of a list of slew/load points in one
+    stimulus. This is a module function so it can be used by a pool."""
+    (d, points) = args
+    return d.run_batch(points)
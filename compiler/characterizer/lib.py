@@ -7,6 +7,9 @@ import tech
 import math
 import setup_hold
 import delay
+import stimuli
+import char_store
+import sim_cache
 import charutils as ch
 import tech
 import numpy as np
@@ -16,34 +19,58 @@ OPTS = globals.get_opts()
 class lib:
     """ lib file generation."""
     
-    def __init__(self, libname, sram, spfile, use_model=OPTS.analytical_delay):
+    def __init__(self, libname, sram, spfile, use_model=OPTS.analytical_delay, corner=None):
         self.sram = sram
         self.spfile = spfile        
         self.use_model = use_model
         self.name = sram.name
+        # A corner is (name, model files, supply voltage, temperature) and
+        # is set for the whole process. Without one the tech file
+        # models and supply are the TT corner.
+        if corner == None:
+            self.corner_name = "TT"
+            self.lib_name = self.name
+        else:
+            (self.corner_name, models, voltage, temperature) = corner
+            stimuli.set_corner(models, voltage, temperature)
+            self.lib_name = "{0}_{1}".format(self.name, self.corner_name)
         self.num_words = sram.num_words
         self.word_size = sram.word_size
         self.addr_size = sram.addr_size
 
-        # These are the parameters to determine the table sizes
-        #self.load_scales = np.array([0.1, 0.25, 0.5, 1, 2, 4, 8])
-        self.load_scales = np.array([0.25, 1, 8])
+        # These are the parameters to determine the table sizes. The
+        # full tables are only simulated at a few points with a
+        # surrogate model (see surrogate.fill_table).
+        if OPTS.surrogate_tables and not use_model:
+            self.load_scales = np.array([0.1, 0.25, 0.5, 1, 2, 4, 8])
+        else:
+            self.load_scales = np.array([0.25, 1, 8])
         #self.load_scales = np.array([0.25, 1])
         self.load = tech.spice["FF_in_cap"]
         self.loads = self.load_scales*self.load
         debug.info(1,"Loads: {0}".format(self.loads))
         
-        #self.slew_scales = np.array([0.1, 0.25, 0.5, 1, 2, 4, 8])
-        self.slew_scales = np.array([0.25, 1, 8])        
+        if OPTS.surrogate_tables and not use_model:
+            self.slew_scales = np.array([0.1, 0.25, 0.5, 1, 2, 4, 8])
+        else:
+            self.slew_scales = np.array([0.25, 1, 8])        
         #self.slew_scales = np.array([0.25, 1])
         self.slew = tech.spice["rise_time"]        
         self.slews = self.slew_scales*self.slew
         debug.info(1,"Slews: {0}".format(self.slews))
                    
+        # the simulated results are read from and written to the store
+        if OPTS.use_char_store and not use_model:
+            self.store = char_store.char_store()
+        else:
+            self.store = None
+
         debug.info(1,"Writing to {0}".format(libname))
         self.lib = open(libname, "w")
 
         self.write_header()
+
+        self.write_leakage()
         
         self.write_data_bus()
         
@@ -54,10 +81,12 @@ class lib:
         self.write_clk()
         
         self.lib.close()
+        if self.store != None:
+            self.store.close()
 
     def write_header(self):
         """ Write the header information """
-        self.lib.write("library ({0}_lib)".format(self.name))
+        self.lib.write("library ({0}_lib)".format(self.lib_name))
         self.lib.write("{\n")
         self.lib.write("    delay_model : \"table_lookup\";\n")
         
@@ -65,7 +94,7 @@ class lib:
         self.write_defaults()
         self.write_LUT_templates()
 
-        self.lib.write("    default_operating_conditions : TT; \n")
+        self.lib.write("    default_operating_conditions : {0}; \n".format(self.corner_name))
         
         self.write_bus()
 
@@ -83,6 +112,34 @@ class lib:
         self.lib.write("    area : {0};\n\n".format(self.sram.width * self.sram.height))
         
     
+    def write_leakage(self):
+        """ Adds the leakage power of the idle (deselected) SRAM. It is
+        measured in the final idle cycle of the feasible period
+        simulation like the other power scalars. """
+
+        self.compute_delay()
+
+        leakage_power = self.delay["leakage_power"]
+        self.lib.write("    cell_leakage_power : {0};\n".format(leakage_power))
+        self.lib.write("    leakage_power(){\n")
+        self.lib.write("        when : \"CSb\";\n")
+        self.lib.write("        value : {0};\n".format(leakage_power))
+        self.lib.write("    }\n\n")
+
+    def write_internal_power(self, when, rise_power, fall_power):
+        """ Adds an internal power table of the clock slew and the DATA
+        load for rising and falling data. """
+        self.lib.write("        internal_power(){\n")
+        self.lib.write("            when : \"{0}\"; \n".format(when))
+        self.lib.write("            related_pin : \"clk\"; \n")
+        self.lib.write("            rise_power(POWER_TABLE){\n")
+        self.write_values(self.delay[rise_power],len(self.loads),"                ",6)
+        self.lib.write("            }\n")
+        self.lib.write("            fall_power(POWER_TABLE){\n")
+        self.write_values(self.delay[fall_power],len(self.loads),"                ",6)
+        self.lib.write("            }\n")
+        self.lib.write("        }\n")
+
     def write_units(self):
         """ Adds default units for time, voltage, current,..."""
         
@@ -93,9 +150,9 @@ class lib:
         self.lib.write("    capacitive_load_unit(1 ,fF) ;\n")
         self.lib.write("    leakage_power_unit : \"1mW\" ;\n")
         self.lib.write("    pulling_resistance_unit :\"1kohm\" ;\n")
-        self.lib.write("    operating_conditions(TT){\n")
+        self.lib.write("    operating_conditions({0}){{\n".format(self.corner_name))
         self.lib.write("    voltage : {0} ;\n".format(tech.spice["supply_voltage"]))
-        self.lib.write("    temperature : 25.000 ;\n")
+        self.lib.write("    temperature : {0:.3f} ;\n".format(tech.spice["temp"]))
         self.lib.write("    }\n\n")
 
     def write_defaults(self):
@@ -125,11 +182,11 @@ class lib:
         list_values = ", ".join(str(v) for v in values)
         return "\"{0}\"".format(list_values)
 
-    def create_array(self,values, length):
+    def create_array(self,values, length, precision=3):
         """ Helper function to create quoted, line wrapped array with each row of given length """
         # check that the length is a multiple or give an error!
         debug.check(len(values)%length == 0,"Values are not a multiple of the length. Cannot make a full array.")
-        rounded_values = map(ch.round_time,values)
+        rounded_values = [ch.round_time(value, precision) for value in values]
         split_values = [rounded_values[i:i+length] for i in range(0, len(rounded_values), length)]
         formatted_rows = map(self.create_list,split_values)
         formatted_array = ",\\\n".join(formatted_rows)
@@ -140,9 +197,9 @@ class lib:
         quoted_string = self.create_list(values)
         self.lib.write("        index_{0}({1});\n".format(number,quoted_string))
 
-    def write_values(self, values, row_length, indent):
+    def write_values(self, values, row_length, indent, precision=3):
         """ Write the index """
-        quoted_string = self.create_array(values, row_length)
+        quoted_string = self.create_array(values, row_length, precision)
         # indent each newline plus extra spaces for word values
         indented_string = quoted_string.replace('\n', '\n' + indent +"       ")
         self.lib.write("{0}values({1});\n".format(indent,indented_string))
@@ -160,6 +217,14 @@ class lib:
             self.write_index(2,self.loads)
             self.lib.write("    }\n\n")
 
+        self.lib.write("    power_lut_template(POWER_TABLE)")
+        self.lib.write("{\n")
+        self.lib.write("        variable_1 : input_transition_time;\n")
+        self.lib.write("        variable_2 : total_output_net_capacitance;\n")
+        self.write_index(1,self.slews)
+        self.write_index(2,self.loads)
+        self.lib.write("    }\n\n")
+
         CONS = ["CONSTRAINT_TABLE"]
         for i in CONS:
             self.lib.write("    lu_table_template({0})".format(i))
@@ -262,27 +327,11 @@ class lib:
         self.lib.write("        pin(DATA[{0}:0])".format(self.word_size - 1))
         self.lib.write("{\n")
 
-        self.lib.write("        internal_power(){\n")
-        self.lib.write("            when : \"OEb & !clk\"; \n")
-        self.lib.write("            rise_power(scalar){\n")
-        self.lib.write("                values(\"{0}\");\n".format(self.delay["write1_power"]))
-        self.lib.write("            }\n")
-        self.lib.write("            fall_power(scalar){\n")
-        self.lib.write("                values(\"{0}\");\n".format(self.delay["write0_power"]))
-        self.lib.write("            }\n")
-        self.lib.write("        }\n")
+        self.write_internal_power("OEb & !clk", "write1_internal_power", "write0_internal_power")
 
         self.write_FF_setuphold()
        
-        self.lib.write("        internal_power(){\n")
-        self.lib.write("            when : \"!OEb & !clk\"; \n")
-        self.lib.write("            rise_power(scalar){\n")
-        self.lib.write("                values(\"{0}\");\n".format(self.delay["read1_power"]))
-        self.lib.write("            }\n")
-        self.lib.write("            fall_power(scalar){\n")
-        self.lib.write("                values(\"{0}\");\n".format(self.delay["read0_power"]))
-        self.lib.write("            }\n")
-        self.lib.write("        }\n")
+        self.write_internal_power("!OEb & !clk", "read1_internal_power", "read0_internal_power")
         self.lib.write("        timing(){ \n")
         self.lib.write("            timing_sense : non_unate; \n")
         self.lib.write("            related_pin : \"clk\"; \n")
@@ -379,13 +428,14 @@ class lib:
             self.d
         except AttributeError:
             self.d = delay.delay(self.sram, self.spfile)
-            probe_address = "1" * self.addr_size
-            probe_data = self.word_size - 1
             if self.use_model:
                 self.d = True
                 self.delay = self.sram.analytical_model(self.slews,self.loads)
+            elif self.store != None:
+                self.delay = self.stored_delay(probes(self.sram))
             else:
-                self.delay = self.d.analyze(probe_address, probe_data, self.slews, self.loads)
+                self.delay = self.d.analyze_probes(probes(self.sram), self.slews, self.loads)
+                self.delay.update(self.d.power_tables)
 
     def compute_setup_hold(self):
         """ Do the analysis if we haven't characterized a FF yet """
@@ -396,6 +446,133 @@ class lib:
             self.sh = setup_hold.setup_hold()
             if self.use_model:
                 self.times = self.sh.analytical_model(self.slews,self.loads)
+            elif self.store != None:
+                self.times = self.stored_setup_hold()
             else:
                 self.times = self.sh.analyze(self.slews,self.slews)
+
+    def stored_delay(self, probes):
+        """ Returns the delay results of the characterization store and
+        only simulates the ones that are missing. The scalars (min period,
+        power and the feasible period that the tables are simulated at)
+        are arcs at the largest slew and load. Without them, everything
+        is characterized again. """
+        key = (self.name,
+               self.corner_name,
+               sim_cache.hash_file(self.spfile),
+               char_store.conditions_hash(" ".join("probe {0} {1}".format(address, data)
+                                                   for (address, data) in probes)))
+        scalar_point = [(max(self.slews), max(self.loads))]
+        table_points = [(slew, load) for slew in self.slews for load in self.loads]
+        scalars = {"min_period": "clk",
+                   "feasible_period": "clk",
+                   "read0_power": "DATA",
+                   "read1_power": "DATA",
+                   "write0_power": "DATA",
+                   "write1_power": "DATA",
+                   "leakage_power": "DATA"}
+        tables = delay.point_values
+
+        data = {}
+        for (metric, pin) in scalars.items():
+            data[metric] = self.store.fetch(key, pin, metric, scalar_point)[0]
+        for metric in tables:
+            data[metric] = self.store.fetch(key, "DATA", metric, table_points)
+
+        if None in [data[metric] for metric in scalars]:
+            debug.info(1, "Characterizing all delay arcs")
+            data = self.d.analyze_probes(probes, self.slews, self.loads)
+            data.update(self.d.power_tables)
+            data["feasible_period"] = self.d.feasible_period
+            for (metric, pin) in scalars.items():
+                self.store.store(key, pin, metric, scalar_point, [data[metric]])
+            for metric in tables:
+                self.store.store(key, "DATA", metric, table_points, data[metric])
+        else:
+            missing = [i for i in range(len(table_points))
+                       if None in [data[metric][i] for metric in tables]]
+            debug.info(1, "Simulating {0} missing delay arcs".format(len(missing)))
+            if len(missing) > 0:
+                self.d.set_probes(probes)
+                points = [table_points[i] for i in missing]
+                results = self.d.run_points([(data["feasible_period"], load, slew)
+                                             for (slew, load) in points])
+                for (i, result) in zip(missing, results):
+                    debug.check(result[0], "Couldn't run a simulation properly.\n")
+                    for (metric, value) in zip(tables, result[1:]):
+                        data[metric][i] = value
+                for metric in tables:
+                    self.store.store(key, "DATA", metric, points,
+                                     [data[metric][i] for i in missing])
+        del data["feasible_period"]
+        return data
+
+    def stored_setup_hold(self):
+        """ Returns the setup/hold times of the characterization store
+        and only searches for the ones that are missing. The times are
+        arcs of the D pin of the flop. """
+        key = (self.sh.model_name,
+               self.corner_name,
+               sim_cache.hash_file(self.sh.model_location),
+               char_store.conditions_hash())
+        points = [(related_slew, constrained_slew) for related_slew in self.slews
+                  for constrained_slew in self.slews]
+        names = ["setup_times_LH", "setup_times_HL", "hold_times_LH", "hold_times_HL"]
+        times = dict((name, self.store.fetch(key, "D", name, points)) for name in names)
+        missing = [i for i in range(len(points))
+                   if None in [times[name][i] for name in names]]
+        debug.info(1, "Searching for {0} missing setup/hold arcs".format(len(missing)))
+        if len(missing) == len(points):
+            times = self.sh.analyze(self.slews,self.slews)
+        else:
+            for i in missing:
+                values = self.sh.search_point(*points[i])
+                for (name, value) in zip(names, values):
+                    times[name][i] = value
+        for name in names:
+            self.store.store(key, "D", name, [points[i] for i in missing],
+                             [times[name][i] for i in missing])
+        return times
                 
+
+
+def probe(sram):
+    """ Returns the probe address and data bit that are characterized:
+    the last bit of the last address. """
+    return ("1" * sram.addr_size, sram.word_size - 1)
+
+def probes(sram):
+    """ Returns the (address, data bit) probes that are characterized.
+    With OPTS.worst_case_probes, these are the far (the last row, column
+    and data bit) and the near (the first ones) cells of each bank and
+    the .lib has the worst arcs of all of them. The bank address bits
+    are the most significant ones. """
+    if not OPTS.worst_case_probes:
+        return [probe(sram)]
+    # the bank select bits above the sram.bank_addr_size bits of an
+    # address in a bank
+    bank_sel_size = sram.addr_size - sram.bank_addr_size
+    result = []
+    for bank in range(sram.num_banks):
+        bank_bits = "".join(str((bank >> i) & 1) for i in range(bank_sel_size))
+        result.append(("1" * sram.bank_addr_size + bank_bits, sram.word_size - 1))
+        result.append(("0" * sram.bank_addr_size + bank_bits, 0))
+    return result
+
+def write_corners(path, sram, spfile, corners, use_model=OPTS.analytical_delay):
+    """ Characterizes each (name, model files, supply voltage,
+    temperature) corner and writes <path>_<name>.lib files. The corners
+    run one after another so that each one simulates its points on all
+    of the worker processes (which are started again for each corner,
+    see ch.get_pool). They share the SRAM netlist (and its trimmed
+    netlist) and the simulation cache. The nominal corner is restored
+    at the end. Returns the .lib file names. """
+    nominal = (tech.spice["fet_models"], tech.spice["supply_voltage"], tech.spice["temp"])
+    libnames = []
+    for corner in corners:
+        libname = "{0}_{1}.lib".format(path, corner[0])
+        debug.info(1, "Characterizing corner {0}".format(corner[0]))
+        lib(libname, sram, spfile, use_model, corner)
+        libnames.append(libname)
+    stimuli.set_corner(*nominal)
+    return libnames
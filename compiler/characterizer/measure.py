@@ -0,0 +1,89 @@
+"""
+Vectorized measurements of simulated waveforms. These compute the same
+numbers as the .meas statements in stimuli (gen_meas_delay and
+gen_meas_power) from the time and value arrays of a saved waveform (see
+rawfile), so that a new measurement does not need a new simulation.
+
+Times are in seconds like the waveform. The functions take arrays of
+delay times (td) or windows and return an array with a result for each
+one. A measure that cannot be made (e.g. the signal never switches) is
+NaN instead of the False of a failed .meas.
+"""
+import numpy as np
+
+
+def crossings(time, values, level, direction="CROSS"):
+    """ Returns the linearly interpolated times at which the values cross
+    a level in the given direction (RISE, FALL or CROSS). """
+    v0 = values[:-1]
+    v1 = values[1:]
+    if direction == "RISE":
+        mask = (v0 < level) & (v1 >= level)
+    elif direction == "FALL":
+        mask = (v0 > level) & (v1 <= level)
+    else:
+        mask = ((v0 < level) & (v1 >= level)) | ((v0 > level) & (v1 <= level))
+    index = np.nonzero(mask)[0]
+    fraction = (level - v0[index]) / (v1[index] - v0[index])
+    return time[index] + fraction * (time[index+1] - time[index])
+
+
+def first_crossings(time, values, level, direction, td):
+    """ Returns the first crossing at or after each of the delay times
+    (TD=) like the TRIG or TARG of a .meas statement. """
+    times = crossings(time, values, level, direction)
+    td = np.atleast_1d(np.asarray(td, dtype=float))
+    index = np.searchsorted(times, td, side="left")
+    result = np.empty(td.shape)
+    result.fill(np.nan)
+    found = index < len(times)
+    result[found] = times[index[found]]
+    return result
+
+
+def delay(time, trig, trig_val, trig_dir, targ, targ_val, targ_dir, td):
+    """ Returns the time from the trigger crossing to the target crossing
+    after each of the delay times. """
+    return (first_crossings(time, targ, targ_val, targ_dir, td)
+            - first_crossings(time, trig, trig_val, trig_dir, td))
+
+
+def slew(time, values, vdd, direction, td, low=0.1, high=0.9):
+    """ Returns the low to high percentage (10-90% by default) transition
+    time of a RISE or FALL edge after each of the delay times. """
+    if direction == "RISE":
+        return delay(time, values, low*vdd, "RISE", values, high*vdd, "RISE", td)
+    return delay(time, values, high*vdd, "FALL", values, low*vdd, "FALL", td)
+
+
+def integral(time, values, t):
+    """ Returns the trapezoidal integral of the values from the start of
+    the waveform up to each of the times t. """
+    cumulative = np.concatenate(([0.0], np.cumsum(0.5*(values[1:]+values[:-1])*np.diff(time))))
+    t = np.clip(np.atleast_1d(np.asarray(t, dtype=float)), time[0], time[-1])
+    index = np.clip(np.searchsorted(time, t, side="right") - 1, 0, len(time) - 2)
+    values_t = np.interp(t, time, values)
+    return cumulative[index] + 0.5*(values[index] + values_t)*(t - time[index])
+
+
+def average(time, values, t_initial, t_final):
+    """ Returns the average of the values in each window from t_initial
+    to t_final like .meas avg from= to=. """
+    t_initial = np.atleast_1d(np.asarray(t_initial, dtype=float))
+    t_final = np.atleast_1d(np.asarray(t_final, dtype=float))
+    return (integral(time, values, t_final) - integral(time, values, t_initial)) / (t_final - t_initial)
+
+
+def average_power(time, voltage, current, t_initial, t_final):
+    """ Returns the average power delivered by a supply in each window.
+    The current is the spice current of the supply source, which is
+    negative when it delivers power. """
+    return average(time, -voltage*current, t_initial, t_final)
+
+
+def as_measure(value):
+    """ Converts a measurement to a .meas style result: a float or False
+    if it failed. """
+    if np.isnan(value):
+        return False
+    return float(value)
@@ -0,0 +1,378 @@
+"""
+This is a Monte Carlo analysis of the read and write margins of the
+bitcell with random threshold voltage mismatch. Each transistor of the
+cells on the critical path (the bitcell and, for reads, the sense amp)
+gets a delvto parameter with the Pelgrom standard deviation of its size
+(tech.spice["pelgrom_avt"]/sqrt(W*L)), so every run is the same deck
+with different .param values (and can reuse a simulator session).
+
+A read discharges the bitline of a cell storing 0 for the time that the
+nominal cell needs to develop OPTS.mc_read_swing of the supply, then
+fires the sense amp; it fails if the sense amp resolves the wrong value.
+A write drives a 0 into a cell storing 1 for OPTS.mc_write_pulse times
+the nominal flip time; it fails if the cell doesn't flip. The margin of
+a run is how far the output ended from the supply midpoint on the
+correct side, so a negative margin is a failure.
+
+The runs are simulated in rounds on the worker processes with a seed
+per run, so the results don't depend on the number of processes. The
+analysis stops when the confidence interval of the failure rate is
+within OPTS.mc_ci_target of it. With importance sampling, a pilot with
+a larger standard deviation finds the failing sample closest to the
+nominal and the runs are centered there and weighted, so rare failures
+(5-6 sigma) are estimated with thousands of runs instead of millions.
+"""
+import math
+import numpy as np
+import globals
+import debug
+import tech
+import stimuli
+import scratch
+import charutils as ch
+
+OPTS = globals.get_opts()
+
+# The smallest number of failures before the confidence interval is
+# trusted to stop the analysis
+min_failures = 10
+
+
+def normal_cdf(x):
+    """ Returns the standard normal cumulative distribution at x. """
+    return 0.5 * math.erfc(-x / math.sqrt(2.0))
+
+
+def normal_quantile(p):
+    """ Returns the x where the standard normal cumulative distribution
+    is p (by bisection since erfc has no inverse in math). """
+    debug.check(0.0 < p < 1.0, "Invalid probability {0}.".format(p))
+    (low, high) = (-40.0, 40.0)
+    for i in range(100):
+        middle = 0.5 * (low + high)
+        if normal_cdf(middle) < p:
+            low = middle
+        else:
+            high = middle
+    return 0.5 * (low + high)
+
+
+class running_stats():
+    """
+    The running statistics of the weighted runs of a Monte Carlo
+    analysis: the failure rate and its confidence interval and the
+    mean and standard deviation of the margin. The weights are the
+    likelihood ratios of importance sampling (1 for plain runs).
+    """
+
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        # the sums of the weights of the failures and of their squares
+        self.fail_weight = 0.0
+        self.fail_weight_sq = 0.0
+        # weighted Welford mean and variance of the margin
+        self.weight = 0.0
+        self.margin_mean = 0.0
+        self.margin_m2 = 0.0
+
+    def add(self, margin, weight=1.0):
+        """ Adds the margin of a run. """
+        self.runs += 1
+        if margin < 0:
+            self.failures += 1
+            self.fail_weight += weight
+            self.fail_weight_sq += weight * weight
+        if weight > 0:
+            self.weight += weight
+            delta = margin - self.margin_mean
+            self.margin_mean += delta * weight / self.weight
+            self.margin_m2 += weight * delta * (margin - self.margin_mean)
+
+    def failure_rate(self):
+        if self.runs == 0:
+            return 0.0
+        return self.fail_weight / self.runs
+
+    def margin_std(self):
+        if self.weight == 0:
+            return 0.0
+        return math.sqrt(self.margin_m2 / self.weight)
+
+    def confidence_interval(self, confidence=None):
+        """ Returns the (low, high) bounds of the failure rate with the
+        normal approximation. Without failures, the upper bound is the
+        one of a binomial with no successes (3/n at 95%). """
+        if confidence == None:
+            confidence = OPTS.mc_confidence
+        if self.failures == 0:
+            return (0.0, -math.log(1.0 - confidence) / max(self.runs, 1))
+        rate = self.failure_rate()
+        variance = max(self.fail_weight_sq / self.runs - rate * rate, 0.0) / self.runs
+        half_width = normal_quantile(0.5 + 0.5 * confidence) * math.sqrt(variance)
+        return (max(rate - half_width, 0.0), rate + half_width)
+
+    def converged(self):
+        """ Checks if the confidence interval is within the target
+        relative width of the failure rate. """
+        if self.failures < min_failures:
+            return False
+        (low, high) = self.confidence_interval()
+        return 0.5 * (high - low) <= OPTS.mc_ci_target * self.failure_rate()
+
+    def results(self):
+        """ Returns a dictionary of the statistics. The sigma is the
+        yield in standard deviations of a normal distribution. """
+        rate = self.failure_rate()
+        if rate > 0:
+            sigma = -normal_quantile(rate)
+        else:
+            sigma = None
+        return {"runs": self.runs,
+                "failures": self.failures,
+                "failure_rate": rate,
+                "confidence_interval": self.confidence_interval(),
+                "sigma": sigma,
+                "margin_mean": self.margin_mean,
+                "margin_std": self.margin_std()}
+
+
+def run_sample(args):
+    """ Evaluates the margin of one run in a worker process. The
+    standard normal variables of the run are from its own seed, then
+    scaled and shifted. The weight is the likelihood ratio of a sample
+    of a shifted distribution. """
+    (evaluate, context, seed, stream, run, num_vars, shift, scale) = args
+    random = np.random.RandomState([seed, stream, run])
+    x = scale * random.standard_normal(num_vars) + shift
+    weight = math.exp(-np.dot(x, shift) + 0.5 * np.dot(shift, shift))
+    return (evaluate(context, x), weight, x)
+
+
+def find_shift(evaluate, context, num_vars):
+    """ Returns the center of the importance sampling distribution: the
+    failing pilot run closest to the nominal. The pilot runs have
+    OPTS.mc_pilot_scale times the standard deviation to reach the
+    failures. """
+    args_list = [(evaluate, context, OPTS.mc_seed, 0, run, num_vars, np.zeros(num_vars), OPTS.mc_pilot_scale)
+                 for run in range(OPTS.mc_pilot_runs)]
+    failing = [x for (margin, weight, x) in ch.parallel_map(run_sample, args_list) if margin < 0]
+    if len(failing) == 0:
+        debug.warning("No failures in {0} pilot runs, using plain Monte Carlo.".format(OPTS.mc_pilot_runs))
+        return np.zeros(num_vars)
+    shift = min(failing, key=lambda x: np.dot(x, x))
+    debug.info(1, "Importance sampling shift of {0:.3f} sigma from {1} failing pilot runs".format(
+        math.sqrt(np.dot(shift, shift)), len(failing)))
+    return shift
+
+
+def estimate(evaluate, context, num_vars, importance_sampling=None):
+    """ Estimates the probability that evaluate(context, x) is negative
+    for num_vars standard normal variables x. evaluate must be a module
+    level function and context must be picklable for the worker
+    processes. Returns the running_stats results with the number of
+    pilot runs and the shift (in sigma) of importance sampling. """
+    if importance_sampling == None:
+        importance_sampling = OPTS.mc_importance_sampling
+    shift = np.zeros(num_vars)
+    pilot_runs = 0
+    if importance_sampling:
+        shift = find_shift(evaluate, context, num_vars)
+        pilot_runs = OPTS.mc_pilot_runs
+
+    stats = running_stats()
+    while stats.runs < OPTS.mc_max_runs and not stats.converged():
+        num_runs = min(OPTS.mc_round_size, OPTS.mc_max_runs - stats.runs)
+        args_list = [(evaluate, context, OPTS.mc_seed, 1, run, num_vars, shift, 1.0)
+                     for run in range(stats.runs, stats.runs + num_runs)]
+        for (margin, weight, x) in ch.parallel_map(run_sample, args_list):
+            stats.add(margin, weight)
+        debug.info(2, "Monte Carlo: {0} failures in {1} runs, failure rate {2:.3e} {3}".format(
+            stats.failures, stats.runs, stats.failure_rate(), stats.confidence_interval()))
+
+    results = stats.results()
+    results["pilot_runs"] = pilot_runs
+    results["shift"] = math.sqrt(np.dot(shift, shift))
+    return results
+
+
+def device_area(params):
+    """ Returns W*L (in um^2) of the W= and L= parameters of a
+    transistor. The values can be products (e.g. W='5.4*1u'). """
+    size = {}
+    for param in params:
+        if "=" not in param:
+            continue
+        (name, value) = param.split("=", 1)
+        if name.lower() in ["w", "l"]:
+            factors = value.strip("'\"{}").split("*")
+            size[name.lower()] = 1e6 * np.prod([ch.convert_to_float(f) for f in factors])
+    debug.check(len(size) == 2, "Missing transistor size in {0}.".format(" ".join(params)))
+    return size["w"] * size["l"]
+
+
+def simulate_sample(mc, x):
+    """ Returns the margin of a Monte Carlo run (see monte_carlo). """
+    with scratch.scratch_dir("mc") as job:
+        mc.write_stimulus(job.path, x)
+        stimuli.run_sim(job.path)
+        measures = ch.parse_spice_list("timing", job.path)
+    return mc.margin(measures)
+
+
+class monte_carlo():
+    """
+    The Monte Carlo analysis of the "read" or "write" margin of the
+    bitcell of an SRAM. The bitline is the lumped RC of a column of the
+    bitcell array.
+    """
+
+    def __init__(self, sram, mode):
+        debug.check(mode in ["read", "write"], "Invalid Monte Carlo mode {0}.".format(mode))
+        self.mode = mode
+        bl_wire = sram.bank.bitcell_array.gen_bl_wire()
+        self.bl_c = bl_wire.wire_c * bl_wire.lump_num
+        self.bl_r = bl_wire.wire_r * bl_wire.lump_num
+        self.slew = tech.spice["rise_time"]
+        self.t_wl = 4 * self.slew
+
+        # the subcircuits with mismatch and their (parameter, sigma)
+        self.variables = []
+        self.subckts = []
+        self.cell = self.add_subckt(sram.bank.bitcell_array.cell)
+        if mode == "read":
+            self.amp = self.add_subckt(sram.bank.sens_amp_array.amp)
+        self.find_storage_nodes()
+        # the nominal bitline development (read) or flip (write) time
+        self.timing = None
+
+    def add_subckt(self, mod):
+        """ Reads the subcircuit of a library cell and adds a delvto
+        parameter to each of its transistors. Returns its name, pins
+        and lines. """
+        (pins, lines) = ch.read_subckt(mod.sp_file, mod.name)
+        subckt = []
+        for line in lines:
+            words = line.split()
+            if words[0][0] in "mM":
+                param = "mc_{0}_{1}".format(mod.name, words[0]).lower()
+                sigma = tech.spice["pelgrom_avt"] / math.sqrt(device_area(words[6:]))
+                self.variables.append((param, sigma))
+                line = "{0} delvto={1}".format(line, stimuli.param_expr(param))
+            subckt.append(line)
+        self.subckts.append(".SUBCKT {0} {1}\n{2}\n.ENDS {0}\n".format(mod.name, " ".join(pins), "\n".join(subckt)))
+        return (mod.name, pins, lines)
+
+    def find_storage_nodes(self):
+        """ Finds the storage nodes of the bitcell (see ch.storage_nodes). """
+        (name, pins, lines) = self.cell
+        (q, qb) = ch.storage_nodes(lines)
+        self.q = "x{0}.{1}".format(name, q)
+        self.qb = "x{0}.{1}".format(name, qb)
+
+    def analyze(self):
+        """ Simulates the nominal cell for the timing of the runs and
+        returns the statistics of the Monte Carlo runs (see estimate)
+        with the timing (ns). """
+        with scratch.scratch_dir("mc") as job:
+            self.write_stimulus(job.path, np.zeros(len(self.variables)))
+            stimuli.run_sim(job.path)
+            timing = ch.parse_spice_list("timing", job.path).get("timing", False)
+        debug.check(type(timing) == float and timing > 0,
+                    "Couldn't simulate the nominal {0} of the bitcell.".format(self.mode))
+        self.timing = timing * 1e9
+        debug.info(1, "Nominal {0} time: {1}n".format(self.mode, self.timing))
+
+        results = estimate(simulate_sample, self, len(self.variables))
+        results["timing"] = self.timing
+        debug.info(1, "Monte Carlo {0}: {1} failures in {2} runs, failure rate {3:.3e}".format(self.mode,
+                                                                                             results["failures"],
+                                                                                             results["runs"],
+                                                                                             results["failure_rate"]))
+        return results
+
+    def margin(self, measures):
+        """ Returns the margin (V) of the measured output of a run. A run
+        that couldn't be measured is a failure. """
+        vdd = stimuli.vdd_voltage
+        out = measures.get("out", False)
+        if type(out) != float:
+            return -0.5 * vdd
+        # a read outputs a 0 and a write flips a 1
+        return 0.5 * vdd - out
+
+    def write_stimulus(self, temp_dir, x):
+        """ Writes the stimulus of a run with the standard normal
+        variables x. Without the nominal timing, it writes the nominal
+        simulation that measures it instead. """
+        vdd = stimuli.vdd_voltage
+        stim_file = open(temp_dir + "stim.sp", "w")
+        stim_file.write("* Monte Carlo {0} of {1}\n".format(self.mode, self.cell[0]))
+        stim_file.write(".param {0}\n\n".format(" ".join("{0}={1:.6g}".format(param, sigma * value)
+                                                         for ((param, sigma), value) in zip(self.variables, x))))
+        stimuli.write_include(stim_file, tech.spice["fet_models"])
+        for subckt in self.subckts:
+            stim_file.write(subckt + "\n")
+        stimuli.write_supply(stim_file)
+
+        (name, pins, lines) = self.cell
+        stimuli.inst_model(stim_file, pins, name)
+        stim_file.write("Cbl bl 0 {0}f\n".format(self.bl_c))
+        stim_file.write("Cbr br 0 {0}f\n".format(self.bl_c))
+
+        if self.timing == None:
+            # the wordline stays on for the nominal simulation
+            end_time = 4 * tech.spice["feasible_period"]
+            wl_off = None
+        elif self.mode == "read":
+            sense_time = self.t_wl + self.timing
+            end_time = sense_time + self.timing
+            wl_off = None
+        else:
+            wl_off = self.t_wl + OPTS.mc_write_pulse * self.timing
+            end_time = wl_off + self.timing
+        self.gen_step(stim_file, "wl", self.t_wl, wl_off)
+
+        if self.mode == "read":
+            (amp_name, amp_pins, amp_lines) = self.amp
+            stimuli.inst_model(stim_file, amp_pins, amp_name)
+            if self.timing == None:
+                stim_file.write("Vsclk sclk 0 0\n")
+            else:
+                self.gen_step(stim_file, "sclk", sense_time)
+            # the precharged bitlines and a cell storing 0
+            stim_file.write(".ic v(bl)={0} v(br)={0} v(dout)={0} v({1})=0 v({2})={0}\n".format(vdd, self.q, self.qb))
+            if self.timing == None:
+                stimuli.gen_meas_delay(stim_file, "TIMING", "wl", "bl", 0.5*vdd, (1 - OPTS.mc_read_swing)*vdd,
+                                       "RISE", "FALL", 0)
+            else:
+                stim_file.write(".meas tran OUT FIND v(dout) AT={0}\n".format(stimuli.time_str(end_time)))
+        else:
+            # the write driver drives a 0 through the bitline resistance
+            # into a cell storing 1
+            stim_file.write("Vbl bl_drv 0 0\n")
+            stim_file.write("Vbr br_drv 0 {0}\n".format(vdd))
+            stim_file.write("Rbl bl_drv bl {0}\n".format(self.bl_r))
+            stim_file.write("Rbr br_drv br {0}\n".format(self.bl_r))
+            stim_file.write(".ic v({0})={1} v({2})=0\n".format(self.q, vdd, self.qb))
+            if self.timing == None:
+                stimuli.gen_meas_delay(stim_file, "TIMING", "wl", self.q, 0.5*vdd, 0.5*vdd, "RISE", "FALL", 0)
+            else:
+                stim_file.write(".meas tran OUT FIND v({0}) AT={1}\n".format(self.q, stimuli.time_str(end_time)))
+
+        if self.timing == None:
+            step = stimuli.tran_step(end_time)
+        else:
+            step = stimuli.tran_step(self.timing)
+        stimuli.write_control(stim_file, end_time, step)
+        stim_file.close()
+
+    def gen_step(self, stim_file, sig_name, t_on, t_off=None):
+        """ Writes a signal that rises at t_on and falls at t_off (ns). """
+        vdd = stimuli.vdd_voltage
+        half_slew = 0.5 * self.slew
+        stim_file.write("V{0} {0} 0 PWL (0n 0v {1}n 0v {2}n {3}v".format(sig_name, t_on - half_slew,
+                                                                      t_on + half_slew, vdd))
+        if t_off != None:
+            stim_file.write(" {0}n {1}v {2}n 0v".format(t_off - half_slew, vdd, t_off + half_slew))
+        stim_file.write(")\n")
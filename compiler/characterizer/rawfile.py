@@ -0,0 +1,115 @@
+"""
+This reads the binary SPICE3 raw waveform files that ngspice writes
+(ngspice -r file). The header is parsed when the file is opened but the
+data is memory mapped and a signal is only read into a NumPy array the
+first time it is requested.
+
+hspice writes its own waveform formats (.tr0) which are not read here.
+"""
+import re
+import numpy as np
+import debug
+
+# SPICE3 spells the same signal several ways: v(clk), clk, i(vvdd) and
+# vvdd#branch are normalized to clk and vvdd#branch.
+voltage_name_pattern = re.compile(r"^v\((.+)\)$")
+current_name_pattern = re.compile(r"^i\((.+)\)$")
+
+
+def normalize_name(name):
+    """ Returns the name used to look up a signal. """
+    name = name.strip().lower()
+    voltage = voltage_name_pattern.match(name)
+    if voltage:
+        return voltage.group(1)
+    current = current_name_pattern.match(name)
+    if current:
+        return current.group(1) + "#branch"
+    return name
+
+
+class rawfile:
+    """
+    A single plot (analysis) of a binary SPICE3 raw file. A file with
+    several plots (e.g. several tran commands) is read one plot at a
+    time by its index.
+    """
+
+    def __init__(self, filename, plot=0):
+        self.filename = filename
+        self.signals = {}
+
+        f = open(filename, "rb")
+        offset = 0
+        for index in range(plot + 1):
+            f.seek(offset)
+            self.read_header(f)
+            offset = self.data_offset + self.num_points * self.num_vars * self.value_size
+        f.close()
+
+        dtype = np.dtype("<c16") if self.complex else np.dtype("<f8")
+        self.data = np.memmap(filename,
+                              dtype=dtype,
+                              mode="r",
+                              offset=self.data_offset,
+                              shape=(self.num_points, self.num_vars))
+
+    def read_header(self, f):
+        """ Reads the text header of a plot up to the binary data. """
+        self.plotname = ""
+        self.complex = False
+        self.num_vars = 0
+        self.num_points = 0
+        self.names = []
+        self.index = {}
+        while True:
+            line = f.readline()
+            if line == "":
+                debug.error("Unexpected end of raw file {0}".format(self.filename), 1)
+            (keyword, sep, value) = line.partition(":")
+            keyword = keyword.strip().lower()
+            if keyword == "plotname":
+                self.plotname = value.strip()
+            elif keyword == "flags":
+                self.complex = "complex" in value.lower()
+            elif keyword == "no. variables":
+                self.num_vars = int(value)
+            elif keyword == "no. points":
+                self.num_points = int(value)
+            elif keyword == "variables":
+                for i in range(self.num_vars):
+                    # index name type
+                    fields = f.readline().split()
+                    self.names.append(fields[1])
+                    self.index[normalize_name(fields[1])] = i
+            elif keyword == "values":
+                debug.error("ASCII raw files are not supported: {0}".format(self.filename), 1)
+            elif keyword == "binary":
+                break
+        self.value_size = 16 if self.complex else 8
+        self.data_offset = f.tell()
+
+    def has_signal(self, name):
+        """ Returns True if the plot has a signal. """
+        return normalize_name(name) in self.index
+
+    def signal(self, name):
+        """ Returns the values of a signal as an array. They are read from
+        the file the first time the signal is used. """
+        key = normalize_name(name)
+        if key not in self.signals:
+            if key not in self.index:
+                debug.error("Signal {0} is not in raw file {1}".format(name, self.filename), 1)
+            self.signals[key] = np.array(self.data[:, self.index[key]])
+        return self.signals[key]
+
+    def time(self):
+        """ Returns the time points of a transient analysis. """
+        return self.signal("time").real
+
+    def __str__(self):
+        """ override print function output """
+        return "rawfile: {0} {1} ({2} signals, {3} points)".format(self.filename,
+                                                                    self.plotname,
+                                                                    self.num_vars,
+                                                                    self.num_points)
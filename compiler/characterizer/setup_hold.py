@@ -2,8 +2,12 @@ import sys
 import globals
 import tech
 import stimuli
+import scratch
+import sim_cache
+import hashlib
 import debug
 import charutils as ch
+import surrogate
 import ms_flop
 
 OPTS = globals.get_opts()
@@ -26,14 +30,22 @@ class setup_hold():
 
         debug.info(2,"Feasible period from technology file: {0} ".format(self.period))
 
+    def __getstate__(self):
+        """ Drop the (closed) stimulus file so that the characterizer can
+        be pickled and sent to the simulation worker processes. """
+        state = self.__dict__.copy()
+        state.pop("sf", None)
+        return state
                 
 
 
-    def write_stimulus(self, mode, target_time, correct_value):
+    def write_stimulus(self, mode, target_time, correct_value, temp_dir=None):
         """Creates a stimulus file for SRAM setup/hold time calculation"""
 
         # creates and opens the stimulus file for writing
-        temp_stim = OPTS.openram_temp + "stim.sp"
+        if temp_dir == None:
+            temp_dir = OPTS.openram_temp
+        temp_stim = temp_dir + "stim.sp"
         self.sf = open(temp_stim, "w")
 
         self.write_header(correct_value)
@@ -54,7 +66,10 @@ class setup_hold():
                             correct_value=correct_value)
                          
 
-        stimuli.write_control(self.sf,4*self.period)
+        # the default 5ps step resolves the setup and hold times
+        stimuli.write_control(self.sf,
+                              4*self.period,
+                              save_signals=["v(clk)", "v(data)", "v(dout)"])
 
         self.sf.close()
 
@@ -165,6 +180,18 @@ class setup_hold():
 
 
 
+    def run_trial(self, mode, target_time, correct_value):
+        """ Simulates one data arrival time in its own scratch directory
+        and returns the clk-to-q and setup/hold measurements. """
+        with scratch.scratch_dir("setup_hold") as job:
+            self.write_stimulus(mode=mode,
+                                target_time=target_time,
+                                correct_value=correct_value,
+                                temp_dir=job.path)
+            stimuli.run_sim(job.path)
+            measures = ch.parse_spice_list("timing", job.path)
+        return (measures.get("clk2q_delay", False), measures.get("setup_hold_time", False))
+
     def bidir_search(self, correct_value, mode):
         """ This will perform a bidirectional search for either setup or hold times.
         It starts with the feasible priod and looks a half period beyond or before it
@@ -183,12 +210,9 @@ class setup_hold():
             feasible_bound = 2.75*self.period
 
         # Initial check if reference feasible bound time passes for correct_value, if not, we can't start the search!
-        self.write_stimulus(mode=mode, 
-                            target_time=feasible_bound, 
-                            correct_value=correct_value)
-        stimuli.run_sim()
-        ideal_clk_to_q = ch.convert_to_float(ch.parse_output("timing", "clk2q_delay"))
-        setuphold_time = ch.convert_to_float(ch.parse_output("timing", "setup_hold_time"))
+        (ideal_clk_to_q, setuphold_time) = self.run_trial(mode=mode,
+                                                          target_time=feasible_bound,
+                                                          correct_value=correct_value)
         debug.info(2,"*** {0} CHECK: {1} Ideal Clk-to-Q: {2} Setup/Hold: {3}".format(mode, correct_value,ideal_clk_to_q,setuphold_time))
 
         if type(ideal_clk_to_q)!=float or type(setuphold_time)!=float:
@@ -199,51 +223,52 @@ class setup_hold():
         else:
             setuphold_time *= 1e9
             
-        passing_setuphold_time = setuphold_time
         debug.info(2,"Checked initial {0} time {1}, data at {2}, clock at {3} ".format(mode,
                                                                                        setuphold_time,
                                                                                        feasible_bound,
                                                                                        2*self.period))
-        #raw_input("Press Enter to continue...")
-            
-        while True:
-            target_time = (feasible_bound + infeasible_bound)/2
-            self.write_stimulus(mode=mode, 
-                                target_time=target_time, 
-                                correct_value=correct_value)
-
-            debug.info(2,"{0} value: {1} Target time: {2} Infeasible: {3} Feasible: {4}".format(mode,
-                                                                                                correct_value,
-                                                                                                target_time,
-                                                                                                infeasible_bound,
-                                                                                                feasible_bound))
-
-
-            stimuli.run_sim()
-            clk_to_q = ch.convert_to_float(ch.parse_output("timing", "clk2q_delay"))
-            setuphold_time = ch.convert_to_float(ch.parse_output("timing", "setup_hold_time"))
-            if type(clk_to_q)==float and (clk_to_q<1.1*ideal_clk_to_q) and type(setuphold_time)==float:
-                if mode == "SETUP": # SETUP is clk-din, not din-clk
-                    setuphold_time *= -1e9
-                else:
-                    setuphold_time *= 1e9
-
-                debug.info(2,"PASS Clk-to-Q: {0} Setup/Hold: {1}".format(clk_to_q,setuphold_time))
-                passing_setuphold_time = setuphold_time
-                feasible_bound = target_time
-            else:
-                debug.info(2,"FAIL Clk-to-Q: {0} Setup/Hold: {1}".format(clk_to_q,setuphold_time))
-                infeasible_bound = target_time
 
-            #raw_input("Press Enter to continue...")
-            if ch.relative_compare(feasible_bound, infeasible_bound, error_tolerance=0.001):
-                debug.info(3,"CONVERGE {0} vs {1}".format(feasible_bound,infeasible_bound))
-                break
-            
+        # Each round of the search simulates several data arrival times
+        # in parallel (see ch.bracket_search)
+        def evaluate(target_times):
+            debug.info(2,"{0} value: {1} Target times: {2}".format(mode, correct_value, target_times))
+            trials = ch.parallel_map(run_trial, [(self, mode, target_time, correct_value)
+                                                 for target_time in target_times])
+            return [self.trial_result(mode, trial, ideal_clk_to_q) for trial in trials]
+
+        # The feasible bound has the ideal clk-to-q, so it is 10% from failing
+        (feasible_bound, passing_setuphold_time) = ch.bracket_search(evaluate,
+                                                                     feasible=feasible_bound,
+                                                                     infeasible=infeasible_bound,
+                                                                     tolerance=0.001,
+                                                                     feasible_result=(True, -0.1, setuphold_time))
 
         debug.info(2,"Converged on {0} time {1}.".format(mode,passing_setuphold_time))
         return passing_setuphold_time
 
+    def trial_result(self, mode, trial, ideal_clk_to_q):
+        """ Checks the result of a data arrival time for a bracket search.
+        The metric is how much further the clk-to-q is from the ideal
+        clk-to-q than the 10% that is allowed. The data is the setup or
+        hold time in ns. """
+        (clk_to_q, setuphold_time) = trial
+        if type(clk_to_q)!=float:
+            debug.info(2,"FAIL Clk-to-Q: {0} Setup/Hold: {1}".format(clk_to_q,setuphold_time))
+            return (False, None, None)
+
+        metric = clk_to_q / ideal_clk_to_q - 1.1
+        if (clk_to_q<1.1*ideal_clk_to_q) and type(setuphold_time)==float:
+            if mode == "SETUP": # SETUP is clk-din, not din-clk
+                setuphold_time *= -1e9
+            else:
+                setuphold_time *= 1e9
+
+            debug.info(2,"PASS Clk-to-Q: {0} Setup/Hold: {1}".format(clk_to_q,setuphold_time))
+            return (True, metric, setuphold_time)
+
+        debug.info(2,"FAIL Clk-to-Q: {0} Setup/Hold: {1}".format(clk_to_q,setuphold_time))
+        return (False, max(metric, 0), None)
+
 
     def setup_LH_time(self):
         """Calculates the setup time for low-to-high transition for a DFF
@@ -267,32 +292,63 @@ class setup_hold():
         return self.bidir_search(0, "HOLD")
 
 
+    def cache_key(self, related_slews, constrained_slews):
+        """ The setup/hold times only depend on the technology, the flop
+        netlist, the corner, the simulator, the slews and the search
+        arity (where the search stops in its tolerance), so they are the
+        same for every SRAM. This is their key in the cache. """
+        digest = hashlib.sha1()
+        digest.update("setup_hold {0} {1}".format(OPTS.tech_name, sim_cache.simulator_id()))
+        digest.update("{0} {1} {2} {3}".format(self.period, self.vdd, self.gnd, tech.spice["temp"]))
+        digest.update(sim_cache.models_id(tech.spice["fet_models"]))
+        digest.update(sim_cache.hash_file(self.model_location))
+        digest.update(repr(list(related_slews)))
+        digest.update(repr(list(constrained_slews)))
+        digest.update("arity {0}".format(ch.search_arity()))
+        if OPTS.surrogate_tables:
+            digest.update("surrogate {0}".format(OPTS.surrogate_tolerance))
+        return digest.hexdigest()
+
     def analyze(self, related_slews, constrained_slews):
         """main function to calculate both setup and hold time for the
         DFF and returns a dictionary that contains 4 lists for both
         setup/hold times for high_to_low and low_to_high transitions
-        for all the slew combinations of the data and clock.
+        for all the slew combinations of the data and clock. The times
+        of previous runs are reused from the simulation cache.
         """
-        LH_setup = []
-        HL_setup = []
-        LH_hold = []
-        HL_hold = []
-        for self.related_input_slew in related_slews:
-            for self.constrained_input_slew in constrained_slews:
-                debug.info(1, "Clock slew: {0} Data slew: {1}".format(self.related_input_slew,self.constrained_input_slew))
-                LH_setup_time = self.setup_LH_time()
-                debug.info(1, "  Setup Time for low_to_high transistion: {0}".format(LH_setup_time))
-                HL_setup_time = self.setup_HL_time()
-                debug.info(1, "  Setup Time for high_to_low transistion: {0}".format(HL_setup_time))
-                LH_hold_time = self.hold_LH_time()
-                debug.info(1, "  Hold Time for low_to_high transistion: {0}".format(LH_hold_time))
-                HL_hold_time = self.hold_HL_time()
-                debug.info(1, "  Hold Time for high_to_low transistion: {0}".format(HL_hold_time))
-                LH_setup.append(LH_setup_time)
-                HL_setup.append(HL_setup_time)
-                LH_hold.append(LH_hold_time)
-                HL_hold.append(HL_hold_time)
-                
+        if OPTS.use_sim_cache:
+            key = self.cache_key(related_slews, constrained_slews)
+            times = sim_cache.fetch_data(key)
+            if times != None:
+                debug.info(1, "Using cached setup/hold times {0}".format(key))
+                # JSON names are unicode
+                return dict((str(name), values) for (name, values) in times.items())
+
+        times = self.search_times(related_slews, constrained_slews)
+
+        if OPTS.use_sim_cache:
+            sim_cache.store_data(key, times)
+        return times
+
+    def search_times(self, related_slews, constrained_slews):
+        """ Searches for the setup/hold times of all slew combinations
+        or of a few of them with the rest from a fitted model. """
+        if OPTS.surrogate_tables:
+            def evaluate(indices):
+                return [self.search_point(related_slews[i], constrained_slews[j])
+                        for (i, j) in indices]
+            table = surrogate.fill_table(evaluate, related_slews, constrained_slews,
+                                         OPTS.surrogate_tolerance)
+        else:
+            table = []
+            for related_slew in related_slews:
+                for constrained_slew in constrained_slews:
+                    table.append(self.search_point(related_slew, constrained_slew))
+
+        LH_setup = [times[0] for times in table]
+        HL_setup = [times[1] for times in table]
+        LH_hold = [times[2] for times in table]
+        HL_hold = [times[3] for times in table]
         times = {"setup_times_LH": LH_setup,
                  "setup_times_HL": HL_setup,
                  "hold_times_LH": LH_hold,
@@ -300,6 +356,22 @@ class setup_hold():
                  }
         return times
 
+    def search_point(self, related_slew, constrained_slew):
+        """ Searches for the setup and hold times of a clock and data
+        slew. """
+        self.related_input_slew = related_slew
+        self.constrained_input_slew = constrained_slew
+        debug.info(1, "Clock slew: {0} Data slew: {1}".format(self.related_input_slew,self.constrained_input_slew))
+        LH_setup_time = self.setup_LH_time()
+        debug.info(1, "  Setup Time for low_to_high transistion: {0}".format(LH_setup_time))
+        HL_setup_time = self.setup_HL_time()
+        debug.info(1, "  Setup Time for high_to_low transistion: {0}".format(HL_setup_time))
+        LH_hold_time = self.hold_LH_time()
+        debug.info(1, "  Hold Time for low_to_high transistion: {0}".format(LH_hold_time))
+        HL_hold_time = self.hold_HL_time()
+        debug.info(1, "  Hold Time for high_to_low transistion: {0}".format(HL_hold_time))
+        return (LH_setup_time, HL_setup_time, LH_hold_time, HL_hold_time)
+
     def analytical_model(self,related_slews, constrained_slews):
         """ Just return the fixed setup/hold times from the technology.
         """
@@ -322,3 +394,10 @@ class setup_hold():
                  "hold_times_HL": HL_hold
                  }
         return times
+
+
+def run_trial(args):
+    """ Runs a single setup/hold trial. This is a module function so it
+    can be used by a pool."""
+    (sh, mode, target_time, correct_value) = args
+    return sh.run_trial(mode, target_time, correct_value)
@@ -0,0 +1,189 @@
+"""
+This is a persistent, content-addressed cache of spice simulation
+results. The key of a simulation is a hash of the stimulus file, the
+contents of every file it includes (the SRAM netlist and the device
+models) and the simulator identity. The paths of the included files
+are not part of the key because they are in the temp directory, which
+changes for every run.
+
+On a hit, the stored output listing (and the waveform if one was
+saved) is copied into the job directory so the simulation does not
+have to be run again. Whole characterization results that do not
+depend on the SRAM (e.g. the flop setup/hold times) are also stored
+here as JSON data. The cache is limited
+to OPTS.sim_cache_size bytes and the least recently used results are
+evicted first.
+"""
+import os
+import re
+import json
+import shutil
+import hashlib
+import tempfile
+import globals
+import debug
+import simulator
+
+OPTS = globals.get_opts()
+
+# memoized hashes of included files keyed by (path, size, mtime)
+file_hashes = {}
+
+include_pattern = re.compile(r"^\s*\.include\s+[\"']?([^\"'\s]+)[\"']?", re.IGNORECASE)
+
+
+def hash_file(filename):
+    """ Returns the sha1 digest of the contents of a file. """
+    stat = os.stat(filename)
+    file_key = (filename, stat.st_size, stat.st_mtime)
+    if file_key not in file_hashes:
+        digest = hashlib.sha1()
+        f = open(filename, "rb")
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+        f.close()
+        file_hashes[file_key] = digest.hexdigest()
+    return file_hashes[file_key]
+
+
+def simulator_id():
+    """ Identifies the simulator of the spice version (see
+    simulator.identity). """
+    return simulator.get_simulator().identity()
+
+
+def models_id(models):
+    """ Returns the hashes of the contents of the device model files
+    that the simulator reads. The in-process backends don't read them,
+    so they don't have to exist. """
+    if not simulator.get_simulator().reads_models:
+        return ""
+    return " ".join(hash_file(model) for model in models)
+
+
+def get_key(stim_name):
+    """ Returns the cache key of a stimulus file. """
+    digest = hashlib.sha1()
+    digest.update(simulator_id())
+    f = open(stim_name, "r")
+    for line in f:
+        include = include_pattern.match(line)
+        if include:
+            # the included path is replaced by the hash of its contents
+            line = ".include {0}\n".format(hash_file(include.group(1)))
+        digest.update(line)
+    f.close()
+    return digest.hexdigest()
+
+
+def cache_name(key, extension=".lis"):
+    """ Returns the file name of a cached result """
+    return "{0}{1}{2}".format(OPTS.sim_cache_dir, key, extension)
+
+
+def fetch(key, output_name):
+    """ Copies a cached simulation output to output_name. Returns False
+    if the key is not in the cache. The output and the cached result
+    have the same extension (.lis, .raw). """
+    cached_name = cache_name(key, os.path.splitext(output_name)[1])
+    try:
+        shutil.copyfile(cached_name, output_name)
+    except IOError:
+        return False
+    # mark the result as recently used for the LRU eviction
+    try:
+        os.utime(cached_name, None)
+    except OSError:
+        pass
+    debug.info(2, "Simulation cache hit {0}".format(key))
+    return True
+
+
+def store(key, output_name):
+    """ Stores a simulation output in the cache and evicts the least
+    recently used results if the cache is too big. """
+    if not os.path.isfile(output_name):
+        return
+    if not os.path.isdir(OPTS.sim_cache_dir):
+        try:
+            os.makedirs(OPTS.sim_cache_dir, 0o750)
+        except OSError:
+            # somebody else may have made it in the meantime
+            pass
+    # copy and rename so that concurrent jobs never see a partial file
+    (fd, temp_name) = tempfile.mkstemp(dir=OPTS.sim_cache_dir, suffix=".tmp")
+    os.close(fd)
+    shutil.copyfile(output_name, temp_name)
+    os.rename(temp_name, cache_name(key, os.path.splitext(output_name)[1]))
+    debug.info(2, "Simulation cache store {0}".format(key))
+    evict()
+
+
+def fetch_data(key):
+    """ Returns the cached characterization data of a key or None if
+    the key is not in the cache. """
+    cached_name = cache_name(key, ".json")
+    try:
+        f = open(cached_name, "r")
+        data = json.load(f)
+        f.close()
+    except (IOError, ValueError):
+        return None
+    try:
+        os.utime(cached_name, None)
+    except OSError:
+        pass
+    debug.info(2, "Simulation cache hit {0}".format(key))
+    return data
+
+
+def store_data(key, data):
+    """ Stores characterization data (anything JSON can encode) in the
+    cache. """
+    if not os.path.isdir(OPTS.sim_cache_dir):
+        try:
+            os.makedirs(OPTS.sim_cache_dir, 0o750)
+        except OSError:
+            pass
+    (fd, temp_name) = tempfile.mkstemp(dir=OPTS.sim_cache_dir, suffix=".tmp")
+    f = os.fdopen(fd, "w")
+    json.dump(data, f)
+    f.close()
+    os.rename(temp_name, cache_name(key, ".json"))
+    debug.info(2, "Simulation cache store {0}".format(key))
+    evict()
+
+
+def evict():
+    """ Removes the least recently used results until the cache is no
+    larger than OPTS.sim_cache_size bytes. """
+    entries = []
+    total_size = 0
+    for name in os.listdir(OPTS.sim_cache_dir):
+        # skip the partial files that are being stored
+        if name.endswith(".tmp"):
+            continue
+        full_name = OPTS.sim_cache_dir + name
+        try:
+            stat = os.stat(full_name)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, full_name))
+        total_size += stat.st_size
+
+    entries.sort()
+    for (mtime, size, full_name) in entries:
+        if total_size <= OPTS.sim_cache_size:
+            break
+        debug.info(3, "Simulation cache evict {0}".format(full_name))
+        try:
+            os.remove(full_name)
+        except OSError:
+            pass
+        total_size -= size
+
+
+def clear():
+    """ Removes all of the cached results. """
+    debug.info(1, "Clearing simulation cache {0}".format(OPTS.sim_cache_dir))
+    shutil.rmtree(OPTS.sim_cache_dir, ignore_errors=True)
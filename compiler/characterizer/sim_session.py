@@ -0,0 +1,175 @@
+"""
+Persistent simulator sessions. Instead of starting a new simulator
+process for every simulation, each process keeps one ngspice running in
+pipe mode (ngspice -p) and sends it commands on its standard input. A
+stimulus is loaded with source and, when the next stimulus only differs
+in its .param line (see stimuli.write_params), the loaded netlist and
+models are reused by changing the parameters with alterparam and reset
+instead of reading and parsing the files again.
+"""
+import os
+import subprocess
+import atexit
+import globals
+import debug
+import simulator
+
+OPTS = globals.get_opts()
+
+# The sessions of this process keyed by the simulator executable. The
+# worker processes that are forked inherit the sessions of the parent
+# but start their own since the pipes can't be shared.
+sessions = {}
+
+
+def split_params(deck):
+    """ Returns the .param values (a list of (name, value) strings) of
+    a stimulus and the rest of the stimulus without the comments.
+    Stimuli with the same rest are the same circuit. """
+    params = None
+    circuit = []
+    for line in deck.splitlines():
+        if line.startswith("*"):
+            continue
+        if params == None and line.lower().startswith(".param "):
+            params = [tuple(p.split("=")) for p in line.split()[1:]]
+            continue
+        circuit.append(line)
+    return (params, "\n".join(circuit))
+
+
+class sim_session():
+    """
+    A long running simulator process that simulates stimulus files one
+    after the other. The simulator must read commands from its standard
+    input and print their output to its standard output like ngspice in
+    pipe mode does. The end of the output of each command is found by
+    echoing a marker after it.
+    """
+
+    marker = "OPENRAM_SESSION_DONE"
+
+    def __init__(self, exe):
+        self.exe = exe
+        self.pid = os.getpid()
+        self.process = None
+        # the stimulus without its parameters of the loaded circuit or
+        # None when it can't be reused
+        self.circuit = None
+        self.loaded = False
+        self.start()
+
+    def start(self):
+        """ Starts the simulator process. """
+        debug.info(2, "Starting simulator session: {0} -p".format(self.exe))
+        self.process = subprocess.Popen([self.exe, "-p"],
+                                        stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT,
+                                        universal_newlines=True)
+        self.circuit = None
+        self.loaded = False
+        # waveforms are written in the binary format of batch mode
+        self.command("set filetype=binary")
+
+    def command(self, cmd):
+        """ Sends a command to the simulator and returns its output
+        lines. """
+        debug.info(3, "Session: {0}".format(cmd))
+        try:
+            self.process.stdin.write("{0}\necho {1}\n".format(cmd, self.marker))
+            self.process.stdin.flush()
+        except IOError:
+            self.close()
+            debug.error("Simulator session ended before: {0}".format(cmd), -1)
+        output = []
+        while True:
+            line = self.process.stdout.readline()
+            if line == "":
+                self.close()
+                debug.error("Simulator session ended during: {0}".format(cmd), -1)
+            line = line.rstrip("\n")
+            if line.strip() == self.marker:
+                return output
+            output.append(line)
+
+    def run(self, stim_name, lis_name, raw_name=None):
+        """ Simulates a stimulus file and writes the output (the measure
+        results) to lis_name like a batch mode run. If raw_name is
+        given, the waveforms are also written to it. """
+        (params, circuit) = split_params(open(stim_name, "r").read())
+        if ".control" in circuit:
+            # the commands of a control block run when it is loaded
+            output = self.load(stim_name, None)
+        else:
+            if params != None and circuit == self.circuit:
+                output = []
+                for (name, value) in params:
+                    output += self.command("alterparam {0}={1}".format(name, value))
+                # reset re-evaluates the loaded netlist with the new parameters
+                output += self.command("reset")
+            else:
+                output = self.load(stim_name, circuit)
+            output += self.command("run")
+        if raw_name != None:
+            output += self.command("write {0}".format(raw_name))
+        # free the vectors of the simulation but keep the circuit
+        output += self.command("destroy all")
+
+        lis = open(lis_name, "w")
+        lis.write("\n".join(output) + "\n")
+        lis.close()
+
+    def load(self, stim_name, circuit):
+        """ Replaces the loaded circuit with a stimulus file. """
+        output = []
+        if self.loaded:
+            output += self.command("remcirc")
+        # a control block is run when it is loaded so it can't be reused
+        self.circuit = circuit
+        self.loaded = True
+        output += self.command("source {0}".format(os.path.abspath(stim_name)))
+        return output
+
+    def close(self):
+        """ Stops the simulator process. """
+        if self.process == None:
+            return
+        if self.process.poll() == None:
+            try:
+                self.process.stdin.write("quit\n")
+                self.process.stdin.close()
+            except IOError:
+                pass
+            self.process.wait()
+        self.process = None
+        self.circuit = None
+        self.loaded = False
+
+
+def get_session(exe=None):
+    """ Returns the session of this process for a simulator, starting
+    it the first time. """
+    if exe == None:
+        exe = OPTS.spice_exe
+    session = sessions.get(exe)
+    if session == None or session.pid != os.getpid() or session.process == None:
+        session = sim_session(exe)
+        sessions[exe] = session
+    return session
+
+
+def close_sessions():
+    """ Stops the sessions started by this process. """
+    for session in sessions.values():
+        if session.pid == os.getpid():
+            session.close()
+    sessions.clear()
+
+atexit.register(close_sessions)
+
+
+def use_sessions():
+    """ Returns whether simulations run in a session. Only ngspice has a
+    pipe mode so the other simulators start a process per simulation. """
+    return OPTS.sim_sessions and simulator.get_simulator().has_sessions
@@ -0,0 +1,460 @@
+"""
+The simulator backends. A backend knows the parts of a stimulus that
+differ between simulators (parameter expressions, the supply power
+measure and the options), how to run a stimulus and where the measure
+results are. Every backend leaves the measure results in timing.lis of
+the simulation directory so that they are read with
+charutils.parse_spice_list whatever the simulator.
+
+Besides hspice, ngspice and Xyce, the analytic backend answers the
+measures of a stimulus in-process from the analytical models so that
+the characterizers can be run end-to-end without a simulator.
+"""
+import os
+import re
+import shutil
+import subprocess
+import globals
+import debug
+import tech
+import charutils as ch
+
+OPTS = globals.get_opts()
+
+
+class simulator():
+    """
+    A spice simulator that is run as a new process for each stimulus.
+    """
+    name = ""
+    # The executable that is searched for in the PATH or None if the
+    # backend doesn't need one
+    exe_name = None
+    # The simulator that is tried when the executable isn't found
+    fallback = None
+    # How the points of a batched stimulus are simulated (see
+    # stimuli.write_batch_control): "alter" blocks, an ngspice
+    # "control" block or None if they are simulated one by one
+    batch = None
+    # Whether the waveform can be saved (see rawfile)
+    saves_waveforms = False
+    # Whether it can run in a persistent session (see sim_session)
+    has_sessions = False
+    # Whether the results are stored in the simulation cache
+    cache_results = True
+    # Whether the results depend on the device model files
+    reads_models = True
+
+    def identity(self):
+        """ Identifies the simulator by its name, its path and the size
+        and modification time of the executable so an upgrade
+        invalidates the cached results without having to run (and
+        license) the simulator. """
+        exe = os.path.realpath(OPTS.spice_exe)
+        try:
+            stat = os.stat(exe)
+            return "{0} {1} {2} {3}".format(self.name, exe, stat.st_size, stat.st_mtime)
+        except OSError:
+            return "{0} {1}".format(self.name, exe)
+
+    def param_expr(self, expr):
+        """ Returns a parameter expression in the syntax of the simulator. """
+        return "{{{0}}}".format(expr)
+
+    def power_expr(self, vdd_name):
+        """ Returns the expression of the supply power for an average
+        measure. """
+        return "par('(-1*v(" + str(vdd_name) + ")*I(v" + str(vdd_name) + "))')"
+
+    def options(self, autostop=False):
+        """ Returns the .OPTIONS statement of a stimulus or None. With
+        autostop, the simulation ends when every .meas is resolved. """
+        if autostop:
+            return ".OPTIONS AUTOSTOP"
+        return None
+
+    def save_statement(self, signals):
+        """ Returns the statement that only keeps some signals (e.g.
+        "v(clk)" or "i(vvdd)") of a simulation or None. """
+        return None
+
+    def command(self, temp_stim, temp_dir, save_waveform):
+        """ Returns the command that simulates a stimulus and the
+        largest return code that is not an error. """
+        debug.error("No command to run {0}.".format(self.name), -1)
+
+    def run(self, temp_stim, temp_dir, save_waveform):
+        """ Simulates a stimulus and writes the measures to timing.lis in
+        temp_dir. """
+        (cmd, valid_retcode) = self.command(temp_stim, temp_dir, save_waveform)
+
+        spice_stdout = open("{0}spice_stdout.log".format(temp_dir), 'w')
+        spice_stderr = open("{0}spice_stderr.log".format(temp_dir), 'w')
+
+        debug.info(3, cmd)
+        retcode = subprocess.call(cmd, stdout=spice_stdout, stderr=spice_stderr, shell=True)
+
+        spice_stdout.close()
+        spice_stderr.close()
+
+        if (retcode > valid_retcode):
+            debug.error("Spice simulation error: " + cmd, -1)
+
+
+class hspice(simulator):
+    name = "hspice"
+    exe_name = "hspice"
+    fallback = "ngspice"
+    batch = "alter"
+
+    def param_expr(self, expr):
+        return "'{0}'".format(expr)
+
+    def power_expr(self, vdd_name):
+        return "power"
+
+    def options(self, autostop=False):
+        # no POST, so the waveforms (which are never read) aren't written
+        if autostop:
+            return ".OPTIONS RUNLVL=4 AUTOSTOP"
+        return ".OPTIONS RUNLVL=4"
+
+    def command(self, temp_stim, temp_dir, save_waveform):
+        # TODO: Should make multithreading parameter a configuration option
+        cmd = "{0} -mt 2 -i {1} -o {2}timing".format(OPTS.spice_exe,
+                                                     temp_stim,
+                                                     temp_dir)
+        return (cmd, 0)
+
+
+class ngspice(simulator):
+    name = "ngspice"
+    exe_name = "ngspice"
+    fallback = "hspice"
+    batch = "control"
+    saves_waveforms = True
+    has_sessions = True
+
+    def save_statement(self, signals):
+        # the vectors are kept in memory (and the rawfile) for the
+        # measures even in batch mode
+        return ".save " + " ".join(signals)
+
+    def command(self, temp_stim, temp_dir, save_waveform):
+        if save_waveform:
+            raw_option = "-r {0}timing.raw ".format(temp_dir)
+        else:
+            raw_option = ""
+        cmd = "{0} -b {3}-o {2}timing.lis {1}".format(OPTS.spice_exe,
+                                                      temp_stim,
+                                                      temp_dir,
+                                                      raw_option)
+        # for some reason, ngspice-25 returns 1 when it only has acceptable warnings
+        return (cmd, 1)
+
+
+class xyce(simulator):
+    name = "xyce"
+    exe_name = "Xyce"
+    fallback = "ngspice"
+
+    def power_expr(self, vdd_name):
+        return "{{-1*v({0})*I(v{0})}}".format(vdd_name)
+
+    def options(self, autostop=False):
+        # the hspice output options are errors in Xyce
+        return None
+
+    def command(self, temp_stim, temp_dir, save_waveform):
+        cmd = "{0} -l {1}spice_xyce.log {2}".format(OPTS.spice_exe,
+                                                    temp_dir,
+                                                    temp_stim)
+        return (cmd, 0)
+
+    def run(self, temp_stim, temp_dir, save_waveform):
+        simulator.run(self, temp_stim, temp_dir, save_waveform)
+        # Xyce writes the measures next to the stimulus
+        measure_file = temp_stim + ".mt0"
+        if not os.path.isfile(measure_file):
+            debug.error("Xyce did not write the measures: {0}".format(measure_file), -1)
+        shutil.copyfile(measure_file, "{0}timing.lis".format(temp_dir))
+
+
+class analytic(simulator):
+    """
+    Answers the measures of a stimulus from the analytical models
+    without a simulator. The read delays, slews and power of an SRAM
+    stimulus come from the analytical delay model of the SRAM (see
+    add_model), which is slower when the read doesn't fit in half of
+    the period. The setup/hold stimulus of ms_flop is evaluated from its
+    PWL inputs with the setup, hold and clk-to-q times of the
+    technology. It reads the ngspice syntax, including the batched
+    control blocks.
+    """
+    name = "analytic"
+    batch = "control"
+    # computing the results is faster than caching them
+    cache_results = False
+    # the models use the technology parameters
+    reads_models = False
+
+    def identity(self):
+        # there is no executable, the models are part of this version
+        return "{0} {1}".format(self.name, globals.VERSION)
+
+    def run(self, temp_stim, temp_dir, save_waveform):
+        deck = analytic_deck(temp_stim)
+        lis = open("{0}timing.lis".format(temp_dir), "w")
+        for (name, value) in deck.measures():
+            if value == None:
+                lis.write("{0} = failed\n".format(name))
+            else:
+                lis.write("{0} = {1:e}\n".format(name, value))
+        lis.close()
+
+
+backends = dict((backend.name, backend()) for backend in [hspice, ngspice, xyce, analytic])
+
+
+def get_simulator(name=None):
+    """ Returns the backend of a simulator name (the spice version by
+    default). """
+    if name == None:
+        name = OPTS.spice_version
+    debug.check(name in backends, "Unknown simulator: {0}".format(name))
+    return backends[name]
+
+
+# The designs (SRAMs) whose analytical models the analytic backend uses
+# keyed by the name of their subcircuit
+models = {}
+
+
+def add_model(design):
+    """ Makes the analytical model of a design available to the analytic
+    backend. """
+    models[design.name] = design
+
+
+class analytic_deck():
+    """
+    The parts of a stimulus that the analytic backend reads: the
+    parameters, the PWL sources, the instances and the measures of each
+    simulated point.
+    """
+
+    header_pattern = re.compile(r"period of (\S+)n load=(\S+) slew=(\S+)")
+
+    def __init__(self, stim_name):
+        self.header = {}
+        self.sources = {}
+        self.instances = []
+        # the (parameters, measures) of each simulation
+        self.points = []
+        params = {}
+        measures = []
+        control = False
+        for line in self.read_lines(stim_name):
+            header = self.header_pattern.search(line)
+            if line.startswith("*"):
+                if header and len(self.header) == 0:
+                    self.header = dict(zip(["stim_period", "stim_load", "stim_slew"],
+                                           [float(x) for x in header.groups()]))
+                continue
+            tokens = line.split()
+            keyword = tokens[0].lower()
+            if keyword == ".control":
+                control = True
+            elif keyword == ".endc":
+                control = False
+            elif keyword == ".param":
+                params.update(p.split("=") for p in tokens[1:])
+            elif keyword == "alterparam":
+                params.update([tokens[1].split("=")])
+            elif keyword == "tran" and control:
+                self.points.append((dict(params), []))
+            elif keyword == "meas" and control:
+                self.points[-1][1].append(tokens[2:])
+            elif keyword == ".meas":
+                measures.append(tokens[2:])
+            elif keyword.startswith("v") and not control:
+                self.add_source(tokens)
+            elif keyword.startswith("x") and not control:
+                self.instances.append((tokens[1:-1], tokens[-1]))
+        if len(self.points) == 0:
+            self.points.append((params, measures))
+
+    def read_lines(self, stim_name):
+        """ Returns the lines of a stimulus with the continuations
+        joined. """
+        lines = []
+        for line in open(stim_name, "r"):
+            line = line.strip()
+            if len(line) == 0:
+                continue
+            if line.startswith("+") and len(lines) > 0:
+                lines[-1] += " " + line[1:]
+            else:
+                lines.append(line)
+        return lines
+
+    def add_source(self, tokens):
+        """ Keeps the PWL values of a voltage source by its node. """
+        upper = [token.upper() for token in tokens]
+        if "PWL" in upper:
+            values = " ".join(tokens[upper.index("PWL")+1:]).strip("() ").split()
+            self.sources[tokens[1].lower()] = values
+
+    def value(self, token, params):
+        """ Returns the value of a number or parameter expression. """
+        token = token.strip("{}'")
+        if ch.spice_number_pattern.match(token):
+            return ch.convert_to_float(token)
+        values = dict((name, float(value)) for (name, value) in params.items())
+        return float(eval(token, {"__builtins__": {}}, values))
+
+    def measures(self):
+        """ Returns the (name, value) of every measure of every point.
+        The value is None if the measure failed. """
+        results = []
+        for (params, measures) in self.points:
+            signals = self.signals(params)
+            for measure in measures:
+                results.append((measure[0].lower(), self.measure(measure, params, signals)))
+        return results
+
+    def measure(self, measure, params, signals):
+        """ Returns the value of a measure or None if it fails. """
+        sram = self.sram()
+        if sram != None:
+            return self.sram_measure(sram, measure[0], params)
+        keywords = [token.upper() for token in measure]
+        if "TRIG" in keywords and "TARG" in keywords:
+            trig = measure[keywords.index("TRIG"):keywords.index("TARG")]
+            targ = measure[keywords.index("TARG"):]
+            trig_time = self.crossing(trig, params, signals)
+            targ_time = self.crossing(targ, params, signals)
+            if trig_time == None or targ_time == None:
+                return None
+            return targ_time - trig_time
+        # there is no model of the power
+        return 0.0
+
+    def crossing(self, tokens, params, signals):
+        """ Returns the time of the crossing of a TRIG or TARG of a
+        measure or None. """
+        node = tokens[1].lower()[2:-1]
+        if node not in signals:
+            return None
+        options = {}
+        for token in tokens[2:]:
+            (key, value) = token.split("=", 1)
+            options[key.upper()] = value
+        val = self.value(options["VAL"], params)
+        td = self.value(options.get("TD", "0"), params)
+        for direction in ["RISE", "FALL"]:
+            if direction in options:
+                count = int(options[direction])
+                times = [t for (t, d) in signals[node](val) if d == direction and t >= td]
+                if len(times) >= count:
+                    return times[count-1]
+        return None
+
+    def signals(self, params):
+        """ Returns a function for each node that returns the (time,
+        direction) crossings of a level. """
+        waveforms = {}
+        for (node, values) in self.sources.items():
+            points = [self.value(value, params) for value in values]
+            waveforms[node] = list(zip(points[0::2], points[1::2]))
+        signals = dict((node, lambda level, w=waveform: pwl_crossings(w, level))
+                       for (node, waveform) in waveforms.items())
+        for (nodes, subckt) in self.instances:
+            if subckt == "ms_flop":
+                # data, dout, dout_bar, clk, vdd, gnd
+                (data, dout, clk) = (nodes[0].lower(), nodes[1].lower(), nodes[3].lower())
+                if data in waveforms and clk in waveforms:
+                    events = flop_events(waveforms[data], waveforms[clk])
+                    signals[dout] = lambda level, e=events: e
+        return signals
+
+    def sram(self):
+        """ Returns the SRAM with an analytical model that the stimulus
+        instantiates or None. """
+        for (nodes, subckt) in self.instances:
+            if subckt in models:
+                return models[subckt]
+        return None
+
+    def sram_measure(self, sram, name, params):
+        """ Returns a read delay or slew (s) or power of the analytical
+        model of an SRAM. The period, load and slew are the parameters of
+        the stimulus or the ones in its header. """
+        point = dict(self.header)
+        point.update((name, float(value)) for (name, value) in params.items())
+        name = name.lower()
+        batch_name = ch.batch_name_pattern.match(name)
+        if batch_name:
+            name = batch_name.group(1)
+        if "_power" in name:
+            return 0.0
+        (delays, slews) = sram.analytical_delay(point["stim_slew"], point["stim_load"])
+        (delay, slew) = (float(delays), float(slews))
+        # a read that doesn't fit in half of the period is slower
+        half_period = 0.5 * point["stim_period"]
+        if half_period < delay + slew:
+            delay *= ((delay + slew) / half_period)**2
+        if name.startswith("delay"):
+            return 1e-9 * delay
+        elif name.startswith("slew"):
+            return 1e-9 * slew
+        return None
+
+
+def pwl_crossings(waveform, level):
+    """ Returns the (time, direction) of every crossing of a level by a
+    PWL waveform of (time, value) points. """
+    crossings = []
+    for ((t0, v0), (t1, v1)) in zip(waveform[:-1], waveform[1:]):
+        if v0 < level <= v1:
+            crossings.append((t0 + (t1 - t0) * (level - v0) / (v1 - v0), "RISE"))
+        elif v0 > level >= v1:
+            crossings.append((t0 + (t1 - t0) * (level - v0) / (v1 - v0), "FALL"))
+    return crossings
+
+
+def pwl_value(waveform, time):
+    """ Returns the value of a PWL waveform at a time. """
+    for ((t0, v0), (t1, v1)) in zip(waveform[:-1], waveform[1:]):
+        if t0 <= time <= t1:
+            if t1 == t0:
+                return v1
+            return v0 + (v1 - v0) * (time - t0) / (t1 - t0)
+    if time < waveform[0][0]:
+        return waveform[0][1]
+    return waveform[-1][1]
+
+
+def flop_events(data, clk):
+    """ Returns the (time, direction) output transitions of a flop with
+    PWL data and clock inputs. The output changes a clk-to-q delay after
+    a rising clock edge if the data is stable from the setup time before
+    the edge to the hold time after it. Otherwise, the flop doesn't
+    capture the data and the output doesn't change. """
+    vdd = tech.spice["supply_voltage"]
+    setup = 1e-12 * tech.spice["msflop_setup"]
+    hold = 1e-12 * tech.spice["msflop_hold"]
+    clk_to_q = 1e-12 * tech.spice["msflop_delay"]
+    data_edges = [t for (t, d) in pwl_crossings(data, 0.5*vdd)]
+    events = []
+    value = 0
+    for (edge, direction) in pwl_crossings(clk, 0.5*vdd):
+        if direction != "RISE":
+            continue
+        if any(edge - setup <= t <= edge + hold for t in data_edges):
+            continue
+        captured = int(pwl_value(data, edge) > 0.5*vdd)
+        if captured != value:
+            events.append((edge + clk_to_q, ["FALL", "RISE"][captured]))
+            value = captured
+    return events
@@ -0,0 +1,211 @@
+"""
+This extracts the static noise margins of the bitcell from its
+butterfly curves: the hold SNM (wordline off), the read SNM (wordline on
+and the bitlines precharged) and the write margin (wordline on and a 0
+driven on bl into a cell storing 1).
+
+The feedback loop of the bitcell of sp_lib is opened by connecting the
+gates on each storage node to an input pin instead. With both inputs at
+the same swept voltage u, one DC sweep gives both halves of the
+butterfly: q as a function of qb=u and qb as a function of q=u. Every
+mode and supply voltage of a corner is its own copy of the open cell
+with its own supply and an input that is the normalized sweep times
+its supply, so a corner is one simulator pass. The waveforms are read
+into NumPy (see rawfile) and the margins of all of the curves are
+computed at once.
+
+The largest square between the curves is found in coordinates rotated
+by 45 degrees, where its diagonal is the largest vertical distance
+between the curves in a lobe (Seevinck). The margin of a lobe is the
+side of that square; it is negative when the curves don't enclose the
+lobe. The SNM is the smaller of the two lobes and the write margin is
+how far the curves are from enclosing the lobe of the old value.
+"""
+import math
+import numpy as np
+import globals
+import debug
+import tech
+import stimuli
+import scratch
+import simulator
+import rawfile
+import charutils as ch
+
+OPTS = globals.get_opts()
+
+# The modes of each supply voltage and the (wl, bl, br) of each as a
+# fraction of the supply
+modes = ["hold", "read", "write"]
+mode_bias = {"hold": (0, 1, 1),
+             "read": (1, 1, 1),
+             "write": (1, 0, 1)}
+
+# The number of steps of the DC sweep and of the rotated curves
+sweep_steps = 500
+
+
+def batch_interp(x, xp, fp):
+    """ Returns np.interp(x[i], xp[i], fp[i]) of every row i at once.
+    The rows of xp must be increasing. """
+    # the index of the last xp <= x in each row
+    index = (xp[:, None, :] <= x[:, :, None]).sum(axis=2) - 1
+    index = np.clip(index, 0, xp.shape[1] - 2)
+    rows = np.arange(xp.shape[0])[:, None]
+    (x0, x1) = (xp[rows, index], xp[rows, index + 1])
+    (f0, f1) = (fp[rows, index], fp[rows, index + 1])
+    ratio = np.clip((x - x0) / np.where(x1 > x0, x1 - x0, 1.0), 0.0, 1.0)
+    return f0 + ratio * (f1 - f0)
+
+
+def lobe_margins(u, q, qb, vdd):
+    """ Returns the margins (V) of the left (q high) and right (q low)
+    lobes of butterfly curves. Each row of u is the swept input and
+    q and qb are the outputs of the halves of the cell with that input
+    (q(qb=u) and qb(q=u)). vdd is the supply of each row. """
+    root2 = math.sqrt(2.0)
+    # the first curve in rotated coordinates (x=qb, y=q), increasing in s
+    s_q = (u - q) / root2
+    t_q = (u + q) / root2
+    # the second curve is decreasing in s, so it is reversed
+    s_qb = ((qb - u) / root2)[:, ::-1]
+    t_qb = ((qb + u) / root2)[:, ::-1]
+
+    s = np.linspace(-1.0, 1.0, sweep_steps + 1)[None, :] * (np.asarray(vdd)[:, None] / root2)
+    gap = batch_interp(s, s_q, t_q) - batch_interp(s, s_qb, t_qb)
+    # only where both curves are defined
+    valid = ((s >= np.maximum(s_q[:, :1], s_qb[:, :1])) &
+             (s <= np.minimum(s_q[:, -1:], s_qb[:, -1:])))
+    left = np.where(valid & (s < 0), gap, -np.inf).max(axis=1)
+    right = np.where(valid & (s > 0), -gap, -np.inf).max(axis=1)
+    # the diagonal of the square is the gap
+    return (left / root2, right / root2)
+
+
+class snm():
+    """
+    The static noise margins of a bitcell at several supply voltages of
+    (name, model files, supply voltage, temperature) corners.
+    """
+
+    def __init__(self, mod, supplies):
+        self.name = mod.name
+        self.supplies = list(supplies)
+        (pins, lines) = ch.read_subckt(mod.sp_file, mod.name)
+        (self.q, self.qb) = ch.storage_nodes(lines)
+        self.pins = pins
+        self.subckt = self.open_subckt(pins, lines)
+
+    def open_subckt(self, pins, lines):
+        """ Returns the subcircuit of the cell with the gates on q and qb
+        connected to the in_q and in_qb pins. The storage nodes are also
+        pins. """
+        open_lines = []
+        for line in lines:
+            words = line.split()
+            if words[0][0] in "mM":
+                if words[2] == self.q:
+                    words[2] = "in_q"
+                elif words[2] == self.qb:
+                    words[2] = "in_qb"
+            open_lines.append(" ".join(words))
+        open_pins = pins + ["in_q", "in_qb", self.q, self.qb]
+        return ".SUBCKT {0}_open {1}\n{2}\n.ENDS {0}_open\n".format(self.name,
+                                                                   " ".join(open_pins),
+                                                                   "\n".join(open_lines))
+
+    def curves(self):
+        """ Returns the (mode, supply index) of the curves of a corner in
+        the order of the rows of the results. """
+        return [(mode, index) for index in range(len(self.supplies)) for mode in modes]
+
+    def write_stimulus(self, temp_dir, corner):
+        """ Writes the DC sweep of every mode and supply of a corner. """
+        (name, models, voltage, temp) = corner
+        stim_file = open(temp_dir + "stim.sp", "w")
+        stim_file.write("* Butterfly curves of {0} at corner {1}\n".format(self.name, name))
+        stimuli.write_include(stim_file, models)
+        stim_file.write(self.subckt + "\n")
+        stim_file.write(".TEMP {0}\n".format(temp))
+        stim_file.write("Vsweep sweep 0 0\n")
+        save_signals = ["v(sweep)"]
+        for (index, supply) in enumerate(self.supplies):
+            stim_file.write("Vvdd{0} vdd{0} 0 {1}\n".format(index, supply))
+            stim_file.write("Ein{0} in{0} 0 sweep 0 {1}\n".format(index, supply))
+        for (mode, index) in self.curves():
+            nodes = {}
+            for (pin, level) in zip(["wl", "bl", "br"], mode_bias[mode]):
+                nodes[pin] = "vdd{0}".format(index) if level else "0"
+            nodes[tech.spice["vdd_name"]] = "vdd{0}".format(index)
+            nodes[tech.spice["gnd_name"]] = "0"
+            q = "q_{0}{1}".format(mode, index)
+            qb = "qb_{0}{1}".format(mode, index)
+            inputs = ["in{0}".format(index)] * 2
+            stim_file.write("X{0}{1} {2} {3} {4}_open\n".format(mode, index,
+                                                            " ".join(nodes[pin] for pin in self.pins),
+                                                            " ".join(inputs + [q, qb]),
+                                                            self.name))
+            save_signals.extend(["v({0})".format(q), "v({0})".format(qb)])
+        stim_file.write(".DC Vsweep 0 1 {0}\n".format(1.0 / sweep_steps))
+        stimuli.write_save(stim_file, save_signals)
+        stim_file.write(".end\n")
+        stim_file.close()
+
+    def margins(self, waveform):
+        """ Returns the hold SNM, read SNM and write margin (V) of each
+        supply from the waveforms of a corner. """
+        sweep = waveform.signal("sweep").real
+        vdd = np.array([self.supplies[index] for (mode, index) in self.curves()])
+        u = sweep[None, :] * vdd[:, None]
+        q = np.array([waveform.signal("q_{0}{1}".format(mode, index)).real for (mode, index) in self.curves()])
+        qb = np.array([waveform.signal("qb_{0}{1}".format(mode, index)).real for (mode, index) in self.curves()])
+        (left, right) = lobe_margins(u, q, qb, vdd)
+
+        table = dict((mode, []) for mode in modes)
+        for (row, (mode, index)) in enumerate(self.curves()):
+            if mode == "write":
+                # the cell stored 1, so the left lobe must be gone
+                table[mode].append(-left[row])
+            else:
+                table[mode].append(min(left[row], right[row]))
+        return table
+
+    def analyze(self, corner):
+        """ Simulates the butterfly curves of a corner and returns its
+        table: the supplies and the hold, read and write margins. """
+        debug.check(simulator.get_simulator().saves_waveforms,
+                    "The butterfly curves can't be read with {0}.".format(OPTS.spice_version))
+        with scratch.scratch_dir("snm") as job:
+            self.write_stimulus(job.path, corner)
+            stimuli.run_sim(job.path, save_waveform=True)
+            table = self.margins(rawfile.rawfile(job.path + "timing.raw"))
+        table["supply"] = self.supplies
+        debug.info(1, "Butterfly margins of {0} at corner {1}: {2}".format(self.name, corner[0], table))
+        return table
+
+
+def analyze_corners(mod, corners, supplies):
+    """ Returns the table of the margins of a bitcell at each supply of
+    each corner (see snm.analyze). The corners are simulated in
+    parallel. """
+    cell = snm(mod, supplies)
+    return ch.parallel_map(run_corner, [(cell, corner) for corner in corners])
+
+def run_corner(args):
+    """ Returns the table of a corner of analyze_corners. This is a
+    module function so it can be used by a pool. """
+    (cell, corner) = args
+    return cell.analyze(corner)
+
+def write_tables(filename, corners, tables):
+    """ Writes the margins (mV) of each corner and supply. """
+    f = open(filename, "w")
+    f.write("{0:<12} {1:>8} {2:>10} {3:>10} {4:>10}\n".format("corner", "supply", "hold_snm", "read_snm", "write_margin"))
+    for (corner, table) in zip(corners, tables):
+        for (index, supply) in enumerate(table["supply"]):
+            f.write("{0:<12} {1:>8.3f} {2:>10.1f} {3:>10.1f} {4:>10.1f}\n".format(corner[0],
+                                                                               supply,
+                                                                               1e3 * table["hold"][index],
+                                                                               1e3 * table["read"][index],
+                                                                               1e3 * table["write"][index]))
+    f.close()
@@ -11,11 +11,15 @@ import subprocess
 import os
 import sys
 import numpy as np
+import sim_cache
+import sim_session
+import simulator
 
 OPTS = globals.get_opts()
 
 vdd_voltage = tech.spice["supply_voltage"]
 gnd_voltage = tech.spice["gnd_voltage"]
+temperature = tech.spice["temp"]
 vdd_name = tech.spice["vdd_name"]
 gnd_name = tech.spice["gnd_name"]
 pmos_name = tech.spice["pmos_name"]
@@ -23,6 +27,89 @@ nmos_name = tech.spice["nmos_name"]
 tx_width = tech.spice["minwidth_tx"]
 tx_length = tech.spice["channel"]
 
+def set_corner(models, voltage, temp):
+    """Sets the device models, supply voltage and temperature (a PVT
+    corner) of the stimuli and the tech parameters that the
+    characterizers read."""
+    global vdd_voltage, temperature
+    tech.spice["fet_models"] = list(models)
+    tech.spice["supply_voltage"] = voltage
+    tech.spice["temp"] = temp
+    vdd_voltage = voltage
+    temperature = temp
+
+# The parameters of a batched stimulus (see write_batch_control). Times
+# are in ns and loads are in fF like the numeric stimulus.
+batch_params = ["stim_period", "stim_slew", "stim_load"]
+# The supply power vector that the power measures of an ngspice
+# .control block average (see gen_meas_power)
+power_vector = "supply_power"
+
+
+class param_time:
+    """
+    A time (in ns) of a batched stimulus that is a linear function of
+    the period and slew parameters: a*stim_period + b*stim_slew + c.
+    The cycle times and signal edges are computed with these instead of
+    numbers so that one deck can be simulated at several periods and
+    slews by only changing the parameters.
+    """
+
+    def __init__(self, a=0, b=0, c=0):
+        self.a = a
+        self.b = b
+        self.c = c
+
+    def __add__(self, other):
+        if isinstance(other, param_time):
+            return param_time(self.a+other.a, self.b+other.b, self.c+other.c)
+        return param_time(self.a, self.b, self.c+other)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return param_time(-self.a, -self.b, -self.c)
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __mul__(self, scale):
+        return param_time(scale*self.a, scale*self.b, scale*self.c)
+
+    __rmul__ = __mul__
+
+    def __str__(self):
+        """ override print function output """
+        terms = []
+        if self.a != 0:
+            terms.append("{0}*stim_period".format(self.a))
+        if self.b != 0:
+            terms.append("{0}*stim_slew".format(self.b))
+        if self.c != 0 or len(terms) == 0:
+            terms.append("{0}".format(self.c))
+        return "1e-9*({0})".format("+".join(terms).replace("+-", "-"))
+
+
+def param_expr(expr):
+    """ Returns a parameter expression in the syntax of the simulator. """
+    return simulator.get_simulator().param_expr(expr)
+
+def time_str(time):
+    """ Returns a time (in ns) for a stimulus. """
+    if isinstance(time, param_time):
+        return param_expr(time)
+    return "{0}n".format(time)
+
+def load_str(load):
+    """ Returns a capacitance (in fF) for a stimulus. A load of None is
+    the load parameter of a batched stimulus. """
+    if load == None:
+        return param_expr("1e-15*stim_load")
+    return "{0}f".format(load)
+
 def inst_sram(stim_file, abits, dbits, sram_name):
     """function to instatiate the sram subckt"""
     stim_file.write("Xsram ")
@@ -123,15 +210,15 @@ def inst_accesstx(stim_file, dbits):
 def gen_pulse(stim_file, sig_name, v1=gnd_voltage, v2=vdd_voltage, offset=0, period=1, t_rise=0, t_fall=0):
     """Generates a periodic signal with 50% duty cycle and slew rates. Period is measured
     from 50% to 50%."""
-    pulse_string="V{0} {0} 0 PULSE ({1} {2} {3}n {4}n {5}n {6}n {7}n)\n"
+    pulse_string="V{0} {0} 0 PULSE ({1} {2} {3} {4} {5} {6} {7})\n"
     stim_file.write(pulse_string.format(sig_name, 
                                         v1,
                                         v2,
-                                        offset,
-                                        t_rise,
-                                        t_fall, 
-                                        0.5*period-0.5*t_rise-0.5*t_fall,
-                                        period))
+                                        time_str(offset),
+                                        time_str(t_rise),
+                                        time_str(t_fall),
+                                        time_str(0.5*period-0.5*t_rise-0.5*t_fall),
+                                        time_str(period)))
 
 
 def gen_pwl(stim_file, sig_name, clk_times, data_values, period, slew, setup):
@@ -143,62 +230,75 @@ def gen_pwl(stim_file, sig_name, clk_times, data_values, period, slew, setup):
     half_slew = 0.5 * slew
     stim_file.write("V{0} {0} 0 PWL (0n {1}v ".format(sig_name, values[0]))
     for i in range(len(times)):
-        stim_file.write("{0}n {1}v {2}n {3}v ".format(times[i]-half_slew,
-                                                      values[i],
-                                                      times[i]+half_slew,
-                                                      values[i+1]))
+        stim_file.write("{0} {1}v {2} {3}v ".format(time_str(times[i]-half_slew),
+                                                    values[i],
+                                                    time_str(times[i]+half_slew),
+                                                    values[i+1]))
     stim_file.write(")\n")
 
-def gen_data(stim_file, clk_times, sig_name, period, slew):
-    """Generates the PWL data inputs for a simulation timing test."""
+def probe_values(patterns):
+    """Returns the values of a signal for a stimulus that has the seven
+    cycles between the first and last NOP of a pattern for each probe
+    (see delay.obtain_cycle_times). There is a pattern for each probe."""
+    values = patterns[0][:1]
+    for pattern in patterns:
+        values = values + pattern[1:-1]
+    return values + patterns[-1][-1:]
+
+def gen_data(stim_file, clk_times, sig_name, period, slew, probed=[True]):
+    """Generates the PWL data inputs for a simulation timing test. Probed
+    has a flag for each probe and the data is low in the cycles of the
+    probes of other data bits."""
     # values for NOP, W1, W0, W1, R0, W1, W0, R1, NOP
     # we are asserting the opposite value on the other side of the tx gate during
     # the read to be "worst case". Otherwise, it can actually assist the read.
     values = [0, 1, 0, 1, 1, 1, 0, 0, 0 ]
-    gen_pwl(stim_file, sig_name, clk_times, values, period, slew, 0.05)
+    patterns = [values if p else [0]*len(values) for p in probed]
+    gen_pwl(stim_file, sig_name, clk_times, probe_values(patterns), period, slew, 0.05)
 
 
 def gen_addr(stim_file, clk_times, addr, period, slew):
     """Generates the address inputs for a simulation timing test. 
-    One cycle is different to clear the bus
+    One cycle is different to clear the bus. The address is a string
+    or a list with the address of each probe.
     """
     
     zero_values = [0, 0, 0, 1, 0, 0, 1, 0, 0 ]
     ones_values = [1, 1, 1, 0, 1, 1, 0, 1, 1 ]
+    if isinstance(addr, basestring):
+        addr = [addr]
     
-    for i in range(len(addr)):
+    for i in range(len(addr[0])):
         sig_name = "A[{0}]".format(i)
-        if addr[i]==1:
-            gen_pwl(stim_file, sig_name, clk_times, ones_values, period, slew, 0.05)
-        else:
-            gen_pwl(stim_file, sig_name, clk_times, zero_values, period, slew, 0.05)
+        patterns = [ones_values if a[i]=="1" else zero_values for a in addr]
+        gen_pwl(stim_file, sig_name, clk_times, probe_values(patterns), period, slew, 0.05)
 
 def gen_constant(stim_file, sig_name, v_val):
     """Generates a constant signal with reference voltage and the voltage value"""
     stim_file.write("V{0} {0} 0 DC {1}\n".format(sig_name, v_val))
 
-def gen_csb(stim_file, clk_times, period, slew):
+def gen_csb(stim_file, clk_times, period, slew, num_probes=1):
     """ Generates the PWL CSb signal"""
     # values for NOP, W1, W0, W1, R0, W1, W0, R1, NOP
     values = [1, 0, 0, 0, 0, 0, 0, 0, 1]
-    gen_pwl(stim_file, "CSb", clk_times, values, period, slew, 0.05)
+    gen_pwl(stim_file, "CSb", clk_times, probe_values([values]*num_probes), period, slew, 0.05)
 
-def gen_web(stim_file, clk_times, period, slew):
+def gen_web(stim_file, clk_times, period, slew, num_probes=1):
     """ Generates the PWL WEb signal"""
     # values for NOP, W1, W0, W1, R0, W1, W0, R1, NOP
     values = [1, 0, 0, 0, 1, 0, 0, 1, 1]
-    gen_pwl(stim_file, "WEb", clk_times, values, period, slew, 0.05)
+    gen_pwl(stim_file, "WEb", clk_times, probe_values([values]*num_probes), period, slew, 0.05)
     
     values = [1, 0, 0, 0, 1, 0, 0, 1, 1]
-    gen_pwl(stim_file, "acc_en", clk_times, values, period, slew, 0)
+    gen_pwl(stim_file, "acc_en", clk_times, probe_values([values]*num_probes), period, slew, 0)
     values = [0, 1, 1, 1, 0, 1, 1, 0, 0]
-    gen_pwl(stim_file, "acc_en_inv", clk_times, values, period, slew, 0)
+    gen_pwl(stim_file, "acc_en_inv", clk_times, probe_values([values]*num_probes), period, slew, 0)
     
-def gen_oeb(stim_file, clk_times, period, slew):
+def gen_oeb(stim_file, clk_times, period, slew, num_probes=1):
     """ Generates the PWL WEb signal"""
     # values for NOP, W1, W0, W1, R0, W1, W0, R1, NOP
     values = [1, 1, 1, 1, 0, 1, 1, 0, 1]
-    gen_pwl(stim_file, "OEb", clk_times, values, period, slew, 0.05)
+    gen_pwl(stim_file, "OEb", clk_times, probe_values([values]*num_probes), period, slew, 0.05)
 
 
 
@@ -220,9 +320,12 @@ def get_inverse_value(value):
         debug.error("Invalid value to get an inverse of: {0}".format(value))
         
 
-def gen_meas_delay(stim_file, meas_name, trig_name, targ_name, trig_val, targ_val, trig_dir, targ_dir, td):
-    """Creates the .meas statement for the measurement of delay"""
-    measure_string=".meas tran {0} TRIG v({1}) VAL={2} {3}=1 TD={7}n TARG v({4}) VAL={5} {6}=1 TD={7}n\n\n"
+def gen_meas_delay(stim_file, meas_name, trig_name, targ_name, trig_val, targ_val, trig_dir, targ_dir, td, control=False):
+    """Creates the .meas statement for the measurement of delay. The
+    control version is the ngspice meas command for a .control block."""
+    measure_string="meas tran {0} TRIG v({1}) VAL={2} {3}=1 TD={7} TARG v({4}) VAL={5} {6}=1 TD={7}\n\n"
+    if not control:
+        measure_string = "." + measure_string
     stim_file.write(measure_string.format(meas_name,
                                           trig_name,
                                           trig_val,
@@ -230,34 +333,106 @@ def gen_meas_delay(stim_file, meas_name, trig_name, targ_name, trig_val, targ_va
                                           targ_name,
                                           targ_val,
                                           targ_dir,
-                                          td))
+                                          time_str(td)))
     
-def gen_meas_power(stim_file, meas_name, t_initial, t_final):
-    """Creates the .meas statement for the measurement of avg power"""
+def gen_meas_power(stim_file, meas_name, t_initial, t_final, control=False):
+    """Creates the .meas statement for the measurement of avg power. The
+    control version averages the power vector of write_batch_control."""
+    if control:
+        stim_file.write("meas tran {0} avg {1} from={2} to={3}\n".format(meas_name,
+                                                                       power_vector,
+                                                                       time_str(t_initial),
+                                                                       time_str(t_final)))
+        return
     # power mea cmd is different in different spice:
-    if OPTS.spice_version == "hspice":
-        power_exp = "power"
-    else:
-        power_exp = "par('(-1*v(" + str(vdd_name) + ")*I(v" + str(vdd_name) + "))')"
-    stim_file.write(".meas tran {0} avg {1} from={2}n to={3}n\n\n".format(meas_name,
-                                                                        power_exp,
-                                                                        t_initial,
-                                                                        t_final))
+    power_exp = simulator.get_simulator().power_expr(vdd_name)
+    stim_file.write(".meas tran {0} avg {1} from={2} to={3}\n\n".format(meas_name,
+                                                                      power_exp,
+                                                                      time_str(t_initial),
+                                                                      time_str(t_final)))
     stim_file.write("\n")
     
-def write_control(stim_file, end_time):
+def tran_step(period):
+    """Returns the largest time step (ns) of a transient simulation of a
+    clock period. The signal edges are breakpoints and the simulator
+    shortens the step where the circuit switches to bound the truncation
+    error, so a step that scales with the period only coarsens the idle
+    parts of the cycles. It is a parameter expression if the period
+    is."""
+    return period * (1.0 / OPTS.tran_steps_per_period)
+
+
+def write_control(stim_file, end_time, step=0.005, save_signals=None):
+    """Writes the transient analysis until end_time with a maximum step
+    (both in ns). The simulation stops as soon as every .meas is
+    resolved and, if save_signals are given (e.g. "v(clk)"), only those
+    are kept by the simulators that support it."""
     # UIC is needed for ngspice to converge
-    stim_file.write(".TRAN 5p {0}n UIC\n".format(end_time))
-    stim_file.write(".OPTIONS POST=1 RUNLVL=4 PROBE\n")
-    # create plots for all signals
-    stim_file.write("* probe is used for hspice\n")    
-    stim_file.write("*.probe V(*)\n")
-    stim_file.write("* plot is used for ngspice interactive mode \n")    
-    stim_file.write("*.plot V(*)\n")
+    stim_file.write(".TRAN {0} {1} UIC\n".format(time_str(step), time_str(end_time)))
+    write_options(stim_file, autostop=True)
+    write_save(stim_file, save_signals)
     # end the stimulus file
     stim_file.write(".end\n\n")
 
 
+def write_options(stim_file, autostop=False):
+    """Writes the options of the simulator if it has any"""
+    options = simulator.get_simulator().options(autostop)
+    if options != None:
+        stim_file.write(options + "\n")
+
+
+def write_save(stim_file, save_signals):
+    """Writes the statement that limits the saved signals if there are
+    any and the simulator supports it"""
+    if save_signals == None:
+        return
+    save = simulator.get_simulator().save_statement(save_signals)
+    if save != None:
+        stim_file.write(save + "\n")
+
+
+def write_params(stim_file, params):
+    """Writes the parameter values of the first point of a batched stimulus"""
+    stim_file.write(".param {0}\n\n".format(" ".join("{0}={1}".format(name, params[name])
+                                                      for name in batch_params)))
+
+
+def write_batch_control(stim_file, points, end_times, steps, write_point_measures, save_signals=None):
+    """Simulates every point (a dictionary of batch_params values) of a
+    batched stimulus in a single simulator invocation. hspice reruns the
+    deck in an .alter block per point and prints the same measure names
+    again for each one. ngspice changes the parameters with alterparam
+    in a .control block and measures each point with its own names,
+    which write_point_measures(index) writes as control commands. The
+    end times and the largest time steps of the points are in ns."""
+    write_save(stim_file, save_signals)
+    if simulator.get_simulator().batch == "alter":
+        stim_file.write(".TRAN {0}n {1}n UIC\n".format(steps[0], end_times[0]))
+        write_options(stim_file, autostop=True)
+        for i in range(1, len(points)):
+            stim_file.write(".alter point{0}\n".format(i))
+            write_params(stim_file, points[i])
+            stim_file.write(".TRAN {0}n {1}n UIC\n".format(steps[i], end_times[i]))
+    else:
+        # the measures are control commands, so there is nothing for
+        # autostop to wait for
+        write_options(stim_file)
+        stim_file.write(".control\n")
+        for i in range(len(points)):
+            for name in batch_params:
+                stim_file.write("alterparam {0}={1}\n".format(name, points[i][name]))
+            # reset re-evaluates the netlist with the new parameters
+            stim_file.write("reset\n")
+            # UIC is needed for ngspice to converge
+            stim_file.write("tran {0}n {1}n uic\n".format(steps[i], end_times[i]))
+            stim_file.write("let {0} = -1*v({1})*i(v{1})\n".format(power_vector, vdd_name))
+            write_point_measures(i)
+            stim_file.write("destroy all\n")
+        stim_file.write(".endc\n")
+    stim_file.write(".end\n\n")
+
+
 def write_include(stim_file, models):
     """Writes include statements, inputs are lists of model files"""
     for item in list(models):
@@ -270,37 +445,46 @@ def write_supply(stim_file):
     stim_file.write("V{0} {0} 0.0 {1}\n".format(gnd_name, gnd_voltage))
     # This is for the test power supply
     stim_file.write("V{0} {0} 0.0 {1}\n".format("test"+vdd_name, vdd_voltage))
-    stim_file.write("V{0} {0} 0.0 {1}\n\n".format("test"+gnd_name, gnd_voltage))
-
-
-def run_sim():
-    """Run hspice in batch mode and output rawfile to parse."""
-    temp_stim = "{0}stim.sp".format(OPTS.openram_temp)
-    
-    if OPTS.spice_version == "hspice":
-        # TODO: Should make multithreading parameter a configuration option
-        cmd = "{0} -mt 2 -i {1} -o {2}timing".format(OPTS.spice_exe,
-                                                                     temp_stim,
-                                                                     OPTS.openram_temp)
-        valid_retcode=0
+    stim_file.write("V{0} {0} 0.0 {1}\n".format("test"+gnd_name, gnd_voltage))
+    stim_file.write(".TEMP {0}\n\n".format(temperature))
+
+
+def run_sim(temp_dir=None, save_waveform=False):
+    """Runs the simulator (see simulator) on the stimulus in temp_dir and
+    writes the measures to timing.lis. The stimulus and outputs are in
+    temp_dir so that several simulations can run at the same time in
+    different directories. If save_waveform is set, ngspice also writes
+    the binary waveform to timing.raw (see rawfile). With sim_sessions,
+    ngspice runs in the persistent session of the process (see
+    sim_session) instead."""
+    if temp_dir == None:
+        temp_dir = OPTS.openram_temp
+    temp_stim = "{0}stim.sp".format(temp_dir)
+    backend = simulator.get_simulator()
+    outputs = ["{0}timing.lis".format(temp_dir)]
+    if save_waveform:
+        debug.check(backend.saves_waveforms, "Waveforms can't be saved with {0}.".format(backend.name))
+        outputs.append("{0}timing.raw".format(temp_dir))
+
+    # identical simulations (netlist, stimulus, models and simulator)
+    # are answered from the cache without running the simulator
+    use_cache = OPTS.use_sim_cache and backend.cache_results
+    if use_cache:
+        cache_key = sim_cache.get_key(temp_stim)
+        if all(sim_cache.fetch(cache_key, output) for output in outputs):
+            return
+
+    if sim_session.use_sessions():
+        if save_waveform:
+            raw_name = outputs[1]
+        else:
+            raw_name = None
+        sim_session.get_session().run(temp_stim, outputs[0], raw_name)
     else:
-        cmd = "{0} -b -o {2}timing.lis {1}".format(OPTS.spice_exe,
-                                                        temp_stim,
-                                                        OPTS.openram_temp)
-        # for some reason, ngspice-25 returns 1 when it only has acceptable warnings
-        valid_retcode=1
+        backend.run(temp_stim, temp_dir, save_waveform)
 
-        
-    spice_stdout = open("{0}spice_stdout.log".format(OPTS.openram_temp), 'w')
-    spice_stderr = open("{0}spice_stderr.log".format(OPTS.openram_temp), 'w')
-
-    debug.info(3, cmd)
-    retcode = subprocess.call(cmd, stdout=spice_stdout, stderr=spice_stderr, shell=True)
-
-    spice_stdout.close()
-    spice_stderr.close()
-    
-    if (retcode > valid_retcode):
-        debug.error("Spice simulation error: " + cmd, -1)
+    if use_cache:
+        for output in outputs:
+            sim_cache.store(cache_key, output)
 
     
@@ -0,0 +1,113 @@
+"""
+Fills characterization tables from a few simulations. A small design of
+experiments (the corners and the center of the table) is simulated and
+a model that is quadratic in the first index (the input slew) and
+linear in the second (the load) is fitted to it by least squares. The
+fit is checked against simulations of points that it was not fitted to
+(held out) and, when the error is over the tolerance, those points are
+added to the fit and new ones are held out until the error is small
+enough or every point has been simulated.
+"""
+import numpy as np
+import debug
+
+
+def basis(x1, x2):
+    """ Returns the basis functions of the model at the points (x1, x2):
+    1, x1, x1^2, x2 and x1*x2. """
+    x1 = np.asarray(x1, dtype=float)
+    x2 = np.asarray(x2, dtype=float)
+    return np.column_stack([np.ones(len(x1)), x1, x1*x1, x2, x1*x2])
+
+
+def fit(x1, x2, values):
+    """ Returns the least squares coefficients of the model for each
+    column of values. """
+    (coeffs, residuals, rank, sv) = np.linalg.lstsq(basis(x1, x2), np.asarray(values, dtype=float), rcond=None)
+    return coeffs
+
+
+def predict(coeffs, x1, x2):
+    """ Returns the model values at the points (x1, x2). """
+    return np.dot(basis(x1, x2), coeffs)
+
+
+def design_points(rows, cols):
+    """ Returns the (row, col) indices of the initial design of
+    experiments: the four corners and the center of the table. """
+    points = [(0, 0), (0, cols-1), (rows-1, 0), (rows-1, cols-1), (rows//2, cols//2)]
+    # remove duplicates of small tables in order
+    return sorted(set(points), key=points.index)
+
+
+def holdout_points(rows, cols, sampled, count):
+    """ Returns up to count unsampled (row, col) indices, each the
+    farthest from the sampled points and the ones already chosen. """
+    chosen = []
+    for i in range(count):
+        best = None
+        best_distance = -1
+        for row in range(rows):
+            for col in range(cols):
+                point = (row, col)
+                if point in sampled or point in chosen:
+                    continue
+                # distances are relative to the table size
+                distance = min(((row - r) / float(rows))**2 + ((col - c) / float(cols))**2
+                               for (r, c) in sampled + chosen)
+                if distance > best_distance:
+                    best = point
+                    best_distance = distance
+        if best == None:
+            break
+        chosen.append(best)
+    return chosen
+
+
+def fit_error(x1, x2, values, train, test):
+    """ Returns the largest relative error of a fit to the train points
+    at the test points. Values near zero (e.g. hold times) are compared
+    to a tenth of the largest magnitude instead. """
+    coeffs = fit(x1[train], x2[train], values[train])
+    error = np.abs(predict(coeffs, x1[test], x2[test]) - values[test])
+    scale = np.maximum(np.abs(values[test]), 0.1*np.max(np.abs(values), axis=0))
+    return np.max(error / np.maximum(scale, 1e-30))
+
+
+def fill_table(evaluate, index1, index2, tolerance, holdout=2):
+    """ Returns the values of every (index1[i], index2[j]) point of a
+    table in row major order. evaluate(points) takes a list of (i, j)
+    indices and returns a tuple of values (e.g. a delay and a slew) for
+    each one. Only a few points are simulated with evaluate and the rest
+    are filled from the fitted model. The simulated points keep their
+    simulated values. """
+    rows = len(index1)
+    cols = len(index2)
+    sampled = design_points(rows, cols)
+    values = list(evaluate(sampled))
+
+    while True:
+        test = holdout_points(rows, cols, sampled, holdout)
+        if len(test) == 0:
+            debug.info(1, "Simulated every point of the table")
+            break
+        values += list(evaluate(test))
+        points = sampled + test
+        x1 = np.array([index1[i] for (i, j) in points], dtype=float)
+        x2 = np.array([index2[j] for (i, j) in points], dtype=float)
+        error = fit_error(x1, x2, np.array(values, dtype=float),
+                          range(len(sampled)), range(len(sampled), len(points)))
+        sampled = points
+        debug.info(1, "Table fit error {0:.2%} with {1} points".format(error, len(sampled)))
+        if error <= tolerance:
+            break
+
+    x1 = np.array([index1[i] for (i, j) in sampled], dtype=float)
+    x2 = np.array([index2[j] for (i, j) in sampled], dtype=float)
+    coeffs = fit(x1, x2, np.array(values, dtype=float))
+    grid1 = np.repeat(np.asarray(index1, dtype=float), cols)
+    grid2 = np.tile(np.asarray(index2, dtype=float), rows)
+    table = [tuple(float(x) for x in v) for v in predict(coeffs, grid1, grid2)]
+    for (point, value) in zip(sampled, values):
+        table[point[0]*cols + point[1]] = tuple(value)
+    return table
@@ -0,0 +1,77 @@
+import getpass
+import globals
+import debug
+from tech import spice
+
+OPTS = globals.get_opts()
+
+# The trimmed netlists written by this process (and inherited by the
+# worker processes that it forks) keyed by SRAM name and probe.
+trimmed_netlists = {}
+
+class trim_spice():
+    """
+    Writes a reduced spice netlist of an SRAM for characterizing a probe
+    address and data bit. The decoder, wordline drivers, column
+    circuitry and control logic are kept but the bitcell array only has
+    the cells on the probed row and the probed columns. The other cells
+    are replaced by lumped RC loads on their wordlines and bitlines (see
+    bitcell_array.sp_write_reduced). This is a simulation netlist only;
+    the layout and the full netlist are not changed.
+    """
+
+    def __init__(self, sram):
+        self.sram = sram
+        self.bank = sram.bank
+
+    def probe_row(self, probe_address):
+        """ Returns the bitcell row selected by a probe address string
+        where probe_address[i] is the value of ADDR[i]. """
+        row_address = [int(bit) for bit in probe_address[0:self.bank.row_addr_size]]
+        return self.bank.decoder.row_index(row_address)
+
+    def probe_columns(self, probe_data):
+        """ Returns the bitcell columns that the column mux selects from
+        for a data bit. All of them are kept so that the probed column
+        is in the netlist whatever the column address is. """
+        first = probe_data * self.bank.words_per_row
+        return range(first, first + self.bank.words_per_row)
+
+    def write(self, sp_name, probe_address, probe_data):
+        """ Writes the reduced netlist of the SRAM to a file. """
+        self.write_probes(sp_name, [(probe_address, probe_data)])
+
+    def write_probes(self, sp_name, probes):
+        """ Writes the reduced netlist of the SRAM that keeps the rows and
+        columns of a list of (address, data bit) probes to a file. The
+        banks are the same module, so they keep the same cells. """
+        rows = sorted(set(self.probe_row(address) for (address, data) in probes))
+        cols = sorted(set(col for (address, data) in probes for col in self.probe_columns(data)))
+        debug.info(1, "Trimming bitcell array to row {0} and columns {1}".format(rows, cols))
+
+        sp = open(sp_name, 'w')
+        sp.write("* OpenRAM generated memory (trimmed for characterization).\n")
+        sp.write("* User: {0}\n".format(getpass.getuser()))
+        sp.write(".global {0} {1}\n".format(spice["vdd_name"],
+                                            spice["gnd_name"]))
+        # the reduced array subcircuit replaces the full one which is
+        # skipped when the rest of the hierarchy is written
+        array = self.bank.bitcell_array
+        usedMODS = set([array.name])
+        array.sp_write_reduced(sp, usedMODS, rows, cols)
+        self.sram.sp_write_file(sp, usedMODS)
+        del usedMODS
+        sp.close()
+
+
+def trimmed_netlist(sram, probes):
+    """ Returns the name of the trimmed netlist of an SRAM for a list of
+    (address, data bit) probes. It is only written the first time so
+    that it is shared by every corner that is characterized. """
+    key = (sram.name,) + tuple(probes)
+    if key not in trimmed_netlists:
+        probe_names = ["{0}_{1}".format(address, data) for (address, data) in probes]
+        sp_name = OPTS.openram_temp + "{0}_trimmed_{1}.sp".format(sram.name, "_".join(probe_names))
+        trim_spice(sram).write_probes(sp_name, probes)
+        trimmed_netlists[key] = sp_name
+    return trimmed_netlists[key]
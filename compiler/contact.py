@@ -38,8 +38,9 @@ class contact(design.design):
         self.offset_attributes(coordinate)
         self.translate(coordinate)
 
-        self.height = max(obj.offset.y + obj.height for obj in self.objs)
-        self.width = max(obj.offset.x + obj.width for obj in self.objs)
+        (ll, ur) = self.shapes.bbox()
+        self.height = ur.y
+        self.width = ur.x
 
     def setup_layers(self):
         (first_layer, via_layer, second_layer) = self.layer_stack
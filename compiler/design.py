@@ -2,6 +2,7 @@ import hierarchy_layout
 import hierarchy_spice
 import globals
 import calibre
+import scratch
 import debug
 import os
 
@@ -13,7 +14,8 @@ class design(hierarchy_spice.spice, hierarchy_layout.layout):
     Design Class for all modules to inherit the base features.
     Class consisting of a set of modules and instances of these modules
     """
-    name_map = []
+    # the class of each module name
+    name_map = {}
     
 
     def __init__(self, name):
@@ -24,27 +26,20 @@ class design(hierarchy_spice.spice, hierarchy_layout.layout):
         hierarchy_layout.layout.__init__(self, name)
         hierarchy_spice.spice.__init__(self, name)
         
-        # Check if the name already exists, if so, give an error
-        # because each reference must be a unique name.
-        ok_list = ['ms_flop.ms_flop', 'bitcell.bitcell', 'contact.contact',
-                   'ptx.ptx', 'sram.sram',
-                   'hierarchical_predecode2x4.hierarchical_predecode2x4',
-                   'hierarchical_predecode3x8.hierarchical_predecode3x8']
-        if name not in design.name_map:
-            design.name_map.append(name)
-        elif str(self.__class__) in ok_list:
-            pass
-        else:
+        # Check if the name already exists for a different class, if so,
+        # give an error because each reference must be a unique name.
+        # Modules of the same class with the same name (parametric
+        # modules built outside of the factory and library cells) are
+        # the same structure.
+        class_name = str(self.__class__)
+        if design.name_map.setdefault(name, class_name) != class_name:
             debug.error("Duplicate layout reference name {0} of class {1}. GDS2 requires names be unique.".format(name,self.__class__),-1)
         
     def get_layout_pins(self,inst):
         """ Return a map of pin locations of the instance offset """
         # find the instance
-        for i in self.insts:
-            if i.name == inst.name:
-                break
-        else:
-            debug.error("Couldn't find instance {0}".format(inst_name),-1)
+        if inst.name not in self.inst_map:
+            debug.error("Couldn't find instance {0}".format(inst.name),-1)
         inst_map = inst.mod.pin_map
         return inst_map
         
@@ -52,33 +47,31 @@ class design(hierarchy_spice.spice, hierarchy_layout.layout):
     def DRC_LVS(self):
         """Checks both DRC and LVS for a module"""
         if OPTS.check_lvsdrc:
-            tempspice = OPTS.openram_temp + "/temp.sp"
-            tempgds = OPTS.openram_temp + "/temp.gds"
-            self.sp_write(tempspice)
-            self.gds_write(tempgds)
-            debug.check(calibre.run_drc(self.name, tempgds) == 0,"DRC failed for {0}".format(self.name))
-            debug.check(calibre.run_lvs(self.name, tempgds, tempspice) == 0,"LVS failed for {0}".format(self.name))
-            os.remove(tempspice)
-            os.remove(tempgds)
+            with scratch.scratch_dir("drc_lvs") as job:
+                tempspice = job.path + "temp.sp"
+                tempgds = job.path + "temp.gds"
+                self.sp_write(tempspice)
+                self.gds_write(tempgds)
+                debug.check(calibre.run_drc(self.name, tempgds) == 0,"DRC failed for {0}".format(self.name))
+                debug.check(calibre.run_lvs(self.name, tempgds, tempspice) == 0,"LVS failed for {0}".format(self.name))
 
     def DRC(self):
         """Checks DRC for a module"""
         if OPTS.check_lvsdrc:
-            tempgds = OPTS.openram_temp + "/temp.gds"
-            self.gds_write(tempgds)
-            debug.check(calibre.run_drc(self.name, tempgds) == 0,"DRC failed for {0}".format(self.name))
-            os.remove(tempgds)
+            with scratch.scratch_dir("drc") as job:
+                tempgds = job.path + "temp.gds"
+                self.gds_write(tempgds)
+                debug.check(calibre.run_drc(self.name, tempgds) == 0,"DRC failed for {0}".format(self.name))
 
     def LVS(self):
         """Checks LVS for a module"""
         if OPTS.check_lvsdrc:
-            tempspice = OPTS.openram_temp + "/temp.sp"
-            tempgds = OPTS.openram_temp + "/temp.gds"
-            self.sp_write(tempspice)
-            self.gds_write(tempgds)
-            debug.check(calibre.run_lvs(self.name, tempgds, tempspice) == 0,"LVS failed for {0}".format(self.name))
-            os.remove(tempspice)
-            os.remove(tempgds)
+            with scratch.scratch_dir("lvs") as job:
+                tempspice = job.path + "temp.sp"
+                tempgds = job.path + "temp.gds"
+                self.sp_write(tempspice)
+                self.gds_write(tempgds)
+                debug.check(calibre.run_lvs(self.name, tempgds, tempspice) == 0,"LVS failed for {0}".format(self.name))
 
     def __str__(self):
         """ override print function output """
@@ -87,8 +80,8 @@ class design(hierarchy_spice.spice, hierarchy_layout.layout):
     def __repr__(self):
         """ override print function output """
         text="( design: " + self.name + " pins=" + str(self.pins) + " " + str(self.width) + "x" + str(self.height) + " )\n"
-        for i in self.objs:
-            text+=str(i)+",\n"
+        for i in self.shapes.descriptions():
+            text+=i+",\n"
         for i in self.insts:
             text+=str(i)+",\n"
         return text
@@ -7,6 +7,11 @@ tech_name = "freepdk45"
 output_path = "/tmp/mysram"
 output_name = "sram_2_16_1_freepdk45"
 
+# Optional PVT corners to characterize with one .lib each:
+# (name, spice model files, supply voltage, temperature in C)
+#corners = [("TT", ["/path/to/models/NMOS_VTG.inc", "/path/to/models/PMOS_VTG.inc"], 1.0, 25),
+#           ("SS", ["/path/to/models/NMOS_VTG_ss.inc", "/path/to/models/PMOS_VTG_ss.inc"], 0.9, 125)]
+
 decoder = "hierarchical_decoder"
 ms_flop = "ms_flop"
 ms_flop_array = "ms_flop_array"
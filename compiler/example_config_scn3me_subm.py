@@ -7,6 +7,11 @@ tech_name = "scn3me_subm"
 output_path = "/tmp/mysram"
 output_name = "sram_2_16_1_scn3me_subm"
 
+# Optional PVT corners to characterize with one .lib each:
+# (name, spice model files, supply voltage, temperature in C)
+#corners = [("TT", ["/path/to/models/on_c5n.sp"], 5.0, 25),
+#           ("SS", ["/path/to/models/on_c5n_ss.sp"], 4.5, 125)]
+
 decoder = "hierarchical_decoder"
 ms_flop = "ms_flop"
 ms_flop_array = "ms_flop_array"
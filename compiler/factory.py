@@ -0,0 +1,67 @@
+"""
+This is a cache of the parametric modules (contacts, transistors, gates
+and library cells). A module is built the first time it is asked for
+with a set of constructor arguments in a technology and the same design
+instance is returned every time after that, so a decoder with thousands
+of vias has one metal1_via1_metal2_1x1 module instead of thousands.
+
+Modules are created with
+
+    via = factory.create(contact.contact, layer_stack=("metal1", "via1", "metal2"))
+
+instead of calling the class. The arguments are matched to the
+parameters of the constructor (with its defaults) before the lookup, so
+positional and keyword arguments and omitted defaults give the same
+module. A shared module must not be changed after it is built; a user
+that needs a different module must ask for it with different
+arguments.
+"""
+import inspect
+import globals
+import debug
+
+OPTS = globals.get_opts()
+
+# The built modules keyed by class, constructor arguments and technology
+modules = {}
+
+
+def freeze(value):
+    """ Returns a hashable copy of an argument value. """
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(x) for x in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for (k, v) in value.items()))
+    return value
+
+
+def module_key(module_class, args, kwargs):
+    """ Returns the cache key of a module. The class is identified by its
+    module and name because the configurable classes are reloaded. """
+    init = getattr(module_class.__init__, "__func__", module_class.__init__)
+    # the self argument is never used
+    params = inspect.getcallargs(init, None, *args, **kwargs)
+    params.pop(inspect.getargspec(init).args[0])
+    class_name = "{0}.{1}".format(module_class.__module__, module_class.__name__)
+    key = (class_name, freeze(params), OPTS.tech_name)
+    try:
+        hash(key)
+    except TypeError:
+        debug.error("The arguments of {0} can't be cached: {1}".format(class_name, params), -1)
+    return key
+
+
+def create(module_class, *args, **kwargs):
+    """ Returns the module of a class built with the arguments, building
+    it only if it hasn't been built before. """
+    key = module_key(module_class, args, kwargs)
+    if key not in modules:
+        modules[key] = module_class(*args, **kwargs)
+    else:
+        debug.info(4, "reusing module {0}".format(modules[key].name))
+    return modules[key]
+
+
+def reset():
+    """ Forgets every module, e.g. between unit tests. """
+    modules.clear()
@@ -341,8 +341,8 @@ class Gds2reader:
                 if(self.debugToTerminal==1):
                     print "\t\tPLEX: "+str(plex)
             elif(idBits==('\x12','\x06')):  #Reference Name
-                aName = record[2::]
-                thisAref.aName=aName
+                aName = self.stripNonASCII(record[2::])
+                thisAref.aName=aName.rstrip()
                 if(self.debugToTerminal==1):
                     print "\t\tReference Name:"+aName
             elif(idBits==('\x1A','\x01')):  #Transformation
@@ -365,17 +365,22 @@ class Gds2reader:
                 thisAref.rotateAngle=rotateAngle                
                 if(self.debugToTerminal==1):
                     print "\t\t\tRotate Angle (CCW):"+str(rotateAngle)
+            elif(idBits==('\x13','\x02')):  #Columns and Rows
+                (columns,rows) = struct.unpack(">hh",record[2]+record[3]+record[4]+record[5])
+                thisAref.columns=columns
+                thisAref.rows=rows
+                if(self.debugToTerminal==1):
+                    print "\t\t\tColumns: "+str(columns)+" Rows: "+str(rows)
             elif(idBits==('\x10','\x03')):  #XY Data Points
-                index=2
-                topLeftX=struct.unpack(">i",record[index]+record[index+1]+record[index+2]+record[index+3])[0]
-                topLeftY=struct.unpack(">i",record[index+4]+record[index+5]+record[index+6]+record[index+7])[0]
-                rightMostX=struct.unpack(">i",record[index+8]+record[index+9]+record[index+10]+record[index+11])[0]
-                bottomMostY=struct.unpack(">i",record[index+12]+record[index+13]+record[index+14]+record[index+15])[0]
-                thisAref.coordinates=[(topLeftX,topLeftY),(rightMostX,topLeftY),(topLeftX,bottomMostY)]
-                if(self.debugToTerminal==1):
-                    print "\t\t\tTop Left Point: "+str(topLeftX)+","+str(topLeftY)
-                    print "\t\t\t\tArray Width: "+str(rightMostX-topLeftX)
-                    print "\t\t\t\tArray Height: "+str(topLeftY-bottomMostY)
+                #the origin, the origin displaced by all of the columns and by all of the rows
+                coordinates = struct.unpack(">6i",record[2:26])
+                thisAref.coordinates=[(coordinates[0],coordinates[1]),
+                                      (coordinates[2],coordinates[3]),
+                                      (coordinates[4],coordinates[5])]
+                if(self.debugToTerminal==1):
+                    print "\t\t\tOrigin: "+str(thisAref.coordinates[0])
+                    print "\t\t\t\tColumn Displacement: "+str(thisAref.coordinates[1])
+                    print "\t\t\t\tRow Displacement: "+str(thisAref.coordinates[2])
             elif(idBits==('\x11','\x00')):  #End Of Element
                 break;
         return thisAref
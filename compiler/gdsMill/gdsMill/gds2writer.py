@@ -314,12 +314,15 @@ class Gds2writer:
         if(thisAref.aName):
             idBits='\x12\x06'
             aName = thisAref.aName
+            if(len(aName)%2 == 1):
+                #pad with a zero
+                aName = aName + '\x00'
             self.writeRecord(idBits+aName)
         if(thisAref.transFlags):
             idBits='\x1A\x01'
             mirrorFlag = int(thisAref.transFlags[0])<<15
             rotateFlag = int(thisAref.transFlags[1])<<1
-            magnifyFlag = int(thisAref.transFlags[0])<<3
+            magnifyFlag = int(thisAref.transFlags[2])<<3
             transFlags = struct.pack(">H",mirrorFlag|rotateFlag|magnifyFlag)
             self.writeRecord(idBits+transFlags)
         if(thisAref.magFactor):
@@ -330,6 +333,9 @@ class Gds2writer:
             idBits='\x1C\x05'            
             rotateAngle=self.ibmDataFromIeeeDouble(thisAref.rotateAngle)
             self.writeRecord(idBits+rotateAngle)
+        idBits='\x13\x02' #COLROW
+        colRow = struct.pack(">hh",thisAref.columns,thisAref.rows)
+        self.writeRecord(idBits+colRow)
         if(thisAref.coordinates):
             idBits='\x10\x03' #XY Data Points
             coordinateRecord = idBits
@@ -15,6 +15,14 @@ class GdsStructure:
         self.nodes=[]
         self.boxes=[]
 
+    def references(self):
+        """Returns the srefs followed by one sref for each element of the arefs"""
+        for sref in self.srefs:
+            yield sref
+        for aref in self.arefs:
+            for sref in aref.srefs():
+                yield sref
+
 class GdsBoundary:
     """Class represent a GDS Boundary Object"""
     def __init__(self):
@@ -132,8 +140,31 @@ class GdsAref:
         self.transFlags=(False,False,False)
         self.magFactor=""
         self.rotateAngle=""
+        self.columns=1
+        self.rows=1
+        #the origin, the origin displaced by all of the columns and the origin displaced by all of the rows
         self.coordinates=""
 
+    def srefs(self):
+        """Returns the sref of each element, row by row"""
+        (origin,columnEnd,rowEnd) = self.coordinates
+        columnStep = ((columnEnd[0]-origin[0])/self.columns,(columnEnd[1]-origin[1])/self.columns)
+        rowStep = ((rowEnd[0]-origin[0])/self.rows,(rowEnd[1]-origin[1])/self.rows)
+        srefs = []
+        for row in range(self.rows):
+            for column in range(self.columns):
+                sref = GdsSref()
+                sref.elementFlags = self.elementFlags
+                sref.plex = self.plex
+                sref.sName = self.aName
+                sref.transFlags = self.transFlags
+                sref.magFactor = self.magFactor
+                sref.rotateAngle = self.rotateAngle
+                sref.coordinates = (origin[0]+column*columnStep[0]+row*rowStep[0],
+                                    origin[1]+column*columnStep[1]+row*rowStep[1])
+                srefs.append(sref)
+        return srefs
+
 class GdsText:
     """Class represent a GDS text Object"""
     def __init__(self):
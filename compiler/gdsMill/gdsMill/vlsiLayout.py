@@ -148,6 +148,9 @@ class VlsiLayout:
                 for sref in self.structures[name].srefs: #go through each reference
                     if sref.sName in structureNames: #and compare to our list
                         structureNames.remove(sref.sName)
+            for aref in self.structures[name].arefs: #and each array reference
+                if aref.aName in structureNames:
+                    structureNames.remove(aref.aName)
         
         self.rootStructureName = structureNames[0]
 
@@ -184,10 +187,12 @@ class VlsiLayout:
             delegateFunction(startingStructureName, transformPath)
         #starting with a particular structure, we will recursively traverse the tree
         #********might have to set the recursion level deeper for big layouts!
-        if(len(self.structures[startingStructureName].srefs)>0): #does this structure reference any others?
+        #the elements of arrays are traversed like srefs
+        if(len(self.structures[startingStructureName].srefs)>0 or
+           len(self.structures[startingStructureName].arefs)>0): #does this structure reference any others?
             #if so, go through each and call this function again
             #if not, return back to the caller (caller can be this function)            
-            for sref in self.structures[startingStructureName].srefs:
+            for sref in self.structures[startingStructureName].references():
                 #here, we are going to modify the sref coordinates based on the parent objects rotation                
 #                if (sref.sName.count("via") == 0): 
                 self.traverseTheHierarchy(startingStructureName = sref.sName,                                    
@@ -198,7 +203,6 @@ class VlsiLayout:
                                           coordinates = sref.coordinates)
 #            else:
 #                print "WARNING: via encountered, ignoring:", sref.sName
-            #MUST HANDLE AREFs HERE AS WELL
         #when we return, drop the last transform from the transformPath
         del transformPath[-1]
         return
@@ -347,6 +351,42 @@ class VlsiLayout:
 
         #add the sref to the root structure
         self.structures[self.rootStructureName].srefs+=[layoutToAddSref]        
+
+    def addArray(self,layoutToAdd,offsetInMicrons=(0,0),columns=1,rows=1,pitchInMicrons=(0,0),mirror=None):
+        """
+        Method to insert a columns x rows array of one layout into another.
+        The array starts at the offset and the columns and rows are spaced
+        by the x and y of the pitch. Every element has the same mirror.
+        """
+        offsetInLayoutUnits = (self.userUnits(offsetInMicrons[0]),self.userUnits(offsetInMicrons[1]))
+        pitchInLayoutUnits = (self.userUnits(pitchInMicrons[0]),self.userUnits(pitchInMicrons[1]))
+
+        if layoutToAdd != self:
+            #combine the structure dictionaries and layers like addInstance
+            for structure in layoutToAdd.structures:
+                if structure not in self.structures:
+                    self.structures[structure]=layoutToAdd.structures[structure]
+            for layerNumber in layoutToAdd.layerNumbersInUse:
+                if layerNumber not in self.layerNumbersInUse:
+                    self.layerNumbersInUse += [layerNumber]
+
+        layoutToAddAref = GdsAref()
+        layoutToAddAref.aName = layoutToAdd.rootStructureName
+        layoutToAddAref.columns = columns
+        layoutToAddAref.rows = rows
+        layoutToAddAref.coordinates = [offsetInLayoutUnits,
+                                       (offsetInLayoutUnits[0]+columns*pitchInLayoutUnits[0],offsetInLayoutUnits[1]),
+                                       (offsetInLayoutUnits[0],offsetInLayoutUnits[1]+rows*pitchInLayoutUnits[1])]
+        if mirror == "x" or mirror == "MX":
+            layoutToAddAref.transFlags = (True,False,False)
+        if mirror == "y" or mirror == "MY":
+            layoutToAddAref.transFlags = (True,False,False)
+            layoutToAddAref.rotateAngle = 180.0
+        if mirror == "xy" or mirror == "XY":
+            layoutToAddAref.rotateAngle = 180.0
+
+        #add the aref to the root structure
+        self.structures[self.rootStructureName].arefs+=[layoutToAddAref]
         
     def addBox(self,layerNumber=0, purposeNumber=None, offsetInMicrons=(0,0), width=1.0, height=1.0,center=False):
         """
@@ -383,6 +423,20 @@ class VlsiLayout:
         #add the sref to the root structure
         self.structures[self.rootStructureName].boundaries+=[boundaryToAdd]
     
+    def addBoxes(self, layerNumbers, coordinates, purposeNumber=None):
+        """
+        Method to add many boxes to a layout given the closed polygon
+        of each one in layout units
+        """
+        boundaries = self.structures[self.rootStructureName].boundaries
+        for (layerNumber, boxCoordinates) in zip(layerNumbers, coordinates):
+            boundaryToAdd = GdsBoundary()
+            boundaryToAdd.drawingLayer = layerNumber
+            boundaryToAdd.dataType = 0
+            boundaryToAdd.coordinates = boxCoordinates
+            boundaryToAdd.purposeLayer = purposeNumber
+            boundaries.append(boundaryToAdd)
+
     def addPath(self, layerNumber=0, purposeNumber = None, coordinates=[(0,0)], width=1.0):
         """
         Method to add a path to a layout
@@ -2,6 +2,7 @@
 This provides a set of useful generic types for the gdsMill interface. 
 """
 import debug
+import gdsMill
 from vector import vector
 from tech import GDS
 
@@ -61,6 +62,106 @@ class instance(geometry):
         """ override print function output """
         return "( inst: " + self.name + " @" + str(self.offset) + " mod=" + self.mod.name + " " + self.mirror + " R=" + str(self.rotate) + ")"
 
+class instance_array(geometry):
+    """
+    A cols x rows array of instances of a module. The instance in a
+    row and column is at offset + (col*pitch.x, row*pitch.y). With
+    mirror_rows (mirror_cols) the odd rows (columns) are mirrored in x
+    (y) and moved up (right) by the module height (width) so that they
+    abut. The name is formatted with the row and col of each instance.
+    It is written as a GDS array reference of the module or, when rows
+    or columns are mirrored, of a unit of two of them, plus instances
+    for an odd row or column that is left over.
+    """
+    def __init__(self, name, mod, offset, cols, rows, pitch, mirror_rows=False, mirror_cols=False):
+        """Initializes an array of instances of a module"""
+        geometry.__init__(self)
+        self.name = name
+        self.mod = mod
+        self.gds = mod.gds
+        self.offset = vector(offset).snap_to_grid()
+        self.cols = cols
+        self.rows = rows
+        self.pitch = vector(pitch).snap_to_grid()
+        self.mirror_rows = mirror_rows
+        self.mirror_cols = mirror_cols
+        # the mirrored neighbours of a unit can only be named by the module
+        if mirror_rows:
+            debug.check(abs(self.pitch.y - mod.height) < 1e-6,
+                        "Mirrored rows of {0} must abut.".format(mod.name))
+        if mirror_cols:
+            debug.check(abs(self.pitch.x - mod.width) < 1e-6,
+                        "Mirrored columns of {0} must abut.".format(mod.name))
+
+        debug.info(3, "creating instance array: {0} {1}x{2}".format(self.name, rows, cols))
+
+    def instances(self):
+        """Returns the (name, row, col) of each instance, column by column"""
+        for col in range(self.cols):
+            for row in range(self.rows):
+                yield (self.name.format(row=row, col=col), row, col)
+
+    def placement(self, row, col):
+        """Returns the offset and mirror of the instance in a row and column"""
+        mirror_x = self.mirror_rows and row % 2 == 1
+        mirror_y = self.mirror_cols and col % 2 == 1
+        offset = self.offset + vector(col * self.pitch.x + mirror_y * self.mod.width,
+                                      row * self.pitch.y + mirror_x * self.mod.height)
+        mirror = {(False, False): "R0",
+                  (True, False): "MX",
+                  (False, True): "MY",
+                  (True, True): "XY"}[(mirror_x, mirror_y)]
+        return (offset, mirror)
+
+    def unit_layout(self, unit_cols, unit_rows):
+        """Returns a layout of the unit_cols x unit_rows instances of the
+        first rows and columns of the array"""
+        unit = gdsMill.VlsiLayout(name="{0}_{1}x{2}".format(self.mod.name, unit_rows, unit_cols),
+                                  units=GDS["unit"])
+        for row in range(unit_rows):
+            for col in range(unit_cols):
+                (offset, mirror) = self.placement(row, col)
+                unit.addInstance(self.gds,
+                                 offsetInMicrons=offset - self.offset,
+                                 mirror=mirror,
+                                 rotate=0)
+        return unit
+
+    def gds_write_file(self, newLayout):
+        """Recursively writes the module and the array of it"""
+        debug.info(3, "writing instance array: " + self.name)
+        self.mod.gds_write_file(self.gds)
+        unit_cols = 2 if self.mirror_cols else 1
+        unit_rows = 2 if self.mirror_rows else 1
+        (cols, rows) = (self.cols // unit_cols * unit_cols, self.rows // unit_rows * unit_rows)
+        if cols > 0 and rows > 0:
+            if unit_cols * unit_rows == 1:
+                unit = self.gds
+            else:
+                unit = self.unit_layout(unit_cols, unit_rows)
+            newLayout.addArray(unit,
+                               offsetInMicrons=self.offset,
+                               columns=cols // unit_cols,
+                               rows=rows // unit_rows,
+                               pitchInMicrons=self.pitch.scale(unit_cols, unit_rows))
+        # the left over row and column
+        left_over = [(row, col) for row in range(rows, self.rows) for col in range(self.cols)]
+        left_over += [(row, col) for row in range(rows) for col in range(cols, self.cols)]
+        for (row, col) in left_over:
+            (offset, mirror) = self.placement(row, col)
+            newLayout.addInstance(self.gds,
+                                  offsetInMicrons=offset,
+                                  mirror=mirror,
+                                  rotate=0)
+
+    def __str__(self):
+        """ override print function output """
+        return "inst array: " + self.name + " mod=" + self.mod.name
+
+    def __repr__(self):
+        """ override print function output """
+        return "( inst array: " + self.name + " @" + str(self.offset) + " " + str(self.rows) + "x" + str(self.cols) + " mod=" + self.mod.name + " )"
+
 class path(geometry):
     """Represents a Path"""
 
@@ -92,78 +193,3 @@ class path(geometry):
     def __repr__(self):
         """ override print function output """
         return "( path: layer=" + self.layerNumber + " w=" + self.width + " coords=" + str(self.coordinates) + " )"
-
-
-class label(geometry):
-    """Represents a text label"""
-
-    def __init__(self, text, layerNumber, offset, zoom=-1):
-        """Initializes a text label for specified layer"""
-        geometry.__init__(self)
-        self.name = "label"
-        self.text = text
-        self.layerNumber = layerNumber
-        self.offset = vector(offset).snap_to_grid()
-        if zoom<0:
-            self.zoom = GDS["zoom"]
-        else:
-            self.zoom = zoom
-
-
-        self.size = 0
-
-        debug.info(3,"creating label " + self.text + " " + str(self.layerNumber) + " " + str(self.offset))
-
-    def gds_write_file(self, newLayout):
-        """Writes the text label to GDS"""
-        debug.info(3, "writing label (" + str(self.layerNumber) + "): " + self.text)
-        newLayout.addText(text=self.text,
-                          layerNumber=self.layerNumber,
-                          purposeNumber=0,
-                          offsetInMicrons=self.offset,
-                          magnification=self.zoom,
-                          rotate=None)
-
-    def __str__(self):
-        """ override print function output """
-        return "label: " + self.text + " layer=" + str(self.layerNumber)
-
-    def __repr__(self):
-        """ override print function output """
-        return "( label: " + self.text + " @" + str(self.offset) + " layer=" + self.layerNumber + " )"
-
-class rectangle(geometry):
-    """Represents a rectangular shape"""
-
-    def __init__(self, layerNumber, offset, width, height):
-        """Initializes a rectangular shape for specified layer"""
-        geometry.__init__(self)
-        self.name = "rect"
-        self.layerNumber = layerNumber
-        self.offset = vector(offset).snap_to_grid()
-        self.size = vector(width, height).snap_to_grid()
-        self.width = self.size.x
-        self.height = self.size.y
-
-        debug.info(3, "creating rectangle (" + str(self.layerNumber) + "): " 
-                   + str(self.width) + "x" + str(self.height) + " @ " + str(self.offset))
-
-
-    def gds_write_file(self, newLayout):
-        """Writes the rectangular shape to GDS"""
-        debug.info(3, "writing rectangle (" + str(self.layerNumber) + "):" 
-                   + str(self.width) + "x" + str(self.height) + " @ " + str(self.offset))
-        newLayout.addBox(layerNumber=self.layerNumber,
-                         purposeNumber=0,
-                         offsetInMicrons=self.offset,
-                         width=self.width,
-                         height=self.height,
-                         center=False)
-
-    def __str__(self):
-        """ override print function output """
-        return "rect: @" + str(self.offset) + " " + str(self.width) + "x" + str(self.height) + " layer=" +str(self.layerNumber)
-
-    def __repr__(self):
-        """ override print function output """
-        return "( rect: @" + str(self.offset) + " " + str(self.width) + "x" + str(self.height) + " layer=" + str(self.layerNumber) + " )"
@@ -28,6 +28,15 @@ if not (major_python_version == 2 and minor_python_version >= 7):
 def is_exe(fpath):
     return os.path.exists(fpath) and os.access(fpath, os.X_OK)
 
+def find_exe(name):
+    """ Returns the first executable of a name in the PATH or "". """
+    for path in os.environ["PATH"].split(os.pathsep):
+        exe = os.path.join(path, name)
+        # if it is found, then break and use first version
+        if is_exe(exe):
+            return exe
+    return ""
+
 # parse the optional arguments
 # this only does the optional arguments
 
@@ -53,12 +62,34 @@ def parse_args():
         optparse.make_option("-t", "--tech", dest="tech_name",
                              help="Technology name"),
         optparse.make_option("-s", "--spiceversion", dest="spice_version",
-                             help="Spice simulator name"),
+                             help="Spice simulator name (hspice, ngspice, xyce or analytic)"),
         # TODO: Why is this -f?
         optparse.make_option("-f", "--trim_noncritical", action="store_true", dest="trim_noncritical",
-                             help="Trim noncritical memory cells during simulation"),
+                             help="Simulate a netlist trimmed to the probed row and columns"),
         optparse.make_option("-a", "--analytical", action="store_true", dest="analytical_delay",
-                             help="Use analytical model to calculate delay")
+                             help="Use analytical model to calculate delay"),
+        optparse.make_option("-j", "--jobs", type="int", dest="num_procs",
+                             help="Number of simulations to run in parallel"),
+        optparse.make_option("--batch", action="store_true", dest="batch_sims",
+                             help="Simulate many characterization points in one simulator run"),
+        optparse.make_option("--surrogate", action="store_true", dest="surrogate_tables",
+                             help="Fill 7x7 tables from a few simulations and a fitted model"),
+        optparse.make_option("--worstcase", action="store_true", dest="worst_case_probes",
+                             help="Characterize the worst of the far and near cells of each bank"),
+        optparse.make_option("--montecarlo", action="store_true", dest="monte_carlo",
+                             help="Run a Monte Carlo analysis of the bitcell read and write margins"),
+        optparse.make_option("--importance", action="store_true", dest="mc_importance_sampling",
+                             help="Use importance sampling in the Monte Carlo analysis"),
+        optparse.make_option("--snm", action="store_true", dest="snm",
+                             help="Write the static noise margins of the bitcell"),
+        optparse.make_option("--session", action="store_true", dest="sim_sessions",
+                             help="Run the simulations in a persistent ngspice session"),
+        optparse.make_option("--cache", action="store_true", dest="use_sim_cache",
+                             help="Reuse the results of identical simulations from previous runs"),
+        optparse.make_option("--clearcache", action="store_true", dest="clear_sim_cache",
+                             help="Clear the simulation result cache"),
+        optparse.make_option("--store", action="store_true", dest="use_char_store",
+                             help="Write the .lib from the characterization results store")
     }
 # -h --help is implicit.
 
@@ -114,6 +145,8 @@ def init_openram(config_file):
 
     set_spice()
 
+    setup_sim_cache()
+
     set_calibre()
 
 
@@ -184,7 +217,13 @@ def end_openram():
     # Reset the static duplicate name checker for unit tests.
     # This is needed for running unit tests.
     import design
-    design.design.name_map=[]
+    design.design.name_map={}
+    # and the shared modules
+    import factory
+    factory.reset()
+    # and the worker processes of the characterizer
+    import charutils
+    charutils.close_pool()
     
     
 def cleanup_paths():
@@ -221,7 +260,9 @@ def setup_paths():
         OPTS.openram_temp += "/"
     debug.info(1, "Temporary files saved in " + OPTS.openram_temp)
 
-    cleanup_paths()
+    # Simulation and DRC/LVS jobs use their own unique subdirectories
+    # (see scratch.py), so an existing temp directory is not removed
+    # here as it may be shared with another OpenRAM process.
 
     # make the directory if it doesn't exist
     try:
@@ -238,34 +279,30 @@ def set_spice():
     debug.info(2,"Finding spice...")
     global OPTS
 
+    import simulator
     OPTS.spice_exe = ""
-    
+
+    # The analytic simulator runs in-process without an executable
+    if simulator.get_simulator().exe_name == None:
+        debug.info(1, "Using the {0} simulator".format(OPTS.spice_version))
+        return
+
     # Check if the preferred spice option exists in the path
-    for path in os.environ["PATH"].split(os.pathsep):
-        spice_exe = os.path.join(path, OPTS.spice_version)
-        # if it is found, then break and use first version
-        if is_exe(spice_exe):
-            debug.info(1, "Using spice: " + spice_exe)
-            OPTS.spice_exe = spice_exe
-            break
+    tried = [OPTS.spice_version]
+    OPTS.spice_exe = find_exe(simulator.get_simulator().exe_name)
+    if OPTS.spice_exe != "":
+        debug.info(1, "Using spice: " + OPTS.spice_exe)
         
     if not OPTS.force_spice and OPTS.spice_exe == "":
         # if we didn't find the preferred version, try the other version and warn
         prev_version=OPTS.spice_version
-        if OPTS.spice_version == "hspice":
-            OPTS.spice_version = "ngspice"
-        else:
-            OPTS.spice_version = "hspice"
+        OPTS.spice_version = simulator.get_simulator().fallback
+        tried.append(OPTS.spice_version)
         debug.warning("Unable to find {0} so trying {1}".format(prev_version,OPTS.spice_version))
 
-        for path in os.environ["PATH"].split(os.pathsep):
-            spice_exe = os.path.join(path, OPTS.spice_version)
-            # if it is found, then break and use first version
-            if is_exe(spice_exe):
-                found_spice = True
-                debug.info(1, "Using spice: " + spice_exe)
-                OPTS.spice_exe = spice_exe
-                break
+        OPTS.spice_exe = find_exe(simulator.get_simulator().exe_name)
+        if OPTS.spice_exe != "":
+            debug.info(1, "Using spice: " + OPTS.spice_exe)
 
     # set the input dir for spice files if using ngspice 
     if OPTS.spice_version == "ngspice":
@@ -276,12 +313,27 @@ def set_spice():
         if OPTS.force_spice:
             debug.error("{0} not found. Unable to perform characterization.".format(OPTS.spice_version),1)
         else:
-            debug.error("Neither hspice/ngspice not found. Unable to perform characterization.",1)
+            debug.error("Neither {0} found. Unable to perform characterization.".format(" nor ".join(tried)),1)
 
     if OPTS.analytical_delay:
         debug.warning("Using analytical delay models instead of characterization.")
 
         
+def setup_sim_cache():
+    """ Set up the persistent simulation result cache. """
+    global OPTS
+
+    if not OPTS.sim_cache_dir.endswith('/'):
+        OPTS.sim_cache_dir += "/"
+
+    if OPTS.clear_sim_cache:
+        import sim_cache
+        sim_cache.clear()
+
+    if OPTS.use_sim_cache:
+        debug.info(1, "Simulation cache is " + OPTS.sim_cache_dir)
+
+        
 # imports correct technology directories for testing
 def import_tech():
     global OPTS
@@ -1,5 +1,6 @@
 from tech import drc
 import debug
+import factory
 import design
 from math import log
 from math import sqrt
@@ -50,7 +51,7 @@ class hierarchical_decoder(design.design):
         self.create_vertical_rail()
 
     def add_modules(self):
-        self.m1m2_via = contact(layer_stack=("metal1", "via1", "metal2"))
+        self.m1m2_via = factory.create(contact, layer_stack=("metal1", "via1", "metal2"))
         # Vertical metal rail gap definition
         self.metal2_extend_contact = (self.m1m2_via.second_layer_height - self.m1m2_via.contact_width) / 2
         self.gap_between_rails = self.metal2_extend_contact  + drc["metal2_to_metal2"]
@@ -59,21 +60,21 @@ class hierarchical_decoder(design.design):
         # used to shift contact when connecting to NAND3 C pin down
         self.contact_shift = (self.m1m2_via.first_layer_width - self.m1m2_via.contact_width) / 2
 
-        self.inv = pinv(nmos_width=drc["minwidth_tx"],
-                        beta=2,
-                        height=self.bitcell_height)
+        self.inv = factory.create(pinv, nmos_width=drc["minwidth_tx"],
+                                  beta=2,
+                                  height=self.bitcell_height)
         self.add_mod(self.inv)
-        self.nand2 = nand_2(nmos_width=self.nand2_nmos_width,
-                            height=self.bitcell_height)
+        self.nand2 = factory.create(nand_2, nmos_width=self.nand2_nmos_width,
+                                    height=self.bitcell_height)
         self.add_mod(self.nand2)
-        self.nand3 = nand_3(nmos_width=self.nand3_nmos_width,
-                            height=self.bitcell_height)
+        self.nand3 = factory.create(nand_3, nmos_width=self.nand3_nmos_width,
+                                    height=self.bitcell_height)
         self.add_mod(self.nand3)
 
         # CREATION OF PRE-DECODER
-        self.pre2_4 = pre2x4(self.nand2_nmos_width, "pre2x4")
+        self.pre2_4 = factory.create(pre2x4, self.nand2_nmos_width, "pre2x4")
         self.add_mod(self.pre2_4)
-        self.pre3_8 = pre3x8(self.nand3_nmos_width, "pre3x8")
+        self.pre3_8 = factory.create(pre3x8, self.nand3_nmos_width, "pre3x8")
         self.add_mod(self.pre3_8)
 
     def setup_layout_offsets(self):
@@ -107,6 +108,28 @@ class hierarchical_decoder(design.design):
         else:
             debug.error("Invalid number of inputs for hierarchical decoder")
 
+    def row_index(self, address):
+        """ Returns the decoded row (the Z/decode_out index) of a list of
+        address bits where address[i] is the value of A[i]. """
+        debug.check(len(address) == self.num_inputs,
+                    "Address size does not match the decoder inputs.")
+        # the 2:4 pre-decoders take the first inputs
+        sizes = [4]*self.no_of_pre2x4 + [8]*self.no_of_pre3x8
+        row = 0
+        bit = 0
+        for size in sizes:
+            if size == 4:
+                # 2:4 out[1] is A[0]&!A[1]
+                value = address[bit] + 2*address[bit+1]
+                bit += 2
+            else:
+                # 3:8 out[4] is A[0]&!A[1]&!A[2]
+                value = 4*address[bit] + 2*address[bit+1] + address[bit+2]
+                bit += 3
+            # the first pre-decoder selects the most significant group
+            row = row*size + value
+        return row
+
     def setup_layout_constants(self):
         (p2x4,p3x8)=self.determine_predecodes(self.num_inputs)
         self.no_of_pre2x4=p2x4
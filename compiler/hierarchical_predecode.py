@@ -1,4 +1,5 @@
 import debug
+import factory
 import design
 import math
 from tech import drc
@@ -33,10 +34,10 @@ class hierarchical_predecode(design.design):
 
     def create_modules(self):
         layer_stack = ("metal1", "via1", "metal2")
-        self.m1m2_via = contact(layer_stack=layer_stack) 
-        self.inv = pinv(nmos_width=drc["minwidth_tx"],
-                        beta=2,
-                        height=self.bitcell_height)
+        self.m1m2_via = factory.create(contact, layer_stack=layer_stack) 
+        self.inv = factory.create(pinv, nmos_width=drc["minwidth_tx"],
+                                  beta=2,
+                                  height=self.bitcell_height)
         self.add_mod(self.inv)
         # create_nand redefine in sub class based on number of inputs
         self.create_nand()
@@ -1,5 +1,6 @@
 from tech import drc
 import debug
+import factory
 import design
 from nand_2 import nand_2
 from vector import vector
@@ -19,8 +20,8 @@ class hierarchical_predecode2x4(hierarchical_predecode):
         self.route()
 
     def create_nand(self):
-        self.nand = nand_2(nmos_width=self.nmos_width,
-                           height=self.bitcell_height)
+        self.nand = factory.create(nand_2, nmos_width=self.nmos_width,
+                                   height=self.bitcell_height)
 
     def set_rail_height(self):
         self.rail_height = (self.number_of_outputs * self.nand.height 
@@ -1,5 +1,6 @@
 from tech import drc
 import debug
+import factory
 import design
 from nand_3 import nand_3
 from vector import vector
@@ -20,8 +21,8 @@ class hierarchical_predecode3x8(hierarchical_predecode):
         self.route()
 
     def create_nand(self):
-        self.nand = nand_3(nmos_width=self.nmos_width,
-                           height=self.bitcell_height)
+        self.nand = factory.create(nand_3, nmos_width=self.nmos_width,
+                                   height=self.bitcell_height)
 
     def set_rail_height(self):        
         self.rail_height = (self.number_of_outputs * self.nand.height 
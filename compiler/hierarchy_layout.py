@@ -1,5 +1,7 @@
 import itertools
 import geometry
+import shape_store
+import factory
 import gdsMill
 import debug
 from tech import drc, GDS
@@ -9,7 +11,7 @@ from vector import vector
 
 class layout:
     """
-    Class consisting of a set of objs and instances for a module
+    Class consisting of a set of shapes and instances for a module
     This provides a set of useful generic types for hierarchy
     management. If a module is a custom designed cell, it will read from
     the GDS and spice files and perform LVS/DRC. If it is dynamically
@@ -22,7 +24,8 @@ class layout:
         self.width = None
         self.height = None
         self.insts = []  # Holds module/cell layout instances
-        self.objs = []  # Holds all other objects (labels, geometries, etc)
+        self.inst_map = {}  # The instances by name
+        self.shapes = shape_store.shape_store()  # Holds the rectangles and labels
 
         self.visited = False # Flag for traversing the hierarchy 
 
@@ -45,11 +48,11 @@ class layout:
         this layout"""
         #***1,000,000 number is used to avoid empty sequences errors***
         # FIXME Is this hard coded value ok??
-        try:
-            lowestx1 = min(rect.offset.x for rect in self.objs)
-            lowesty1 = min(rect.offset.y for rect in self.objs)
-        except:
+        lowest = self.shapes.lowest()
+        if lowest == None:
             [lowestx1, lowesty1] = [1000000.0, 1000000.0]
+        else:
+            [lowestx1, lowesty1] = [lowest.x, lowest.y]
         try:
             lowestx2 = min(inst.offset.x for inst in self.insts)
             lowesty2 = min(inst.offset.y for inst in self.insts)
@@ -68,7 +71,7 @@ class layout:
             attr_val = getattr(self,attr_key)
 
             # skip the list of things as these will be offset separately
-            if (attr_key in ['objs','insts','mods','pins','conns','name_map']): continue
+            if (attr_key in ['shapes','insts','mods','pins','conns','name_map']): continue
 
             # if is a list
             if isinstance(attr_val, list):
@@ -94,26 +97,33 @@ class layout:
     def translate(self, coordinate):
         """Translates all 2d cartesian coordinates in a layout given
         the (x,y) offset"""
-        for obj in self.objs:
-            obj.offset = vector(obj.offset - coordinate)
+        self.shapes.translate(coordinate)
         for inst in self.insts:
             inst.offset = vector(inst.offset - coordinate)
 
     # FIXME: Make name optional and pick a random one if not specified
     def add_inst(self, name, mod, offset=[0,0], mirror="R0",rotate=0):
         """Adds an instance of a mod to this module"""
-        self.insts.append(geometry.instance(name, mod, offset, mirror, rotate))
-        message = []
-        for x in self.insts:
-            message.append(x.name)
-        debug.info(4, "adding instance" + ",".join(message))
+        inst = geometry.instance(name, mod, offset, mirror, rotate)
+        self.insts.append(inst)
+        self.inst_map[name] = inst
+        debug.info(4, "adding instance {0}".format(name))
+
+    def add_inst_array(self, name, mod, offset, cols, rows, pitch, mirror_rows=False, mirror_cols=False):
+        """Adds a cols x rows array of instances of a mod to this module.
+        The name is formatted with the row and col of each instance."""
+        inst = geometry.instance_array(name, mod, offset, cols, rows, pitch, mirror_rows, mirror_cols)
+        self.insts.append(inst)
+        self.inst_map[name] = inst
+        debug.info(4, "adding instance array {0}".format(name))
+        return inst
 
     def add_rect(self, layer, offset, width, height):
         """Adds a rectangle on a given layer,offset with width and height"""
         # negative layers indicate "unused" layers in a given technology
         layerNumber = techlayer[layer]
         if layerNumber >= 0:
-            self.objs.append(geometry.rectangle(layerNumber, offset, width, height))
+            self.shapes.add_rect(layerNumber, offset, width, height)
 
     def add_layout_pin(self, text, layer, offset, width, height):
         """Create a labeled pin"""
@@ -131,7 +141,7 @@ class layout:
         # negative layers indicate "unused" layers in a given technology
         layerNumber = techlayer[layer]
         if layerNumber >= 0:
-            self.objs.append(geometry.label(text, layerNumber, offset, zoom))
+            self.shapes.add_label(text, layerNumber, offset, zoom)
 
 
     def add_path(self, layer, coordinates, width=None):
@@ -182,8 +192,9 @@ class layout:
     def add_via(self, layers, offset, size=[1,1], mirror="R0", rotate=0):
         """ Add a three layer via structure. """
         import contact
-        via = contact.contact(layer_stack=layers,
-                              dimensions=size)
+        via = factory.create(contact.contact,
+                             layer_stack=layers,
+                             dimensions=size)
         self.add_mod(via)
         self.add_inst(name=via.name, 
                       mod=via, 
@@ -197,9 +208,10 @@ class layout:
     def add_ptx(self, offset, mirror="R0", rotate=0, width=1, mults=1, tx_type="nmos"):
         """Adds a ptx module to the design."""
         import ptx
-        mos = ptx.ptx(width=width,
-                      mults=mults,
-                      tx_type=tx_type)
+        mos = factory.create(ptx.ptx,
+                             width=width,
+                             mults=mults,
+                             tx_type=tx_type)
         self.add_mod(mos)
         self.add_inst(name=mos.name, 
                       mod=mos, 
@@ -244,8 +256,7 @@ class layout:
             return
         for i in self.insts:
             i.gds_write_file(newLayout)
-        for i in self.objs:
-            i.gds_write_file(newLayout)
+        self.shapes.gds_write_file(newLayout)
         self.visited = True
 
     def gds_write(self, gds_name):
@@ -290,9 +301,8 @@ class layout:
                    "|=========      LIST OF OBJECTS (Rects) FOR: " + self.attr["name"])
         debug.info(0, 
                    "|==============================================================================|")
-        for obj in self.objs:
-            debug.info(0, "layer={0} : offset={1} : size={2}".format(
-                obj.layerNumber, obj.offset, obj.size))
+        for shape in self.shapes.descriptions():
+            debug.info(0, shape)
 
         debug.info(0, 
                    "|==============================================================================|")
@@ -18,6 +18,7 @@ class spice:
         self.name = name
 
         self.mods = []  # Holds subckts/mods for this module
+        self.mod_map = {}  # The mods by name
         self.pins = []  # Holds the pins for this module
 
         # for each instance, this is the set of nets/nodes that map to the pins for this instance
@@ -40,8 +41,16 @@ class spice:
         self.pins = self.pins + pin_list
 
     def add_mod(self, mod):
-        """Adds a subckt/submodule to the subckt hierarchy"""
-        self.mods.append(mod)
+        """Adds a subckt/submodule to the subckt hierarchy once. Only
+        one subckt of a name is written, so another mod of the same name
+        must be the same cell."""
+        if mod.name not in self.mod_map:
+            self.mod_map[mod.name] = mod
+            self.mods.append(mod)
+            return
+        old = self.mod_map[mod.name]
+        debug.check(mod is old or (type(mod) == type(old) and mod.pins == old.pins),
+                    "{0} : Different modules named {1}.".format(self.name, mod.name))
 
     def connect_inst(self, args, check=True):
         """Connects the pins of the last instance added
@@ -65,6 +74,15 @@ class spice:
 
 
 
+    def connect_inst_array(self, conns):
+        """Connects the pins of the last instance array added. conns is
+        a function of the row and col of an instance that returns its
+        nets, so the connections aren't stored per instance."""
+        if len(self.insts[-1].mod.pins) != len(conns(0, 0)):
+            debug.error("Number of net connections ({0}) does not match last instance array ({1})".format(len(self.insts[-1].mod.pins),
+                                                                                                          len(conns(0, 0))), 1)
+        self.conns.append(conns)
+
     def sp_read(self):
         """Reads the sp file (and parse the pins) from the library 
            Otherwise, initialize it to null for dynamic generation"""
@@ -83,21 +101,16 @@ class spice:
         else:
             self.spice = []
 
-    def contains(self, mod, modlist):
-        for x in modlist:
-            if x.name == mod.name:
-                return True
-        return False
-
     def sp_write_file(self, sp, usedMODS):
         """ Recursive spice subcircuit write;
-            Writes the spice subcircuit from the library or the dynamically generated one"""
+            Writes the spice subcircuit from the library or the dynamically generated one.
+            usedMODS is the set of the names of the modules already written."""
         if not self.spice:
             # recursively write the modules
             for i in self.mods:
-                if self.contains(i, usedMODS):
+                if i.name in usedMODS:
                     continue
-                usedMODS.append(i)
+                usedMODS.add(i.name)
                 i.sp_write_file(sp, usedMODS)
 
             if len(self.insts) == 0:
@@ -124,6 +137,13 @@ class spice:
                 # these are wires and paths
                 if self.conns[i] == []:
                     continue
+                # the instances of an array are connected by a function
+                if callable(self.conns[i]):
+                    for (name, row, col) in self.insts[i].instances():
+                        sp.write("X{0} {1} {2}\n".format(name,
+                                                         " ".join(self.conns[i](row, col)),
+                                                         self.insts[i].mod.name))
+                    continue
                 sp.write("X{0} {1} {2}\n".format(self.insts[i].name,
                                                  " ".join(self.conns[i]),
                                                  self.insts[i].mod.name))
@@ -143,13 +163,16 @@ class spice:
         debug.info(3, "Writing to {0}".format(spname))
         spfile = open(spname, 'w')
         spfile.write("*FIRST LINE IS A COMMENT\n")
-        usedMODS = list()
+        usedMODS = set()
         self.sp_write_file(spfile, usedMODS)
         del usedMODS
         spfile.close()
 
     def delay(self, slew, load=0.0):
-        """Inform users undefined delay module while building new modules"""
+        """Inform users undefined delay module while building new modules.
+        The slew and load of the delay functions can be floats or NumPy
+        arrays of points that are evaluated at once. The delay_data is
+        then arrays of the delays and slews of each point."""
         debug.warning("Design Class {0} delay function needs to be defined"
                       .format(self.__class__.__name__))
         debug.warning("Class {0} name {1}"
@@ -161,7 +184,8 @@ class spice:
     def cal_delay_with_rc(self, r, c ,slew, swing = 0.5):
         """ 
         Calculate the delay of a mosfet by 
-        modeling it as a resistance driving a capacitance
+        modeling it as a resistance driving a capacitance.
+        The capacitance and slew can be NumPy arrays.
         """
         swing_factor = abs(math.log(1-swing)) # time constant based on swing
         delay = swing_factor * r * c #c is in ff and delay is in fs
@@ -189,6 +213,7 @@ class delay_data:
     This is the delay class to represent the delay information
     Time is 50% of the signal to 50% of reference signal delay.
     Slew is the 10% of the signal to 90% of signal
+    Both are floats or NumPy arrays of several points.
     """
     def __init__(self, delay=0.0, slew=0.0):
         """ init function support two init method"""
@@ -74,7 +74,7 @@ class lef:
                     self.lef.write(" {0} {1}".format(item[0]*self.unit, item[1]*self.unit))
                 self.lef.write(" ;\n")
                
-        for sref in self.myLayout.structures[sr].srefs:
+        for sref in self.myLayout.structures[sr].references():
             sMirr = 1
             if sref.transFlags[0] == True:
                 sMirr = -1
@@ -102,7 +102,7 @@ class lef:
                          self.lef.write(" {0} {1}".format(item[0]*self.unit, item[1]*self.unit))
                     self.lef.write(" ;\n")
 
-        for sref in self.myLayout.structures[sr].srefs:
+        for sref in self.myLayout.structures[sr].references():
             sMirr = 1
             if sref.transFlags[0] == True:
                 sMirr = -1
@@ -230,7 +230,7 @@ class lef:
             listMaxX.append(maxX)
             listMaxY.append(maxY)
 
-        for sref in self.myLayout.structures[sr].srefs:
+        for sref in self.myLayout.structures[sr].references():
             sMirr = 1
             if sref.transFlags[0] == True:
                 sMirr = -1
@@ -1,4 +1,5 @@
 import debug
+import factory
 import design
 from tech import drc
 from pinv import pinv
@@ -53,8 +54,8 @@ class logic_effort_dc(design.design):
 
     def create_module(self):
         """add the inverters"""
-        self.inv = pinv(nmos_width=drc["minwidth_tx"],
-                        route_output=False)
+        self.inv = factory.create(pinv, nmos_width=drc["minwidth_tx"],
+                                  route_output=False)
         self.add_mod(self.inv)
 
 
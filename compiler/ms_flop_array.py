@@ -60,27 +60,21 @@ class ms_flop_array(design.design):
         self.add_pin("gnd")
 
     def create_ms_flop_array(self):
+        # abutting flops are flipped to share the gnd rail
+        flops = self.add_inst_array(name="Xdff{col}",
+                                    mod=self.ms_flop,
+                                    offset=[0, 0],
+                                    cols=self.word_size,
+                                    rows=1,
+                                    pitch=[self.ms_flop.width * self.words_per_row, 0],
+                                    mirror_cols=(self.words_per_row == 1))
+        self.connect_inst_array(lambda row, col: ["din[{0}]".format(col),
+                                                  "dout[{0}]".format(col),
+                                                  "dout_bar[{0}]".format(col),
+                                                  "clk",
+                                                  "vdd", "gnd"])
         for i in range(self.word_size):
-            name = "Xdff%d" % i
-            if (i % 2 == 0):
-                x_off = i * self.ms_flop.width * self.words_per_row
-                mirror = "None"
-            else:
-                if (self.words_per_row == 1):
-                    x_off = (i + 1) * self.ms_flop.width
-                    mirror="MY"
-                else:
-                    x_off = i * self.ms_flop.width * self.words_per_row
-            self.add_inst(name=name,
-                          mod=self.ms_flop,
-                          offset=[x_off, 0], 
-                          mirror=mirror)
-            self.connect_inst(["din[{0}]".format(i),
-                               "dout[{0}]".format(i),
-                               "dout_bar[{0}]".format(i),
-                               "clk",
-                               "vdd", "gnd"])
-            self.flop_positions.append(vector(x_off, 0))
+            self.flop_positions.append(flops.placement(0, i)[0])
 
     def add_labels(self):
         for i in range(self.word_size):
@@ -1,4 +1,5 @@
 import contact
+import factory
 import design
 import debug
 from tech import drc, parameter, spice
@@ -50,7 +51,7 @@ class nand_2(design.design):
         self.add_well_contacts()
 
         # This isn't instantiated, but we use it to get the dimensions
-        self.poly_contact = contact.contact(("poly", "contact", "metal1"))
+        self.poly_contact = factory.create(contact.contact, ("poly", "contact", "metal1"))
 
         self.connect_well_contacts()
         self.connect_rails()
@@ -70,22 +71,22 @@ class nand_2(design.design):
     # transistors are created here but not yet placed or added as a module
     def create_ptx(self):
         """ Add required modules """
-        self.nmos1 = ptx(width=self.nmos_size,
-                         mults=self.tx_mults,
-                         tx_type="nmos")
+        self.nmos1 = factory.create(ptx, width=self.nmos_size,
+                                    mults=self.tx_mults,
+                                    tx_type="nmos")
         self.add_mod(self.nmos1)
-        self.nmos2 = ptx(width=self.nmos_size,
-                         mults=self.tx_mults,
-                         tx_type="nmos")
+        self.nmos2 = factory.create(ptx, width=self.nmos_size,
+                                    mults=self.tx_mults,
+                                    tx_type="nmos")
         self.add_mod(self.nmos2)
 
-        self.pmos1 = ptx(width=self.pmos_size,
-                         mults=self.tx_mults,
-                         tx_type="pmos")
+        self.pmos1 = factory.create(ptx, width=self.pmos_size,
+                                    mults=self.tx_mults,
+                                    tx_type="pmos")
         self.add_mod(self.pmos1)
-        self.pmos2 = ptx(width=self.pmos_size,
-                         mults=self.tx_mults,
-                         tx_type="pmos")
+        self.pmos2 = factory.create(ptx, width=self.pmos_size,
+                                    mults=self.tx_mults,
+                                    tx_type="pmos")
         self.add_mod(self.pmos2)
 
     def setup_layout_constants(self):
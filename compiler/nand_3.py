@@ -1,4 +1,5 @@
 import contact
+import factory
 import design
 import debug
 from tech import drc
@@ -49,8 +50,8 @@ class nand_3(design.design):
         self.add_well_contacts()
 
         # These aren't for instantiating, but we use them to get the dimensions
-        self.poly_contact = contact.contact(("poly", "contact", "metal1"))
-        self.m1m2_via = contact.contact(("metal1", "via1", "metal2"))
+        self.poly_contact = factory.create(contact.contact, ("poly", "contact", "metal1"))
+        self.m1m2_via = factory.create(contact.contact, ("metal1", "via1", "metal2"))
 
         self.connect_tx()
         self.connect_well_contacts()
@@ -68,30 +69,30 @@ class nand_3(design.design):
 
     def create_ptx(self):
         """ Create ptx  but not yet placed"""
-        self.nmos1 = ptx(width=self.nmos_size,
-                         mults=self.tx_mults,
-                         tx_type="nmos")
+        self.nmos1 = factory.create(ptx, width=self.nmos_size,
+                                    mults=self.tx_mults,
+                                    tx_type="nmos")
         self.add_mod(self.nmos1)
-        self.nmos2 = ptx(width=self.nmos_size,
-                         mults=self.tx_mults,
-                         tx_type="nmos")
+        self.nmos2 = factory.create(ptx, width=self.nmos_size,
+                                    mults=self.tx_mults,
+                                    tx_type="nmos")
         self.add_mod(self.nmos2)
-        self.nmos3 = ptx(width=self.nmos_size,
-                         mults=self.tx_mults,
-                         tx_type="nmos")
+        self.nmos3 = factory.create(ptx, width=self.nmos_size,
+                                    mults=self.tx_mults,
+                                    tx_type="nmos")
         self.add_mod(self.nmos3)
 
-        self.pmos1 = ptx(width=self.pmos_size,
-                         mults=self.tx_mults,
-                         tx_type="pmos")
+        self.pmos1 = factory.create(ptx, width=self.pmos_size,
+                                    mults=self.tx_mults,
+                                    tx_type="pmos")
         self.add_mod(self.pmos1)
-        self.pmos2 = ptx(width=self.pmos_size,
-                         mults=self.tx_mults,
-                         tx_type="pmos")
+        self.pmos2 = factory.create(ptx, width=self.pmos_size,
+                                    mults=self.tx_mults,
+                                    tx_type="pmos")
         self.add_mod(self.pmos2)
-        self.pmos3 = ptx(width=self.pmos_size,
-                         mults=self.tx_mults,
-                         tx_type="pmos")
+        self.pmos3 = factory.create(ptx, width=self.pmos_size,
+                                    mults=self.tx_mults,
+                                    tx_type="pmos")
         self.add_mod(self.pmos3)
 
     def setup_layout_constants(self):
@@ -112,9 +112,41 @@ lef.lef(gdsname,lefname,s)
 
 # generate lib
 import lib
-libname = OPTS.output_path + s.name + ".lib"
-print("LIB: Writing to {0}".format(libname))
-lib.lib(libname,s,sram_file)
+try:
+    corners = OPTS.config.corners
+except AttributeError:
+    corners = []
+if len(corners) > 0:
+    # one .lib per corner of the config file
+    print("LIB: Writing {0} corners".format(len(corners)))
+    for libname in lib.write_corners(OPTS.output_path + s.name, s, sram_file, corners):
+        print("LIB: Wrote {0}".format(libname))
+else:
+    libname = OPTS.output_path + s.name + ".lib"
+    print("LIB: Writing to {0}".format(libname))
+    lib.lib(libname,s,sram_file)
+
+# variation of the bitcell margins
+if OPTS.monte_carlo:
+    import monte_carlo
+    for mode in ["read", "write"]:
+        results = monte_carlo.monte_carlo(s, mode).analyze()
+        print("MC: {0} failure rate {1:.3e} {2} in {3} runs".format(mode,
+                                                                  results["failure_rate"],
+                                                                  results["confidence_interval"],
+                                                                  results["runs"]))
+
+# butterfly curve margins of the bitcell
+if OPTS.snm:
+    import snm
+    import tech
+    if len(corners) == 0:
+        corners = [("nominal", tech.spice["fet_models"], tech.spice["supply_voltage"], tech.spice["temp"])]
+    supplies = [scale * tech.spice["supply_voltage"] for scale in OPTS.snm_supply_scales]
+    snmname = OPTS.output_path + s.name + ".snm"
+    print("SNM: Writing to {0}".format(snmname))
+    tables = snm.analyze_corners(s.bank.bitcell_array.cell, corners, supplies)
+    snm.write_tables(snmname, corners, tables)
 
 globals.end_openram()
 
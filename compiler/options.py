@@ -1,6 +1,7 @@
 import optparse
 import getpass 
 import os
+import multiprocessing
 
 class options(optparse.Values):
     """
@@ -13,12 +14,15 @@ class options(optparse.Values):
     tech_name = ""
     # This is the temp directory where all intermediate results are stored.
     openram_temp = "/tmp/openram_{0}_{1}_temp/".format(getpass.getuser(),os.getpid())
+    # Keep the scratch directories of failed simulation and DRC/LVS jobs
+    keep_failed_temp = True
     # This is the verbosity level to control debug information. 0 is none, 1
     # is minimal, etc.
     debug_level = 0
     # This determines whether  LVS and DRC is checked for each submodule.
     check_lvsdrc = True
-    # Variable to select the variant of spice (hspice or ngspice right now)
+    # Variable to select the variant of spice (hspice, ngspice, xyce or
+    # the in-process analytic model, see characterizer/simulator.py)
     spice_version = "hspice"
     # Should we fall back if we can't find our preferred spice?
     force_spice = False
@@ -30,10 +34,71 @@ class options(optparse.Values):
     spice_exe = ""
     # Run with extracted parasitics
     use_pex = False
-    # Trim noncritical memory cells for simulation speed-up
+    # Characterize with the bitcell array trimmed to the probed row and columns
     trim_noncritical = False
     # Define the output file paths
     output_path = ""
     # Define the output file base name
     output_name = ""
     analytical_delay = False
+    # Number of worker processes used to run independent simulations
+    num_procs = multiprocessing.cpu_count()
+    # Simulate the points of a characterization table in one simulator
+    # invocation per worker instead of one invocation per point
+    batch_sims = False
+    # The number of ways (K) that the min period and setup/hold searches
+    # divide their bracket in each round. The probes of a round run in
+    # parallel, but where they are doesn't depend on the processes so
+    # the results are the same on every machine.
+    search_arity = 4
+    # Compute the delays, slews and power from the saved waveform
+    # instead of the .meas results (ngspice only)
+    measure_waveforms = False
+    # Characterize 7x7 tables from a few simulations and a fitted model
+    # and the largest relative error of the fit at the held out points
+    surrogate_tables = False
+    surrogate_tolerance = 0.02
+    # Run the simulations of each process in one long running
+    # simulator session instead of one process per simulation (ngspice)
+    sim_sessions = False
+    # Write and read the far and near cells of each bank in every delay
+    # simulation and characterize the worst of them (see lib.probes)
+    worst_case_probes = False
+    # The largest time step of the delay simulations as a fraction of
+    # the clock period (see stimuli.tran_step)
+    tran_steps_per_period = 200
+    # Run a Monte Carlo analysis of the bitcell read and write margins
+    # (see monte_carlo) with a seed, a maximum number of runs simulated
+    # in rounds and the target relative half width of the confidence
+    # interval of the failure rate that stops it
+    monte_carlo = False
+    mc_seed = 0
+    mc_max_runs = 10000
+    mc_round_size = 100
+    mc_ci_target = 0.1
+    mc_confidence = 0.95
+    # Center the runs on the closest failure of a pilot with a larger
+    # standard deviation and weight them (for rare failures)
+    mc_importance_sampling = False
+    mc_pilot_runs = 200
+    mc_pilot_scale = 3.0
+    # The bitline swing (fraction of the supply) of the nominal cell
+    # when the sense amp fires and the wordline pulse of a write as a
+    # multiple of the nominal flip time
+    mc_read_swing = 0.1
+    mc_write_pulse = 1.5
+    # Write the butterfly curve margins of the bitcell at these
+    # fractions of the supply of each corner (see snm)
+    snm = False
+    snm_supply_scales = [0.6, 0.7, 0.8, 0.9, 1.0, 1.1]
+    # Reuse the results of identical simulations from previous runs
+    use_sim_cache = False
+    # Remove all cached simulation results at startup
+    clear_sim_cache = False
+    # Location and maximum size (in bytes) of the simulation cache
+    sim_cache_dir = os.path.expanduser("~/.openram/sim_cache/")
+    sim_cache_size = 1000000000
+    # Write the .lib from the stored characterization results and only
+    # simulate the arcs that are missing from the store
+    use_char_store = False
+    char_store_file = os.path.expanduser("~/.openram/characterization.db")
@@ -1,4 +1,5 @@
 import contact
+import factory
 import design
 import debug
 from tech import drc, parameter, spice
@@ -42,8 +43,8 @@ class pinv(design.design):
         """Calls all functions related to the generation of the layout(gds)"""
 
         # These aren't for instantiating, but we use them to get the dimensions
-        self.poly_contact = contact.contact(("poly", "contact", "metal1"))
-        self.m1m2_via = contact.contact(("metal1", "via1", "metal2"))
+        self.poly_contact = factory.create(contact.contact, ("poly", "contact", "metal1"))
+        self.m1m2_via = factory.create(contact.contact, ("metal1", "via1", "metal2"))
 
         self.determine_tx_mults()
         self.create_ptx()
@@ -52,10 +53,10 @@ class pinv(design.design):
         self.add_ptx()
 
         # These aren't for instantiating, but we use them to get the dimensions
-        self.nwell_contact = contact.contact(layer_stack=("active", "contact", "metal1"),
-                                             dimensions=(1, self.pmos.num_of_tacts))
-        self.pwell_contact = contact.contact(layer_stack=("active", "contact", "metal1"),
-                                             dimensions=(1, self.nmos.num_of_tacts))
+        self.nwell_contact = factory.create(contact.contact, layer_stack=("active", "contact", "metal1"),
+                                            dimensions=(1, self.pmos.num_of_tacts))
+        self.pwell_contact = factory.create(contact.contact, layer_stack=("active", "contact", "metal1"),
+                                            dimensions=(1, self.nmos.num_of_tacts))
 
         self.extend_wells()
         self.extend_active()
@@ -95,17 +96,17 @@ class pinv(design.design):
 
     def create_ptx(self):
         """Intiializes a ptx object"""
-        self.nmos = ptx(width=self.nmos_size,
-                        mults=self.tx_mults,
-                        tx_type="nmos")
-        self.nmos.connect_fingered_poly()
-        self.nmos.connect_fingered_active()
+        self.nmos = factory.create(ptx, width=self.nmos_size,
+                                   mults=self.tx_mults,
+                                   tx_type="nmos",
+                                   connect_poly=True,
+                                   connect_active=True)
         self.add_mod(self.nmos)
-        self.pmos = ptx(width=self.pmos_size,
-                        mults=self.tx_mults,
-                        tx_type="pmos")
-        self.pmos.connect_fingered_poly()
-        self.pmos.connect_fingered_active()
+        self.pmos = factory.create(ptx, width=self.pmos_size,
+                                   mults=self.tx_mults,
+                                   tx_type="pmos",
+                                   connect_poly=True,
+                                   connect_active=True)
         self.add_mod(self.pmos)
 
     def setup_layout_constants(self):
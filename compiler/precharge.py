@@ -1,5 +1,6 @@
 from contact import contact
 import design
+import factory
 import debug
 from tech import drc
 from ptx import ptx
@@ -45,15 +46,16 @@ class precharge(design.design):
 
     def create_ptx(self):
         """Initializes the upper and lower pmos"""
-        self.lower_pmos = ptx(width=self.ptx_width,
-                              mults=1, 
-                              tx_type="pmos")
+        self.lower_pmos = factory.create(ptx, width=self.ptx_width,
+                                         mults=1, 
+                                         tx_type="pmos")
         self.add_mod(self.lower_pmos)
-        self.upper_pmos = ptx(width=self.beta * self.ptx_width,
-                              mults=1,
-                              tx_type="pmos")
+        self.upper_pmos = factory.create(ptx, width=self.beta * self.ptx_width,
+                                         mults=1,
+                                         tx_type="pmos")
         self.upper_pmos = self.upper_pmos
         self.add_mod(self.upper_pmos)
+        # this one is changed, so it isn't shared
         self.temp_pmos = ptx(width=self.beta * self.ptx_width,
                              mults=2,
                              tx_type="pmos")
@@ -63,14 +65,14 @@ class precharge(design.design):
     def create_contacts(self):
         """Initializes all required contacts/vias for this module"""
         # These aren't for instantiating, but we use them to get the dimensions
-        self.nwell_contact = contact(layer_stack=("active", "contact", "metal1"))
-        self.poly_contact = contact(layer_stack=("poly", "contact", "metal1"))
+        self.nwell_contact = factory.create(contact, layer_stack=("active", "contact", "metal1"))
+        self.poly_contact = factory.create(contact, layer_stack=("poly", "contact", "metal1"))
         self.upper_dimensions = self.upper_pmos.active_contact.dimensions
         self.lower_dimensions = self.lower_pmos.active_contact.dimensions
-        self.upper_contact = contact(layer_stack=("metal1", "via1", "metal2"),
-                                     dimensions=self.upper_dimensions)
-        self.lower_contact = contact(layer_stack=("metal1", "via1", "metal2"),
-                                     dimensions=self.lower_dimensions)
+        self.upper_contact = factory.create(contact, layer_stack=("metal1", "via1", "metal2"),
+                                            dimensions=self.upper_dimensions)
+        self.lower_contact = factory.create(contact, layer_stack=("metal1", "via1", "metal2"),
+                                            dimensions=self.lower_dimensions)
 
     def setup_layout_constants(self):
         self.width = self.bitcell_chars["width"]
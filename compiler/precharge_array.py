@@ -77,21 +77,22 @@ class precharge_array(design.design):
     def add_pc(self):
         """Creates a precharge array by horizontally tiling the precharge cell"""
         self.pc_cell_positions = []
+        self.add_inst_array(name="pre_column_{col}",
+                            mod=self.pc_cell,
+                            offset=[0, 0],
+                            cols=self.columns,
+                            rows=1,
+                            pitch=[self.pc_cell.width, 0])
+        self.connect_inst_array(lambda row, col: ["bl[{0}]".format(col), "br[{0}]".format(col),
+                                                  "clk", "vdd"])
         for i in range(self.columns):
-            name = "pre_column_{0}".format(i)
             offset = vector(self.pc_cell.width * i, 0)
             self.pc_cell_positions.append(offset)
-            self.add_inst(name=name,
-                          mod=self.pc_cell,
-                          offset=offset)
             self.add_label(text="bl[{0}]".format(i),
                            layer="metal2",
                            offset=offset+ self.pc_cell.BL_position.scale(1,0))
             self.add_label(text="br[{0}]".format(i),
                            layer="metal2",
                            offset=offset+ self.pc_cell.BR_position.scale(1,0))
-            self.connect_inst(["bl[{0}]".format(i), "br[{0}]".format(i),
-                               "clk", "vdd"])
-
             self.BL_positions.append(offset + self.pc_cell.BL_position.scale(1,0))
             self.BR_positions.append(offset + self.pc_cell.BR_position.scale(1,0))
@@ -1,4 +1,5 @@
 import design
+import factory
 import debug
 from tech import drc, info, spice
 from vector import vector
@@ -10,8 +11,13 @@ class ptx(design.design):
     This module generates gds and spice of a parametrically NMOS or PMOS sized transistor. 
     Creates a simple MOS transistor
     """
-    def __init__(self, width=1, mults=1, tx_type="nmos"):
+    def __init__(self, width=1, mults=1, tx_type="nmos", connect_poly=False, connect_active=False):
         name = "{0}_m{1}_w{2}".format(tx_type, mults, width)
+        # the fingers of a single finger device have nothing to connect
+        if connect_poly and mults > 1:
+            name += "_cp"
+        if connect_active and mults > 1:
+            name += "_ca"
         # remove periods for newer spice compatibility
         name=re.sub('\.','_',name)
         design.design.__init__(self, name)
@@ -23,6 +29,10 @@ class ptx(design.design):
 
         self.add_pins()
         self.create_layout()
+        if connect_poly:
+            self.connect_fingered_poly()
+        if connect_active:
+            self.connect_fingered_active()
         self.create_spice()
         # for run-time, we won't check every transitor DRC independently
         #self.DRC()
@@ -35,8 +45,9 @@ class ptx(design.design):
 
         # This is not actually instantiated but used for calculations
         self.num_of_tacts = self.calculate_num_of_tacts()
-        self.active_contact = contact(layer_stack=("active", "contact", "metal1"),
-                                      dimensions=(1, self.num_of_tacts))
+        self.active_contact = factory.create(contact,
+                                             layer_stack=("active", "contact", "metal1"),
+                                             dimensions=(1, self.num_of_tacts))
         
         self.add_active()
         self.add_implants()  
@@ -56,10 +67,9 @@ class ptx(design.design):
 
         # We can do this in ptx because we have offset all modules it uses.
         # Is this really true considering the paths that connect the src/drain?
-        self.height = max(max(obj.offset.y + obj.height for obj in self.objs),
-                                  max(inst.offset.y + inst.mod.height for inst in self.insts))
-        self.width = max(max(obj.offset.x + obj.width for obj in self.objs),
-                                 max(inst.offset.x + inst.mod.width for inst in self.insts))
+        (ll, ur) = self.shapes.bbox()
+        self.height = max(ur.y, max(inst.offset.y + inst.mod.height for inst in self.insts))
+        self.width = max(ur.x, max(inst.offset.x + inst.mod.width for inst in self.insts))
 
     def create_spice(self):
         self.spice.append("\n.SUBCKT {0} {1}".format(self.name,
@@ -104,7 +114,7 @@ class ptx(design.design):
                            offset=poly_connect_position,
                            width=poly_connect_length,
                            height=drc["minwidth_poly"])
-            self.poly_connect_index = len(self.objs) - 1
+            self.poly_connect_index = self.shapes.num_rects() - 1
 
     def pairwise(self, iterable):
         #"s -> (s0,s1), (s1,s2), (s2, s3), ..."
@@ -302,7 +312,7 @@ class ptx(design.design):
     def remove_poly_connect(self):
         # FIXME: This is horrible exception handling!
         try:
-            del self.objs[self.poly_connect_index]
+            self.shapes.delete_rect(self.poly_connect_index)
             self.offset_all_coordinates()
             # change the name so it is unique
             self.name = self.name + "_rp"
@@ -1,4 +1,5 @@
 import debug
+import factory
 import design
 from tech import drc
 from pinv import pinv
@@ -96,20 +97,20 @@ class replica_bitline(design.design):
                                                 [1, 1, 1])
         self.add_mod(self.delay_chain)
 
-        self.inv = pinv(nmos_width=drc["minwidth_tx"])
+        self.inv = factory.create(pinv, nmos_width=drc["minwidth_tx"])
         self.add_mod(self.inv)
 
         # These aren't for instantiating, but we use them to get the dimensions
-        self.poly_contact = contact(layer_stack=("poly", "contact", "metal1"))
-        self.m1m2_via = contact(layer_stack=("metal1", "via1", "metal2"))
-        self.m2m3_via = contact(layer_stack=("metal2", "via2", "metal3"))
+        self.poly_contact = factory.create(contact, layer_stack=("poly", "contact", "metal1"))
+        self.m1m2_via = factory.create(contact, layer_stack=("metal1", "via1", "metal2"))
+        self.m2m3_via = factory.create(contact, layer_stack=("metal2", "via2", "metal3"))
 
-        self.nor = nor_2(nmos_width=drc["minwidth_tx"])
+        self.nor = factory.create(nor_2, nmos_width=drc["minwidth_tx"])
         self.add_mod(self.nor)
 
-        self.access_tx = ptx(width=drc["minwidth_tx"],
-                             mults=1,
-                             tx_type="pmos")
+        self.access_tx = factory.create(ptx, width=drc["minwidth_tx"],
+                                        mults=1,
+                                        tx_type="pmos")
         self.add_mod(self.access_tx)
 
     def add_modules(self):
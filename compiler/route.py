@@ -1,5 +1,6 @@
 from tech import drc
 import debug
+import factory
 from contact import contact
 from itertools import tee
 from vector import vector
@@ -38,7 +39,7 @@ class route():
         self.horiz_layer_name = horiz_layer
         self.horiz_layer_width = drc["minwidth_{0}".format(horiz_layer)]
         # offset this by 1/2 the via size
-        self.c=contact(self.layer_stack, (1, 1))
+        self.c=factory.create(contact, self.layer_stack, (1, 1))
 
 
     def create_wires(self):
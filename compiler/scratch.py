@@ -0,0 +1,65 @@
+"""
+This provides job-scoped scratch directories for simulation and
+DRC/LVS. Each job (a spice run, a calibre run, etc.) gets its own
+uniquely named subdirectory of OPTS.openram_temp so that jobs can run
+concurrently in one process, in a pool of worker processes or in
+several OpenRAM processes sharing a temp directory. Nothing here
+changes the current working directory.
+
+A job directory is used with a with statement:
+
+    with scratch.scratch_dir('sim') as job:
+        write_stimulus(job.path + 'stim.sp')
+        ...
+
+The directory is removed when the job finishes. If the job raises an
+exception (including the SystemExit from debug.error) or calls
+job.fail(), the directory is kept for debugging when
+OPTS.keep_failed_temp is set.
+"""
+import os
+import shutil
+import tempfile
+import globals
+import debug
+
+OPTS = globals.get_opts()
+
+
+class scratch_dir:
+    """
+    A private temporary directory for a single simulation or
+    verification job. The path always ends with a slash.
+    """
+
+    def __init__(self, prefix="job"):
+        self.prefix = prefix
+        self.path = None
+        self.failed = False
+
+    def __enter__(self):
+        if not os.path.isdir(OPTS.openram_temp):
+            os.makedirs(OPTS.openram_temp, 0o750)
+        # mkdtemp is atomic so the name is unique across threads and processes
+        self.path = tempfile.mkdtemp(prefix=self.prefix + "_",
+                                     dir=OPTS.openram_temp) + "/"
+        debug.info(3, "Created scratch directory {0}".format(self.path))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type != None:
+            self.failed = True
+        if self.failed and OPTS.keep_failed_temp:
+            debug.info(1, "Keeping failed job directory {0}".format(self.path))
+        else:
+            shutil.rmtree(self.path, ignore_errors=True)
+        # never suppress the exception
+        return False
+
+    def fail(self):
+        """ Mark the job as failed so its files are kept. """
+        self.failed = True
+
+    def __str__(self):
+        """ override print function output """
+        return "scratch: " + str(self.path)
@@ -65,16 +65,19 @@ class sense_amp_array(design.design):
         self.add_mod(self.amp)
 
     def add_sense_amp(self):
+        self.add_inst_array(name="sa_d{col}",
+                            mod=self.amp,
+                            offset=[0, 0],
+                            cols=self.word_size,
+                            rows=1,
+                            pitch=[self.amp.width * self.words_per_row, 0])
+        self.connect_inst_array(self.sense_amp_conns)
         for i in range(self.word_size):
-            name = "sa_d{0}".format(i)
             index = i * self.words_per_row
             amp_position = vector(self.amp.width * index, 0)
             BL_offset = amp_position + vector(self.sense_amp_chars["BL"][0], 0) 
             BR_offset = amp_position + vector(self.sense_amp_chars["BR"][0], 0)
 
-            self.add_inst(name=name,
-                          mod=self.amp,
-                          offset=amp_position)
             self.amp_positions.append(amp_position)
             if (self.words_per_row == 1):
                 self.add_label(text="bl[{0}]".format(i),
@@ -83,9 +86,6 @@ class sense_amp_array(design.design):
                 self.add_label(text="br[{0}]".format(i),
                                layer="metal2",
                                offset=BR_offset)
-                self.connect_inst(["bl[{0}]".format(i),"br[{0}]".format(i), 
-                                   "data_out[{0}]".format(i), 
-                                   "sclk", "vdd", "gnd"])
             else:
                 self.add_label(text="bl_out[{0}]".format(index),
                                layer="metal2",
@@ -93,15 +93,23 @@ class sense_amp_array(design.design):
                 self.add_label(text="br_out[{0}]".format(index),
                                layer="metal2",
                                offset=BR_offset)
-                self.connect_inst(["bl_out[{0}]".format(index), "br_out[{0}]".format(index), 
-                                   "data_out[{0}]".format(i), 
-                                   "sclk", "vdd", "gnd"])
 
             self.add_label(text="data_out[{0}]".format(i),
                            layer="metal2",
                            offset=amp_position + self.sense_amp_chars["Dout"])
             self.Data_out_positions.append(amp_position + self.sense_amp_chars["Dout"])
 
+    def sense_amp_conns(self, row, col):
+        """ Returns the nets of the sense amp of a data bit. """
+        if (self.words_per_row == 1):
+            return ["bl[{0}]".format(col), "br[{0}]".format(col),
+                    "data_out[{0}]".format(col),
+                    "sclk", "vdd", "gnd"]
+        index = col * self.words_per_row
+        return ["bl_out[{0}]".format(index), "br_out[{0}]".format(index),
+                "data_out[{0}]".format(col),
+                "sclk", "vdd", "gnd"]
+
     def connect_rails(self):
         base_offset = vector(0, - 0.5 * drc["minwidth_metal1"])
         # add vdd rail across entire array
@@ -0,0 +1,162 @@
+"""
+This is a columnar store of the rectangles and labels of a layout.
+Instead of an object with two vectors per shape, each rectangle is a
+row of (layer, x, y, width, height) integers in GDS database units and
+each label is a row of (layer, x, y) with its text and zoom in lists.
+New rows are kept in a list until the table is used, so adding a shape
+is a tuple append, and translating, bounding and writing the shapes
+work on whole NumPy arrays.
+
+Coordinates are snapped to the manufacturing grid when they are added
+(like vector.snap_to_grid) and are returned in microns as multiples of
+the grid.
+"""
+import numpy as np
+import debug
+from tech import drc, GDS
+from vector import vector
+
+
+# The database units per grid step
+grid_db = int(round(drc["grid"] / GDS["unit"][0]))
+debug.check(abs(grid_db * GDS["unit"][0] - drc["grid"]) < 1e-9,
+            "The grid {0} isn't a multiple of the database unit.".format(drc["grid"]))
+
+
+def to_db(value):
+    """ Returns a coordinate in microns snapped to the grid in database
+    units. """
+    return int(round(round(value / drc["grid"], 2), 0)) * grid_db
+
+
+def to_microns(value):
+    """ Returns a coordinate (or an array of them) in database units in
+    microns. """
+    return (value // grid_db) * drc["grid"]
+
+
+class int_table:
+    """
+    A table of integer rows that grows by appending rows.
+    """
+
+    def __init__(self, num_columns):
+        self.rows = np.zeros((0, num_columns), dtype=np.int64)
+        self.pending = []
+
+    def append(self, row):
+        self.pending.append(row)
+
+    def array(self):
+        """ Returns the rows as an array. """
+        if len(self.pending) > 0:
+            self.rows = np.concatenate((self.rows, np.array(self.pending, dtype=np.int64)))
+            self.pending = []
+        return self.rows
+
+    def delete(self, index):
+        self.rows = np.delete(self.array(), index, axis=0)
+
+    def __len__(self):
+        return len(self.rows) + len(self.pending)
+
+
+class shape_store:
+    """
+    The rectangles and labels of a layout module.
+    """
+
+    def __init__(self):
+        # layer, x, y, width, height
+        self.rects = int_table(5)
+        # layer, x, y
+        self.labels = int_table(3)
+        self.label_texts = []
+        self.label_zooms = []
+
+    def add_rect(self, layerNumber, offset, width, height):
+        """ Adds a rectangle and returns its index. """
+        self.rects.append((layerNumber, to_db(offset[0]), to_db(offset[1]), to_db(width), to_db(height)))
+        return len(self.rects) - 1
+
+    def add_label(self, text, layerNumber, offset, zoom=-1):
+        """ Adds a text label. The default zoom is the one of the
+        technology. """
+        if zoom < 0:
+            zoom = GDS["zoom"]
+        self.labels.append((layerNumber, to_db(offset[0]), to_db(offset[1])))
+        self.label_texts.append(text)
+        self.label_zooms.append(zoom)
+
+    def delete_rect(self, index):
+        self.rects.delete(index)
+
+    def num_rects(self):
+        return len(self.rects)
+
+    def is_empty(self):
+        return len(self.rects) == 0 and len(self.labels) == 0
+
+    def translate(self, coordinate):
+        """ Moves every shape by -coordinate (in microns). """
+        offset = np.array([to_db(coordinate[0]), to_db(coordinate[1])], dtype=np.int64)
+        self.rects.array()[:, 1:3] -= offset
+        self.labels.array()[:, 1:3] -= offset
+
+    def points(self):
+        """ Returns the lower left and upper right corners of the
+        rectangles and the label positions as two (n, 2) arrays in
+        database units. """
+        rects = self.rects.array()
+        labels = self.labels.array()
+        lower = np.concatenate((rects[:, 1:3], labels[:, 1:3]))
+        upper = np.concatenate((rects[:, 1:3] + rects[:, 3:5], labels[:, 1:3]))
+        return (lower, upper)
+
+    def lowest(self):
+        """ Returns the lowest x and y of the offsets of the shapes or
+        None if there aren't any. """
+        if self.is_empty():
+            return None
+        (lower, upper) = self.points()
+        return vector(to_microns(lower.min(axis=0)).tolist())
+
+    def bbox(self):
+        """ Returns the lower left and upper right corners of the shapes
+        or None if there aren't any. """
+        if self.is_empty():
+            return None
+        (lower, upper) = self.points()
+        return (vector(to_microns(lower.min(axis=0)).tolist()),
+                vector(to_microns(upper.max(axis=0)).tolist()))
+
+    def gds_write_file(self, newLayout):
+        """ Writes the shapes to the root structure of a gdsMill layout. """
+        rects = self.rects.array()
+        (x0, y0) = (rects[:, 1], rects[:, 2])
+        (x1, y1) = (x0 + rects[:, 3], y0 + rects[:, 4])
+        # the closed polygon of each rectangle
+        coordinates = np.stack((x0, y0, x1, y0, x1, y1, x0, y1, x0, y0), axis=1).reshape(-1, 5, 2)
+        newLayout.addBoxes(rects[:, 0].tolist(), coordinates.tolist(), purposeNumber=0)
+
+        labels = self.labels.array()
+        offsets = to_microns(labels[:, 1:3]).tolist()
+        for (layerNumber, offset, text, zoom) in zip(labels[:, 0].tolist(), offsets,
+                                                     self.label_texts, self.label_zooms):
+            newLayout.addText(text=text,
+                              layerNumber=layerNumber,
+                              purposeNumber=0,
+                              offsetInMicrons=offset,
+                              magnification=zoom,
+                              rotate=None)
+
+    def descriptions(self):
+        """ Returns a string for each shape. """
+        text = []
+        for (layer, x, y, width, height) in self.rects.array().tolist():
+            text.append("rect: @[{0},{1}] {2}x{3} layer={4}".format(to_microns(x), to_microns(y),
+                                                                    to_microns(width), to_microns(height),
+                                                                    layer))
+        for ((layer, x, y), label) in zip(self.labels.array().tolist(), self.label_texts):
+            text.append("label: {0} @[{1},{2}] layer={3}".format(label, to_microns(x), to_microns(y), layer))
+        return text
@@ -1,5 +1,6 @@
 from math import log
 import design
+import factory
 from single_level_column_mux import single_level_column_mux 
 from contact import contact
 from tech import drc
@@ -51,7 +52,7 @@ class single_level_column_mux_array(design.design):
         self.add_mod(self.mux)
 
         # This is not instantiated and used for calculations only.
-        self.m1m2_via = contact(layer_stack=("metal1", "via1", "metal2"))
+        self.m1m2_via = factory.create(contact, layer_stack=("metal1", "via1", "metal2"))
 
 
     def setup_layout_constants(self):
@@ -203,7 +204,7 @@ class single_level_column_mux_array(design.design):
                           height= height -self.m1m2_via.width)
 
             # This is not instantiated and used for calculations only.
-            poly_contact = contact(layer_stack=("metal1", "contact", "poly"))
+            poly_contact = factory.create(contact, layer_stack=("metal1", "contact", "poly"))
             offset = offset.scale(1, 0) + vector(0, height - poly_contact.width)
             self.add_contact(layers=("metal1", "contact", "poly"),
                              offset=offset,
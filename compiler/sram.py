@@ -1,4 +1,5 @@
 import math
+import factory
 import sys
 from tech import drc, spice
 import debug
@@ -8,6 +9,7 @@ from contact import contact
 from bank import bank
 import datetime
 import getpass
+import numpy as np
 from vector import vector
 from globals import OPTS
 
@@ -28,7 +30,7 @@ class sram(design.design):
         # reset the static duplicate name checker for unit tests
         # in case we create more than one SRAM
         import design
-        design.design.name_map=[]
+        design.design.name_map={}
 
         self.ms_flop_chars = self.mod_ms_flop.chars
         self.bitcell_chars = self.mod_bitcell.chars
@@ -167,8 +169,8 @@ class sram(design.design):
             self.create_multibank_modules()
 
         # These aren't for instantiating, but we use them to get the dimensions
-        self.m1m2_via = contact(layer_stack=("metal1", "via1", "metal2"))
-        self.m2m3_via = contact(layer_stack=("metal2", "via2", "metal3"))
+        self.m1m2_via = factory.create(contact, layer_stack=("metal1", "via1", "metal2"))
+        self.m2m3_via = factory.create(contact, layer_stack=("metal2", "via2", "metal3"))
 
         self.bank_count = 0
 
@@ -1168,33 +1170,44 @@ class sram(design.design):
         sp.write("* User: {0}\n".format(getpass.getuser()))
         sp.write(".global {0} {1}\n".format(spice["vdd_name"], 
                                             spice["gnd_name"]))
-        usedMODS = list()
+        usedMODS = set()
         self.sp_write_file(sp, usedMODS)
         del usedMODS
         sp.close()
 
+    def analytical_delay(self, slews, loads):
+        """ Returns arrays of the analytical read delays and slews (ns)
+        of each (slew, load) point. The points are evaluated at once
+        with arrays through the module delay functions. """
+        slews = np.asarray(slews, dtype=float)
+        loads = np.asarray(loads, dtype=float)
+        bank_delay = self.bank.delay(slews, loads)
+        # stages with a constant delay (e.g. the flops) give scalars
+        shape = np.broadcast(slews, loads).shape
+        # Convert from ps to ns
+        delays = np.broadcast_to(bank_delay.delay, shape) / 1e3
+        slews = np.broadcast_to(bank_delay.slew, shape) / 1e3
+        return (delays, slews)
+
     def analytical_model(self,slews,loads):
-        LH_delay = []
-        HL_delay = []
-        LH_slew = []
-        HL_slew = []
-        for slew in slews:
-            for load in loads:
-                bank_delay = self.bank.delay(slew,load)
-                # Convert from ps to ns
-                LH_delay.append(bank_delay.delay/1e3)
-                HL_delay.append(bank_delay.delay/1e3)
-                LH_slew.append(bank_delay.slew/1e3)
-                HL_slew.append(bank_delay.slew/1e3)
+        # every slew with every load in one evaluation
+        slew_points = np.repeat(slews, len(loads))
+        load_points = np.tile(loads, len(slews))
+        (delays, slews) = self.analytical_delay(slew_points, load_points)
         
         data = {"min_period": 0, 
-                "delay1": LH_delay,
-                "delay0": HL_delay,
-                "slew1": LH_slew,
-                "slew0": HL_slew,
+                "delay1": delays.tolist(),
+                "delay0": delays.tolist(),
+                "slew1": slews.tolist(),
+                "slew0": slews.tolist(),
                 "read0_power": 0,
                 "read1_power": 0,
                 "write0_power": 0,
-                "write1_power": 0
+                "write1_power": 0,
+                "leakage_power": 0
                 }
+        # there is no model of the power tables (see delay.point_values)
+        for name in ["read0_internal_power", "read1_internal_power",
+                     "write0_internal_power", "write1_internal_power"]:
+            data[name] = [0]*len(delays)
         return data
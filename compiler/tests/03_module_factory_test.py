@@ -0,0 +1,77 @@
+#!/usr/bin/env python2.7
+"""
+Check that the module factory builds each parametric module once and
+that changed parameters give a different module
+"""
+
+import unittest
+from testutils import header
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+
+OPTS = globals.get_opts()
+
+#@unittest.skip("SKIPPING 03_module_factory_test")
+class module_factory_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+        # we will manually run lvs/drc
+        OPTS.check_lvsdrc = False
+
+        import factory
+        import contact
+        import ptx
+        import pinv
+        import tech
+
+        # positional, keyword and default arguments are the same module
+        via = factory.create(contact.contact, ("metal1", "via1", "metal2"))
+        self.assertTrue(via is factory.create(contact.contact,
+                                              layer_stack=["metal1", "via1", "metal2"],
+                                              dimensions=(1, 1)))
+        self.assertEqual(via.name, "metal1_via1_metal2_1x1")
+        self.assertFalse(via is factory.create(contact.contact, ("metal1", "via1", "metal2"), (1, 2)))
+
+        # the vias of a layout share one module
+        mods = len(factory.modules)
+        import design
+        cell = design.design("via_cell")
+        for i in range(10):
+            cell.add_via(("metal1", "via1", "metal2"), [0, 2*i])
+        self.assertEqual(len(factory.modules), mods)
+        self.assertEqual(len(set(id(inst.mod) for inst in cell.insts)), 1)
+        self.assertTrue(cell.insts[0].mod is via)
+
+        # the fingers of a connected transistor make it a different module
+        fet = factory.create(ptx.ptx, width=tech.drc["minwidth_tx"], mults=3, tx_type="nmos")
+        connected = factory.create(ptx.ptx, width=tech.drc["minwidth_tx"], mults=3, tx_type="nmos",
+                                   connect_poly=True, connect_active=True)
+        self.assertFalse(fet is connected)
+        self.assertNotEqual(fet.name, connected.name)
+        self.assertTrue(connected.shapes.num_rects() > fet.shapes.num_rects())
+
+        # gates are only built (and numbered) once
+        inv = factory.create(pinv.pinv, nmos_width=tech.drc["minwidth_tx"], beta=3)
+        self.assertTrue(inv is factory.create(pinv.pinv, tech.drc["minwidth_tx"]))
+
+        # a different class can't reuse a name
+        class other(design.design):
+            pass
+        with self.assertRaises(SystemExit):
+            other("via_cell")
+
+        factory.reset()
+        self.assertEqual(len(factory.modules), 0)
+        OPTS.check_lvsdrc = True
+        globals.end_openram()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python2.7
+"""
+Check that the columnar shape store snaps, moves and writes the
+rectangles and labels like the gdsMill boxes and texts
+"""
+
+import unittest
+from testutils import header
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+
+OPTS = globals.get_opts()
+
+#@unittest.skip("SKIPPING 03_shape_store_test")
+class shape_store_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+
+        import shape_store
+        import gdsMill
+        from tech import drc, GDS, layer
+        from vector import vector
+
+        grid = drc["grid"]
+        shapes = shape_store.shape_store()
+        self.assertEqual(shapes.lowest(), None)
+        shapes.add_rect(layer["metal1"], vector(3*grid, -2*grid), 10*grid, 4*grid)
+        # off grid coordinates are snapped
+        shapes.add_rect(layer["metal2"], [1.2*grid, 5*grid], 2*grid, 0.9*grid)
+        shapes.add_label("vdd", layer["metal1"], [-grid, 7*grid])
+        self.assertEqual(shapes.num_rects(), 2)
+
+        self.assertEqual(shapes.lowest(), vector(-grid, -2*grid))
+        (ll, ur) = shapes.bbox()
+        self.assertEqual((ll, ur), (vector(-grid, -2*grid), vector(13*grid, 7*grid)))
+        shapes.translate(vector(-grid, -2*grid))
+        self.assertEqual(shapes.lowest(), vector(0, 0))
+        self.assertEqual(shapes.bbox()[1], vector(14*grid, 9*grid))
+
+        # the boxes and texts are the ones that gdsMill makes itself
+        written = gdsMill.VlsiLayout(name="shapes", units=GDS["unit"])
+        shapes.gds_write_file(written)
+        golden = gdsMill.VlsiLayout(name="shapes", units=GDS["unit"])
+        golden.addBox(layer["metal1"], 0, [4*grid, 0], 10*grid, 4*grid)
+        golden.addBox(layer["metal2"], 0, [2*grid, 7*grid], 2*grid, grid)
+        golden.addText("vdd", layer["metal1"], 0, [0, 9*grid], GDS["zoom"])
+        (structure, golden_structure) = (written.structures["shapes"], golden.structures["shapes"])
+        self.assertEqual([(b.drawingLayer, [list(c) for c in b.coordinates]) for b in structure.boundaries],
+                         [(b.drawingLayer, [list(c) for c in b.coordinates]) for b in golden_structure.boundaries])
+        self.assertEqual([(t.textString, t.coordinates) for t in structure.texts],
+                         [(t.textString, t.coordinates) for t in golden_structure.texts])
+
+        # a rectangle can be removed
+        shapes.delete_rect(0)
+        self.assertEqual(shapes.num_rects(), 1)
+        self.assertEqual(len(shapes.descriptions()), 2)
+
+        globals.end_openram()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python2.7
+"""
+Check that a bitcell array is written as a GDS array reference that
+reads back as the same cells and that its netlist still has every cell
+"""
+
+import unittest
+from testutils import header
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+
+OPTS = globals.get_opts()
+
+#@unittest.skip("SKIPPING 05_bitcell_array_aref_test")
+class bitcell_array_aref_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+        # we will manually run lvs/drc
+        OPTS.check_lvsdrc = False
+
+        import bitcell_array
+        import gdsMill
+        from tech import GDS
+
+        # an odd number of rows leaves one row of single instances
+        (cols, rows) = (3, 5)
+        a = bitcell_array.bitcell_array(name="bitcell_array_aref", cols=cols, rows=rows)
+        tempgds = OPTS.openram_temp + "temp.gds"
+        a.gds_write(tempgds)
+
+        layout = gdsMill.VlsiLayout(units=GDS["unit"])
+        reader = gdsMill.Gds2reader(layout)
+        reader.loadFromFile(tempgds)
+        os.remove(tempgds)
+
+        array = layout.structures[a.name]
+        self.assertEqual(len(array.arefs), 1)
+        self.assertEqual((array.arefs[0].columns, array.arefs[0].rows), (cols, rows // 2))
+        self.assertEqual(len(array.srefs), cols)
+
+        # the references of the unit of two rows are the flipped cells
+        cells = []
+        for ref in array.references():
+            if ref.sName == a.cell.name:
+                cells.append((ref.coordinates, bool(ref.transFlags[0])))
+                continue
+            for cell in layout.structures[ref.sName].references():
+                cells.append(((ref.coordinates[0] + cell.coordinates[0],
+                               ref.coordinates[1] + cell.coordinates[1]),
+                              bool(cell.transFlags[0])))
+        expected = []
+        for (name, row, col) in a.cell_array.instances():
+            (offset, mirror) = a.cell_array.placement(row, col)
+            expected.append(((layout.userUnits(offset.x), layout.userUnits(offset.y)), mirror == "MX"))
+        self.assertEqual(sorted(cells), sorted(expected))
+
+        tempspice = OPTS.openram_temp + "temp.sp"
+        a.sp_write(tempspice)
+        netlist = open(tempspice).read().splitlines()
+        os.remove(tempspice)
+        cell_lines = [x for x in netlist if x.startswith("Xbit_r")]
+        self.assertEqual(len(cell_lines), cols*rows)
+        self.assertTrue("Xbit_r4_c2 bl[2] br[2] wl[4] vdd gnd {0}".format(a.cell.name) in cell_lines)
+
+        OPTS.check_lvsdrc = True
+        globals.end_openram()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
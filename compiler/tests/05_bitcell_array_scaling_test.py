@@ -0,0 +1,92 @@
+#!/usr/bin/env python2.7
+"""
+Check that a module with many instances registers each instance and
+its module once and writes each module once, and benchmark building
+and writing the netlist of 64x1024 and 128x4096 arrays
+"""
+
+import unittest
+from testutils import header
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+import time
+
+OPTS = globals.get_opts()
+
+#@unittest.skip("SKIPPING 05_bitcell_array_scaling_test")
+class bitcell_array_scaling_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+        # we will manually run lvs/drc
+        OPTS.check_lvsdrc = False
+
+        import design
+        import bitcell
+        import bitcell_array
+        from vector import vector
+
+        # a row of single instances (not an instance array)
+        cell = bitcell.bitcell()
+        count = 2048
+        row = design.design("bitcell_row_scaling")
+        row.add_pin_list(["WL", "vdd", "gnd"])
+        for col in range(count):
+            row.add_mod(cell)
+            row.add_inst(name="bit_c{0}".format(col),
+                         mod=cell,
+                         offset=vector(col*cell.width, 0))
+            row.connect_inst(["bl[{0}]".format(col), "br[{0}]".format(col), "WL", "vdd", "gnd"])
+        self.assertEqual(len(row.mods), 1)
+        self.assertEqual(len(row.insts), count)
+        self.assertEqual(len(row.inst_map), count)
+        self.assertTrue(row.inst_map["bit_c17"] is row.insts[17])
+
+        # another cell of the same class and pins is the same subckt
+        row.add_mod(bitcell.bitcell())
+        self.assertEqual(len(row.mods), 1)
+
+        # the cell is written once however many instances use it
+        tempspice = OPTS.openram_temp + "temp.sp"
+        row.sp_write(tempspice)
+        netlist = open(tempspice).read().splitlines()
+        os.remove(tempspice)
+        self.assertEqual(len([x for x in netlist if x.startswith(".SUBCKT {0} ".format(cell.name))]), 1)
+        self.assertEqual(len([x for x in netlist if x.startswith("Xbit_c")]), count)
+
+        # a different module of a name that is already used is an error
+        first = design.design("bitcell_row_scaling_mod")
+        second = design.design("bitcell_row_scaling_mod")
+        second.add_pin("A")
+        row.add_mod(first)
+        with self.assertRaises(SystemExit):
+            row.add_mod(second)
+
+        # only a benchmark, the times depend on the machine
+        if OPTS.debug_level >= 1:
+            for (cols, rows) in [(64, 1024), (128, 4096)]:
+                start = time.time()
+                a = bitcell_array.bitcell_array(name="bitcell_array_{0}x{1}".format(cols, rows),
+                                                cols=cols,
+                                                rows=rows)
+                built = time.time()
+                a.sp_write(tempspice)
+                written = time.time()
+                os.remove(tempspice)
+                debug.info(1, "{0}x{1} array: build {2:.2f}s netlist {3:.2f}s".format(cols, rows,
+                                                                                  built - start,
+                                                                                  written - built))
+                del a
+
+        OPTS.check_lvsdrc = True
+        globals.end_openram()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python2.7
+"""
+Check that the analytical delay model evaluates arrays of slews and
+loads like one point at a time
+"""
+
+import unittest
+from testutils import header,isclose
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+
+OPTS = globals.get_opts()
+
+#@unittest.skip("SKIPPING 20_sram_analytical_delay_test")
+class sram_analytical_delay_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+        # we will manually run lvs/drc
+        OPTS.check_lvsdrc = False
+
+        import sram
+        import numpy as np
+
+        debug.info(1, "Analytical delay of a two bit, 16 words SRAM with 1 bank")
+        s = sram.sram(word_size=2,
+                      num_words=16,
+                      num_banks=1,
+                      name="sram_2_16_1_{0}".format(OPTS.tech_name))
+        OPTS.check_lvsdrc = True
+
+        # a sweep of points in one evaluation
+        np.random.seed(0)
+        slews = np.random.uniform(0.01, 1.0, 100)
+        loads = np.random.uniform(1.0, 100.0, 100)
+        (delays, out_slews) = s.analytical_delay(slews, loads)
+        self.assertEqual(delays.shape, slews.shape)
+        self.assertEqual(out_slews.shape, slews.shape)
+        for i in range(len(slews)):
+            bank_delay = s.bank.delay(float(slews[i]), float(loads[i]))
+            self.assertTrue(isclose(delays[i], bank_delay.delay/1e3, 1e-9))
+            self.assertTrue(isclose(out_slews[i], bank_delay.slew/1e3, 1e-9))
+
+        # the table is every slew with every load
+        table_slews = [0.025, 0.1, 0.8]
+        table_loads = [2.0, 8.0, 64.0]
+        data = s.analytical_model(table_slews, table_loads)
+        self.assertEqual(len(data["delay1"]), 9)
+        for i in range(len(table_slews)):
+            for j in range(len(table_loads)):
+                bank_delay = s.bank.delay(table_slews[i], table_loads[j])
+                self.assertTrue(isclose(data["delay0"][3*i+j], bank_delay.delay/1e3, 1e-9))
+                self.assertTrue(isclose(data["slew1"][3*i+j], bank_delay.slew/1e3, 1e-9))
+
+        globals.end_openram()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python2.7
+"""
+Run the delay and setup/hold characterization end-to-end with the
+in-process analytic simulator
+"""
+
+import unittest
+from testutils import header,isclose
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+
+OPTS = globals.get_opts()
+
+#@unittest.skip("SKIPPING 21_analytic_simulator_test")
+class analytic_simulator_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+        # we will manually run lvs/drc
+        OPTS.check_lvsdrc = False
+        OPTS.spice_version="analytic"
+        OPTS.force_spice = True
+        use_sim_cache = OPTS.use_sim_cache
+        OPTS.use_sim_cache = False
+        globals.set_spice()
+        self.assertEqual(OPTS.spice_exe, "")
+
+        import sram
+        import tech
+
+        debug.info(1, "Testing timing for sample 1bit, 16words SRAM with 1 bank")
+        s = sram.sram(word_size=OPTS.config.word_size,
+                      num_words=OPTS.config.num_words,
+                      num_banks=OPTS.config.num_banks,
+                      name="test_sram1")
+
+        import delay
+
+        tempspice = OPTS.openram_temp + "temp.sp"
+        s.sp_write(tempspice)
+
+        probe_address = "1" * s.addr_size
+        probe_data = s.word_size - 1
+        d = delay.delay(s,tempspice)
+        loads = [tech.spice["FF_in_cap"]*4]
+        slews = [tech.spice["rise_time"]*2]
+        data = d.analyze(probe_address, probe_data,slews,loads)
+
+        # the delays are the analytical model and the min period is about
+        # where the read no longer fits in half of the period
+        (model_delays, model_slews) = s.analytical_delay(slews[0], loads[0])
+        (model_delay, model_slew) = (float(model_delays), float(model_slews))
+        self.assertTrue(isclose(data["delay0"][0], model_delay))
+        self.assertTrue(isclose(data["delay1"][0], model_delay))
+        self.assertTrue(isclose(data["slew1"][0], model_slew))
+        read_time = 2*(model_delay + model_slew)
+        self.assertTrue(0.95*read_time <= data["min_period"] <= 1.05*read_time)
+
+        # a batched simulation gives the same results
+        OPTS.batch_sims = True
+        results = d.run_points([(data["min_period"], loads[0], slews[0]), (0.8*read_time, loads[0], slews[0])])
+        OPTS.batch_sims = False
+        self.assertEqual(results[0], d.run_simulation(data["min_period"], loads[0], slews[0]))
+        self.assertTrue(results[1][1] > 1.5*model_delay)
+
+        # the flop is captured with the setup and hold times of the technology
+        import setup_hold
+        sh = setup_hold.setup_hold()
+        times = sh.analyze(slews,slews)
+        setup = tech.spice["msflop_setup"]/1e3
+        hold = tech.spice["msflop_hold"]/1e3
+        for name in ["setup_times_LH", "setup_times_HL"]:
+            self.assertTrue(abs(times[name][0] - setup) < 0.01)
+        for name in ["hold_times_LH", "hold_times_HL"]:
+            self.assertTrue(abs(times[name][0] - hold) < 0.01)
+
+        # reset these options
+        OPTS.check_lvsdrc = True
+        OPTS.spice_version="hspice"
+        OPTS.force_spice = False
+        OPTS.use_sim_cache = use_sim_cache
+        globals.set_spice()
+
+        os.remove(tempspice)
+
+        globals.end_openram()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
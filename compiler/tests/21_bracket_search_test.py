@@ -0,0 +1,68 @@
+#!/usr/bin/env python2.7
+"""
+Check the K-ary bracket search with the secant step
+"""
+
+import unittest
+from testutils import header,isclose
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+
+OPTS = globals.get_opts()
+
+#@unittest.skip("SKIPPING 21_bracket_search_test")
+class bracket_search_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+
+        import charutils as ch
+
+        # the probes don't depend on the number of processes
+        (search_arity, num_procs) = (OPTS.search_arity, OPTS.num_procs)
+        arities = []
+        for OPTS.num_procs in [1, 2, 16]:
+            arities.append(ch.search_arity())
+        self.assertEqual(arities, [search_arity]*3)
+        OPTS.num_procs = num_procs
+
+        # points above 3.21 pass and the metric is linear
+        self.rounds = 0
+        def evaluate(points):
+            self.rounds += 1
+            return [(x >= 3.21, 3.21 - x, 2*x) for x in points]
+
+        for arity in [2, 3, 8]:
+            OPTS.search_arity = arity
+            self.rounds = 0
+            (x, data) = ch.bracket_search(evaluate, feasible=5.0, infeasible=1.0, tolerance=0.001,
+                                          feasible_result=(True, 3.21 - 5.0, 10.0))
+            self.assertTrue(x >= 3.21)
+            self.assertTrue(isclose(x, 3.21, 0.001))
+            self.assertEqual(data, 2*x)
+            # a bisection would take 11 rounds
+            self.assertTrue(self.rounds < 11)
+
+        # without a metric (e.g. failed simulations) it is a plain K-ary
+        # search and the feasible end can be the lower one
+        OPTS.search_arity = 3
+        self.rounds = 0
+        def evaluate_pass_fail(points):
+            self.rounds += 1
+            return [(x <= 3.21, None, x) for x in points]
+        (x, data) = ch.bracket_search(evaluate_pass_fail, feasible=0.5, infeasible=5.0, tolerance=0.05)
+        self.assertTrue(x <= 3.21)
+        self.assertTrue(ch.relative_compare(x, 3.21, 0.05))
+
+        OPTS.search_arity = search_arity
+        globals.end_openram()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python2.7
+"""
+Check that the feasible period search starts from the analytical delay
+and doubles it when the model underestimates, and that the min period
+search continues below a lower bound that is too high
+"""
+
+import unittest
+from testutils import header
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+
+OPTS = globals.get_opts()
+
+#@unittest.skip("SKIPPING 21_feasible_period_test")
+class feasible_period_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+        # we will manually run lvs/drc
+        OPTS.check_lvsdrc = False
+        spice_version = OPTS.spice_version
+        OPTS.spice_version="analytic"
+        OPTS.force_spice = True
+        use_sim_cache = OPTS.use_sim_cache
+        OPTS.use_sim_cache = False
+        # the simulations run in this process so they can be recorded
+        num_procs = OPTS.num_procs
+        OPTS.num_procs = 1
+        globals.set_spice()
+
+        import sram
+        import tech
+        import charutils as ch
+
+        debug.info(1, "Testing the period searches of a sample 1bit, 16words SRAM with 1 bank")
+        s = sram.sram(word_size=OPTS.config.word_size,
+                      num_words=OPTS.config.num_words,
+                      num_banks=OPTS.config.num_banks,
+                      name="test_sram1")
+
+        import delay
+
+        tempspice = OPTS.openram_temp + "temp.sp"
+        s.sp_write(tempspice)
+
+        d = delay.delay(s,tempspice)
+        d.set_probe("1" * s.addr_size, s.word_size - 1)
+        load = tech.spice["FF_in_cap"]*4
+        slew = tech.spice["rise_time"]*2
+
+        # the periods of the simulations
+        periods = []
+        run_simulation = d.run_simulation
+        def record(period, load, slew):
+            periods.append(period)
+            return run_simulation(period, load, slew)
+        d.run_simulation = record
+
+        # the read fits in half of the seeded period
+        predicted_delay = d.predict_delay(load, slew)
+        (feasible_period, delay1, delay0) = d.find_feasible_period(load, slew)
+        self.assertEqual(periods, [ch.round_time(4.0 * predicted_delay)])
+        self.assertEqual(feasible_period, periods[0])
+
+        # an underestimate is doubled until the read fits
+        predict_delay = d.predict_delay
+        d.predict_delay = lambda load, slew: predicted_delay / 20
+        del periods[:]
+        (doubled_period, doubled_delay1, doubled_delay0) = d.find_feasible_period(load, slew)
+        self.assertTrue(len(periods) > 1)
+        self.assertEqual(periods[0], ch.round_time(4.0 * predicted_delay / 20))
+        for (period, next_period) in zip(periods, periods[1:]):
+            self.assertEqual(next_period, 2 * period)
+        self.assertEqual(doubled_period, periods[-1])
+        self.assertTrue(abs(doubled_delay1 - delay1) < 0.05*delay1)
+
+        # the doubling times out
+        d.predict_delay = lambda load, slew: predicted_delay / 200
+        with self.assertRaises(SystemExit):
+            d.find_feasible_period(load, slew)
+
+        # without a prediction it starts at the period of the technology
+        d.predict_delay = lambda load, slew: None
+        del periods[:]
+        d.find_feasible_period(load, slew)
+        self.assertEqual(periods[0], tech.spice["feasible_period"])
+        d.predict_delay = predict_delay
+
+        # a lower bound above the min period is searched below
+        min_period = d.find_min_period(feasible_period, load, slew, delay1, delay0)
+        lower_bounds = []
+        find_min_period = d.find_min_period
+        def record_search(feasible_period, load, slew, delay1, delay0, lower_bound=0.0):
+            lower_bounds.append(lower_bound)
+            return find_min_period(feasible_period, load, slew, delay1, delay0, lower_bound)
+        d.find_min_period = record_search
+        lower_bound = ch.round_time(1.2 * min_period)
+        self.assertTrue(lower_bound < feasible_period)
+        searched_period = d.find_min_period(feasible_period, load, slew, delay1, delay0, lower_bound)
+        self.assertEqual(lower_bounds, [lower_bound, 0.0])
+        self.assertTrue(searched_period < lower_bound)
+        self.assertTrue(ch.relative_compare(searched_period, min_period, error_tolerance=0.05))
+
+        # the probes of a search have the time step of the feasible period
+        import stimuli
+        d.step_period = feasible_period
+        d.write_stimulus(0.5 * feasible_period, load, slew, OPTS.openram_temp)
+        stim = open(OPTS.openram_temp + "stim.sp").read()
+        self.assertTrue(".TRAN {0} ".format(stimuli.time_str(stimuli.tran_step(feasible_period))) in stim)
+
+        # reset these options
+        OPTS.check_lvsdrc = True
+        OPTS.spice_version = spice_version
+        OPTS.force_spice = False
+        OPTS.use_sim_cache = use_sim_cache
+        OPTS.num_procs = num_procs
+        globals.set_spice()
+
+        os.remove(tempspice)
+
+        globals.end_openram()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python2.7
+"""
+Check the Monte Carlo engine against failure rates that are known and
+the mismatch stimuli of the bitcell read and write margins
+"""
+
+import unittest
+from testutils import header
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+
+OPTS = globals.get_opts()
+
+def linear_margin(limit, x):
+    """ A margin that fails when the mean of the variables is beyond
+    limit standard deviations. """
+    return limit - sum(x) / len(x)**0.5
+
+#@unittest.skip("SKIPPING 21_monte_carlo_test")
+class monte_carlo_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+        # we will manually run lvs/drc
+        OPTS.check_lvsdrc = False
+
+        import monte_carlo
+
+        # plain runs stop once the interval is within 10% of the rate
+        expected = monte_carlo.normal_cdf(-1.0)
+        results = monte_carlo.estimate(linear_margin, 1.0, 2)
+        self.assertTrue(results["runs"] < OPTS.mc_max_runs)
+        (low, high) = results["confidence_interval"]
+        self.assertTrue(low <= expected <= high)
+        self.assertTrue(0.5*(high - low) <= OPTS.mc_ci_target * results["failure_rate"])
+        self.assertTrue(abs(results["sigma"] - 1.0) < 0.1)
+
+        # the seeds are per run, so the results don't depend on the processes
+        num_procs = OPTS.num_procs
+        OPTS.num_procs = 1
+        self.assertEqual(monte_carlo.estimate(linear_margin, 1.0, 2), results)
+        OPTS.num_procs = num_procs
+
+        # a 4.5 sigma failure rate from thousands of runs
+        expected = monte_carlo.normal_cdf(-4.5)
+        results = monte_carlo.estimate(linear_margin, 4.5, 2, importance_sampling=True)
+        self.assertEqual(results["pilot_runs"], OPTS.mc_pilot_runs)
+        self.assertTrue(results["shift"] > 4.5)
+        self.assertTrue(results["failures"] >= monte_carlo.min_failures)
+        self.assertTrue(results["runs"] <= OPTS.mc_max_runs)
+        self.assertTrue(abs(results["failure_rate"] - expected) < 0.3*expected)
+
+        # every transistor of the cell and sense amp has a mismatch parameter
+        import sram
+        import tech
+        debug.info(1, "Testing the Monte Carlo stimuli of a sample 1bit, 16words SRAM with 1 bank")
+        s = sram.sram(word_size=OPTS.config.word_size,
+                      num_words=OPTS.config.num_words,
+                      num_banks=OPTS.config.num_banks,
+                      name="sram_1_16_1_{0}".format(OPTS.tech_name))
+        OPTS.check_lvsdrc = True
+
+        mc = monte_carlo.monte_carlo(s, "read")
+        self.assertEqual(len(mc.variables), 13)
+        mc.write_stimulus(OPTS.openram_temp, [1.0]*len(mc.variables))
+        stim = open(OPTS.openram_temp + "stim.sp").read()
+        self.assertEqual(stim.count("delvto="), 13)
+        self.assertTrue(".meas tran TIMING" in stim)
+        self.assertTrue("v({0})=0".format(mc.q) in stim)
+        (param, sigma) = mc.variables[0]
+        self.assertTrue("{0}={1:.6g}".format(param, sigma) in stim)
+
+        # the runs sense after the nominal bitline development time
+        mc.timing = 1.0
+        mc.write_stimulus(OPTS.openram_temp, [0.0]*len(mc.variables))
+        stim = open(OPTS.openram_temp + "stim.sp").read()
+        self.assertTrue(".meas tran OUT FIND v(dout)" in stim)
+        self.assertTrue("Vsclk sclk 0 PWL" in stim)
+        self.assertEqual(mc.margin({"out": 0.0}), 0.5*tech.spice["supply_voltage"])
+        self.assertTrue(mc.margin({"out": False}) < 0)
+
+        # a write only varies the cell
+        mc = monte_carlo.monte_carlo(s, "write")
+        self.assertEqual(len(mc.variables), 6)
+        mc.timing = 1.0
+        mc.write_stimulus(OPTS.openram_temp, [0.0]*len(mc.variables))
+        stim = open(OPTS.openram_temp + "stim.sp").read()
+        self.assertTrue(".meas tran OUT FIND v({0})".format(mc.q) in stim)
+        self.assertFalse("sense_amp" in stim)
+
+        globals.end_openram()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python2.7
+"""
+Check the binary raw waveform reader and the waveform measurements
+"""
+
+import unittest
+from testutils import header,isclose
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+
+OPTS = globals.get_opts()
+
+#@unittest.skip("SKIPPING 21_rawfile_test")
+class rawfile_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+
+        import numpy as np
+        import rawfile
+        import measure
+
+        # 0-10ns: clk falls from 5V to 0V between 2ns and 3ns and the
+        # data rises from 0V to 5V between 4ns and 6ns. The supply
+        # current ramps from 1mA to 2mA while the data rises.
+        time = np.linspace(0, 10e-9, 101)
+        clk = np.interp(time, [0, 2e-9, 3e-9, 10e-9], [5.0, 5.0, 0.0, 0.0])
+        data = np.interp(time, [0, 4e-9, 6e-9, 10e-9], [0.0, 0.0, 5.0, 5.0])
+        vdd = 5.0 * np.ones(len(time))
+        current = np.interp(time, [0, 4e-9, 6e-9, 10e-9], [-1e-3, -1e-3, -2e-3, -2e-3])
+
+        # a second plot follows the first to check that it is skipped
+        raw_name = OPTS.openram_temp + "timing.raw"
+        self.write_plot(raw_name, "w", ["time", "v(clk)"], [time, clk])
+        self.write_plot(raw_name, "a",
+                        ["time", "v(clk)", "d[1]", "vdd", "vvdd#branch"],
+                        [time, clk, data, vdd, current])
+
+        waveform = rawfile.rawfile(raw_name, plot=1)
+        self.assertEqual(waveform.num_points, len(time))
+        # names are normalized: v(x) is x and i(vx) is vx#branch
+        self.assertTrue(waveform.has_signal("V(D[1])"))
+        self.assertTrue(waveform.has_signal("clk"))
+        self.assertTrue(waveform.has_signal("i(vvdd)"))
+        self.assertFalse(waveform.has_signal("v(d[0])"))
+        self.assertTrue(np.allclose(waveform.signal("v(d[1])"), data))
+
+        # 50% clk to 50% data, the crossings are interpolated
+        d = measure.delay(waveform.time(),
+                          waveform.signal("v(clk)"), 2.5, "FALL",
+                          waveform.signal("v(d[1])"), 2.5, "RISE",
+                          [0, 1e-9, 8e-9])
+        self.assertTrue(isclose(d[0]*1e9, 2.5))
+        self.assertTrue(isclose(d[1]*1e9, 2.5))
+        # no edges after 8ns
+        self.assertTrue(np.isnan(d[2]))
+        self.assertEqual(measure.as_measure(d[2]), False)
+
+        # 10-90% of a 2ns ramp
+        s = measure.slew(time, data, 5.0, "RISE", 0)
+        self.assertTrue(isclose(s[0]*1e9, 1.6))
+        self.assertEqual(len(measure.crossings(time, clk, 2.5, "RISE")), 0)
+
+        # average power in several windows at once, the window edges
+        # do not have to be time points
+        p = measure.average_power(time, vdd, current, [0, 6e-9, 4.55e-9], [4e-9, 10e-9, 5.45e-9])
+        self.assertTrue(isclose(p[0], 5e-3))
+        self.assertTrue(isclose(p[1], 10e-3))
+        self.assertTrue(isclose(p[2], 7.5e-3))
+
+        os.remove(raw_name)
+        globals.end_openram()
+
+    def write_plot(self, filename, mode, names, signals):
+        """ Writes a plot in the binary SPICE3 raw format. """
+        import numpy as np
+        f = open(filename, mode + "b")
+        f.write("Title: test\n")
+        f.write("Plotname: Transient Analysis\n")
+        f.write("Flags: real\n")
+        f.write("No. Variables: {0}\n".format(len(names)))
+        f.write("No. Points: {0}\n".format(len(signals[0])))
+        f.write("Variables:\n")
+        for i in range(len(names)):
+            f.write("\t{0}\t{1}\tvoltage\n".format(i, names[i]))
+        f.write("Binary:\n")
+        f.write(np.array(signals, dtype="<f8").T.tobytes())
+        f.close()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python2.7
+"""
+Check the simulation result cache keys, hits and LRU eviction and the
+cached characterization data
+"""
+
+import unittest
+from testutils import header
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+
+OPTS = globals.get_opts()
+
+#@unittest.skip("SKIPPING 21_sim_cache_test")
+class sim_cache_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+        OPTS.sim_cache_dir = OPTS.openram_temp + "sim_cache/"
+
+        import sim_cache
+
+        # the included file path should not matter, only its contents
+        include1 = OPTS.openram_temp + "netlist1.sp"
+        include2 = OPTS.openram_temp + "netlist2.sp"
+        self.write_file(include1, "* netlist\n")
+        self.write_file(include2, "* netlist\n")
+        stim1 = OPTS.openram_temp + "stim1.sp"
+        stim2 = OPTS.openram_temp + "stim2.sp"
+        self.write_file(stim1, ".include \"{0}\"\n.end\n".format(include1))
+        self.write_file(stim2, ".include \"{0}\"\n.end\n".format(include2))
+        key = sim_cache.get_key(stim1)
+        self.assertEqual(key, sim_cache.get_key(stim2))
+
+        # a different netlist is a different simulation
+        self.write_file(include2, "* another netlist\n")
+        self.assertNotEqual(key, sim_cache.get_key(stim2))
+
+        # miss, store and then hit
+        output = OPTS.openram_temp + "timing.lis"
+        fetched = OPTS.openram_temp + "fetched.lis"
+        self.write_file(output, "delay0 = 1.0e-10\n")
+        self.assertFalse(sim_cache.fetch(key, fetched))
+        sim_cache.store(key, output)
+        self.assertTrue(sim_cache.fetch(key, fetched))
+        self.assertEqual(open(fetched).read(), "delay0 = 1.0e-10\n")
+
+        # the least recently used result is evicted first
+        OPTS.sim_cache_size = 2*len("delay0 = 1.0e-10\n")
+        os.utime(sim_cache.cache_name(key), (0, 0))
+        sim_cache.store("newer1", output)
+        sim_cache.store("newer2", output)
+        self.assertFalse(sim_cache.fetch(key, fetched))
+        self.assertTrue(sim_cache.fetch("newer2", fetched))
+
+        # characterization data is stored as JSON
+        OPTS.sim_cache_size = 1000000000
+        times = {"setup_times_LH": [0.1, 0.25], "hold_times_LH": [-0.05, 0.0]}
+        self.assertEqual(sim_cache.fetch_data("times"), None)
+        sim_cache.store_data("times", times)
+        self.assertEqual(sim_cache.fetch_data("times"), times)
+
+        sim_cache.clear()
+        self.assertFalse(sim_cache.fetch("newer2", fetched))
+        self.assertEqual(sim_cache.fetch_data("times"), None)
+
+        # the analytic backend is keyed without its (missing) model
+        # files and the directory it runs in
+        import tech
+        import setup_hold
+        (spice_version, models) = (OPTS.spice_version, tech.spice["fet_models"])
+        OPTS.spice_version = "analytic"
+        globals.set_spice()
+        tech.spice["fet_models"] = [OPTS.openram_temp + "missing_models.sp"]
+        sh = setup_hold.setup_hold()
+        key = sh.cache_key([0.1], [0.1])
+        cwd = os.getcwd()
+        os.chdir(OPTS.openram_temp)
+        self.assertEqual(sim_cache.simulator_id(), "analytic {0}".format(globals.VERSION))
+        self.assertEqual(sh.cache_key([0.1], [0.1]), key)
+        os.chdir(cwd)
+        # the searches stop elsewhere with another arity
+        search_arity = OPTS.search_arity
+        OPTS.search_arity = search_arity + 1
+        self.assertNotEqual(sh.cache_key([0.1], [0.1]), key)
+        OPTS.search_arity = search_arity
+        (OPTS.spice_version, tech.spice["fet_models"]) = (spice_version, models)
+        globals.set_spice()
+
+        OPTS.sim_cache_dir = os.path.expanduser("~/.openram/sim_cache/")
+        OPTS.sim_cache_size = 1000000000
+        globals.end_openram()
+
+    def write_file(self, filename, contents):
+        f = open(filename, "w")
+        f.write(contents)
+        f.close()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python2.7
+"""
+Check the persistent simulator session against a stand-in simulator
+that speaks the ngspice pipe mode commands
+"""
+
+import unittest
+from testutils import header
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+
+OPTS = globals.get_opts()
+
+# A stand-in for ngspice -p. It answers each .meas of the loaded
+# stimulus with stim_period*1e-10, counts the loaded stimuli and
+# logs when it starts and quits to <executable>.log.
+standin_simulator = """#!{0}
+import sys
+open(sys.argv[0] + ".log", "a").write("start\\n")
+params = {{}}
+meas = []
+sources = 0
+for line in iter(sys.stdin.readline, ""):
+    words = line.split()
+    if len(words) == 0:
+        continue
+    if words[0] == "echo":
+        sys.stdout.write(" ".join(words[1:]) + "\\n")
+    elif words[0] == "source":
+        sources += 1
+        meas = []
+        for card in open(words[1]):
+            card = card.split()
+            if len(card) > 0 and card[0] == ".param":
+                params = dict(p.split("=") for p in card[1:])
+            elif len(card) > 2 and card[0] == ".meas":
+                meas.append(card[2])
+    elif words[0] == "alterparam":
+        (name, value) = words[1].split("=")
+        params[name] = value
+    elif words[0] == "run":
+        for name in meas:
+            sys.stdout.write("{{0}} = {{1:e}}\\n".format(name, 1e-10*float(params["stim_period"])))
+        sys.stdout.write("sources = {{0}}\\n".format(sources))
+    elif words[0] == "write":
+        open(words[1], "w").write("waveform\\n")
+    elif words[0] == "quit":
+        open(sys.argv[0] + ".log", "a").write("quit\\n")
+        break
+    sys.stdout.flush()
+"""
+
+def write_stimulus(path, period, meas_name):
+    """ Writes a stimulus with a period parameter and one measure. """
+    stim = open(path + "stim.sp", "w")
+    stim.write("* Stimulus for period of {0}n\n".format(period))
+    stim.write(".param stim_period={0} stim_slew=0.1 stim_load=1.0\n".format(period))
+    stim.write("VCLK clk 0 PULSE (0 5 1n 0.1n 0.1n {0.5e-9*stim_period} {1e-9*stim_period})\n")
+    stim.write(".meas tran {0} TRIG v(clk) VAL=2.5 RISE=1 TARG v(clk) VAL=2.5 FALL=1\n".format(meas_name))
+    stim.write(".end\n")
+    stim.close()
+
+def simulate_period(period):
+    """ Returns the measure of a stimulus with a period simulated in a
+    scratch directory of a worker process. """
+    import scratch
+    import stimuli
+    import charutils as ch
+    with scratch.scratch_dir("session") as job:
+        write_stimulus(job.path, period, "DELAY0")
+        stimuli.run_sim(job.path)
+        return ch.parse_spice_list("timing", job.path)["delay0"]
+
+#@unittest.skip("SKIPPING 21_sim_session_test")
+class sim_session_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+        OPTS.spice_version = "ngspice"
+        OPTS.sim_sessions = True
+        use_sim_cache = OPTS.use_sim_cache
+        OPTS.use_sim_cache = False
+
+        import sim_session
+        import stimuli
+        import charutils as ch
+
+        OPTS.spice_exe = OPTS.openram_temp + "standin_ngspice"
+        self.write_file(OPTS.spice_exe, standin_simulator.format(sys.executable))
+        os.chmod(OPTS.spice_exe, 0o755)
+
+        # the stimuli of a search only differ in their parameters
+        self.write_stimulus(5.0, "DELAY0")
+        stimuli.run_sim()
+        session = sim_session.get_session()
+        measures = ch.parse_spice_list("timing")
+        self.assertEqual(measures["delay0"], 5e-10)
+        self.assertEqual(measures["sources"], 1)
+
+        # the loaded circuit is reused with new parameters
+        self.write_stimulus(2.5, "DELAY0")
+        stimuli.run_sim()
+        measures = ch.parse_spice_list("timing")
+        self.assertEqual(measures["delay0"], 2.5e-10)
+        self.assertEqual(measures["sources"], 1)
+        self.assertTrue(sim_session.get_session() is session)
+
+        # a different circuit is loaded again
+        self.write_stimulus(4.0, "DELAY1")
+        stimuli.run_sim(save_waveform=True)
+        measures = ch.parse_spice_list("timing")
+        self.assertEqual(measures["delay1"], 4e-10)
+        self.assertFalse("delay0" in measures)
+        self.assertEqual(measures["sources"], 2)
+        self.assertEqual(open(OPTS.openram_temp + "timing.raw").read(), "waveform\n")
+
+        sim_session.close_sessions()
+        self.assertEqual(session.process, None)
+        self.assertEqual(sim_session.sessions, {})
+
+        # the workers of a search with several rounds keep their
+        # sessions, so each one starts the simulator at most once
+        log = OPTS.spice_exe + ".log"
+        os.remove(log)
+        (num_procs, search_arity) = (OPTS.num_procs, OPTS.search_arity)
+        OPTS.num_procs = 2
+        OPTS.search_arity = 4
+        self.rounds = 0
+        def evaluate(periods):
+            self.rounds += 1
+            delays = ch.parallel_map(simulate_period, periods)
+            return [(d <= 3.21e-10, None, d) for d in delays]
+        (period, delay) = ch.bracket_search(evaluate, feasible=1.0, infeasible=5.0, tolerance=0.01)
+        self.assertTrue(ch.relative_compare(period, 3.21, 0.01))
+        self.assertTrue(self.rounds > 2)
+        starts = open(log).read().split().count("start")
+        self.assertTrue(0 < starts <= OPTS.num_procs)
+        # the sessions stop with the workers
+        ch.close_pool()
+        self.assertEqual(open(log).read().split().count("quit"), starts)
+        (OPTS.num_procs, OPTS.search_arity) = (num_procs, search_arity)
+
+        OPTS.sim_sessions = False
+        OPTS.use_sim_cache = use_sim_cache
+        globals.end_openram()
+
+    def write_stimulus(self, period, meas_name):
+        """ Writes a stimulus in the temp directory. """
+        write_stimulus(OPTS.openram_temp, period, meas_name)
+
+    def write_file(self, filename, contents):
+        f = open(filename, "w")
+        f.write(contents)
+        f.close()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python2.7
+"""
+Check the largest square margins of butterfly curves and the DC sweep
+stimulus of the bitcell margins
+"""
+
+import unittest
+from testutils import header
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+
+OPTS = globals.get_opts()
+
+#@unittest.skip("SKIPPING 21_snm_test")
+class snm_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+        # we will manually run lvs/drc
+        OPTS.check_lvsdrc = False
+
+        import numpy as np
+        import snm
+
+        # symmetric cells of inverters with gains of 3, 10 and 1000 and one
+        # where q is pulled down like a write
+        u = np.tile(np.linspace(0.0, 1.0, snm.sweep_steps + 1), (4, 1))
+        gain = np.array([3.0, 10.0, 1000.0, 10.0])[:, None]
+        qb = 0.5 - 0.5*np.tanh(gain*(u - 0.5))
+        q = qb * np.array([1.0, 1.0, 1.0, 0.3])[:, None]
+        (left, right) = snm.lobe_margins(u, q, qb, [1.0]*4)
+        for row in range(3):
+            self.assertTrue(abs(left[row] - right[row]) < 0.01)
+        self.assertTrue(0 < left[0] < left[1] < left[2])
+        # the ideal inverters fit a square of half of the supply
+        self.assertTrue(abs(left[2] - 0.5) < 0.02)
+        # the pulled down q has no lobe for 1 but a larger one for 0
+        self.assertTrue(left[3] < 0)
+        self.assertTrue(right[3] > right[1])
+
+        # the rows are independent
+        (left1, right1) = snm.lobe_margins(u[1:2], q[1:2], qb[1:2], [1.0])
+        self.assertTrue(np.allclose([left1[0], right1[0]], [left[1], right[1]]))
+
+        # a corner is one sweep of every mode and supply
+        import bitcell
+        import tech
+        cell = bitcell.bitcell()
+        supplies = [0.8*tech.spice["supply_voltage"], tech.spice["supply_voltage"]]
+        margins = snm.snm(cell, supplies)
+        corner = ("nominal", tech.spice["fet_models"], tech.spice["supply_voltage"], tech.spice["temp"])
+        margins.write_stimulus(OPTS.openram_temp, corner)
+        stim = open(OPTS.openram_temp + "stim.sp").read()
+        self.assertEqual(stim.count(".DC "), 1)
+        self.assertEqual(stim.count("_open\n"), 1 + len(snm.modes)*len(supplies))
+        self.assertTrue(" in_q " in stim and " in_qb " in stim)
+        self.assertTrue("Xwrite1 0 vdd1 vdd1 vdd1 0 in1 in1 q_write1 qb_write1 {0}_open".format(cell.name) in stim)
+
+        # the cell and corner are the job of a worker (see analyze_corners)
+        import pickle
+        (copy, copy_corner) = pickle.loads(pickle.dumps((margins, corner)))
+        self.assertEqual(copy.subckt, margins.subckt)
+        self.assertEqual(copy_corner, corner)
+
+        # the table is in mV
+        tables = [{"supply": supplies, "hold": [0.1, 0.2], "read": [0.05, 0.1], "write": [0.3, 0.4]}]
+        snm.write_tables(OPTS.openram_temp + "cell.snm", [corner], tables)
+        lines = open(OPTS.openram_temp + "cell.snm").read().splitlines()
+        self.assertEqual(len(lines), 1 + len(supplies))
+        self.assertEqual(lines[2].split()[2:], ["200.0", "100.0", "400.0"])
+
+        globals.end_openram()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python2.7
+"""
+Check the single pass parsing of hspice/ngspice measure results,
+including the per point results of batched simulations
+"""
+
+import unittest
+from testutils import header,isclose
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+
+OPTS = globals.get_opts()
+
+#@unittest.skip("SKIPPING 21_spice_parse_test")
+class spice_parse_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+
+        import charutils as ch
+
+        # spice notation and scientific notation
+        self.assertTrue(isclose(ch.convert_to_float("1.5e-10"), 1.5e-10))
+        self.assertTrue(isclose(ch.convert_to_float("1.5E+3"), 1.5e3))
+        self.assertTrue(isclose(ch.convert_to_float("2.5n"), 2.5e-9))
+        self.assertTrue(isclose(ch.convert_to_float("2.5ns"), 2.5e-9))
+        self.assertTrue(isclose(ch.convert_to_float("3m"), 3e-3))
+        self.assertTrue(isclose(ch.convert_to_float("3MEG"), 3e6))
+        self.assertTrue(isclose(ch.convert_to_float("-4.1p"), -4.1e-12))
+        self.assertTrue(isclose(ch.convert_to_float("7f"), 7e-15))
+        self.assertEqual(ch.convert_to_float("Failed"), False)
+
+        # a listing with an hspice and ngspice style results and a failure
+        f = open(OPTS.openram_temp + "timing.lis", "w")
+        f.write("* .meas tran DELAY0 TRIG v(clk) VAL=2.5 FALL=1 TD=20n\n")
+        f.write("   delay0=  1.1268E-10  targ=  2.1112E-08   trig=  2.1000E-08\n")
+        f.write("delay1              =  2.675463e-11 targ=  3.602675e-08 trig=  3.600000e-08\n")
+        f.write("   slew0= failed\n")
+        f.write("read0_power         =  2.274298m from=  1.500000e-08 to=  2.000000e-08\n")
+        f.write("   delay0=  9.9E-10\n")
+        f.close()
+
+        measures = ch.parse_spice_list("timing")
+        self.assertTrue(isclose(measures["delay0"], 1.1268e-10))
+        self.assertTrue(isclose(measures["delay1"], 2.675463e-11))
+        self.assertEqual(measures["slew0"], False)
+        self.assertTrue(isclose(measures["read0_power"], 2.274298e-3))
+        self.assertFalse("val" in measures)
+
+        # a batched listing with hspice .alter results repeated in order
+        f = open(OPTS.openram_temp + "timing.lis", "w")
+        f.write("   delay0=  1.0E-10\n")
+        f.write("   delay0= failed\n")
+        f.write("   delay0=  3.0E-10\n")
+        f.close()
+        results = ch.parse_spice_batch("timing", 2)
+        self.assertEqual(len(results), 2)
+        self.assertTrue(isclose(results[0]["delay0"], 1.0e-10))
+        self.assertEqual(results[1]["delay0"], False)
+
+        # and with ngspice per point measure names
+        f = open(OPTS.openram_temp + "timing.lis", "w")
+        f.write("delay0_p1           =  2.0e-10 targ=  3.6e-08 trig=  3.6e-08\n")
+        f.write("delay0_p0           =  1.0e-10 targ=  3.6e-08 trig=  3.6e-08\n")
+        f.close()
+        results = ch.parse_spice_batch("timing", 2)
+        self.assertTrue(isclose(results[0]["delay0"], 1.0e-10))
+        self.assertTrue(isclose(results[1]["delay0"], 2.0e-10))
+
+        os.remove(OPTS.openram_temp + "timing.lis")
+        globals.end_openram()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python2.7
+"""
+Check the surrogate model table filling from a few sample points
+"""
+
+import unittest
+from testutils import header,isclose
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+
+OPTS = globals.get_opts()
+
+#@unittest.skip("SKIPPING 21_surrogate_test")
+class surrogate_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+
+        import surrogate
+
+        slews = [0.1, 0.25, 0.5, 1, 2, 4, 8]
+        loads = [0.5, 1.25, 2.5, 5, 10, 20, 40]
+
+        # a delay and a slew that the model fits exactly only need the
+        # design of experiments and the held out points
+        def linear(slew, load):
+            return (0.6 + 0.01*load + 0.05*slew + 0.002*slew*slew + 0.001*slew*load,
+                    0.3 + 0.02*load)
+        evaluated = []
+        def evaluate(indices):
+            evaluated.extend(indices)
+            return [linear(slews[i], loads[j]) for (i, j) in indices]
+
+        table = surrogate.fill_table(evaluate, slews, loads, 0.02)
+        self.assertEqual(len(evaluated), 7)
+        self.assertEqual(len(set(evaluated)), 7)
+        self.assertEqual(len(table), len(slews) * len(loads))
+        for i in range(len(slews)):
+            for j in range(len(loads)):
+                expected = linear(slews[i], loads[j])
+                self.assertTrue(isclose(table[i*len(loads) + j][0], expected[0], 1e-6))
+                self.assertTrue(isclose(table[i*len(loads) + j][1], expected[1], 1e-6))
+
+        # a value that the model can't fit adds points until the
+        # simulated points are dense enough or all of them are simulated
+        def nonlinear(slew, load):
+            return (1.0 + slew*(load/10.0)**2,)
+        evaluated = []
+        def evaluate(indices):
+            evaluated.extend(indices)
+            return [nonlinear(slews[i], loads[j]) for (i, j) in indices]
+
+        table = surrogate.fill_table(evaluate, slews, loads, 0.02)
+        self.assertTrue(len(evaluated) > 7)
+        self.assertEqual(len(set(evaluated)), len(evaluated))
+        # the simulated points keep their values
+        for (i, j) in evaluated:
+            self.assertEqual(table[i*len(loads) + j], nonlinear(slews[i], loads[j]))
+
+        # a small table is simulated completely
+        evaluated = []
+        table = surrogate.fill_table(evaluate, slews[0:2], loads[0:2], 0.02)
+        self.assertEqual(sorted(evaluated), [(0, 0), (0, 1), (1, 0), (1, 1)])
+
+        globals.end_openram()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
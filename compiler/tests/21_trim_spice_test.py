@@ -0,0 +1,92 @@
+#!/usr/bin/env python2.7
+"""
+Check the trimmed characterization netlist of an SRAM
+"""
+
+import unittest
+from testutils import header
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+
+OPTS = globals.get_opts()
+
+#@unittest.skip("SKIPPING 21_trim_spice_test")
+class trim_spice_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+        # we will manually run lvs/drc
+        OPTS.check_lvsdrc = False
+
+        import sram
+        import trim_spice
+
+        debug.info(1, "Testing trimmed netlist of a 2 bit, 32 words SRAM with 1 bank")
+        s = sram.sram(word_size=2,
+                      num_words=32,
+                      num_banks=1,
+                      name="sram_2_32_1_{0}".format(OPTS.tech_name))
+        OPTS.check_lvsdrc = True
+
+        # every address decodes to a different row
+        decoder = s.bank.decoder
+        rows = []
+        for row in range(s.bank.num_rows):
+            address = [(row >> i) & 1 for i in range(s.bank.row_addr_size)]
+            rows.append(decoder.row_index(address))
+        self.assertEqual(sorted(rows), range(s.bank.num_rows))
+        self.assertEqual(rows[0], 0)
+        self.assertEqual(rows[-1], s.bank.num_rows - 1)
+
+        trim = trim_spice.trim_spice(s)
+        probe_address = "1" * s.addr_size
+        probe_data = 0
+        row = trim.probe_row(probe_address)
+        cols = trim.probe_columns(probe_data)
+        self.assertEqual(row, s.bank.num_rows - 1)
+        self.assertEqual(len(cols), s.bank.words_per_row)
+
+        fullspice = OPTS.openram_temp + "full.sp"
+        s.sp_write(fullspice)
+        trimspice = OPTS.openram_temp + "trimmed.sp"
+        trim.write(trimspice, probe_address, probe_data)
+
+        full = open(fullspice).read().splitlines()
+        trimmed = open(trimspice).read().splitlines()
+        array = s.bank.bitcell_array.name
+        full_cells = [x for x in self.subckt(full, array) if x.startswith("Xbit_r")]
+        trimmed_cells = [x for x in self.subckt(trimmed, array) if x.startswith("Xbit_r")]
+        self.assertEqual(len(full_cells), s.bank.num_rows * s.bank.num_cols)
+        # one row and the probed columns are kept
+        self.assertEqual(len(trimmed_cells),
+                         s.bank.num_cols + len(cols) * (s.bank.num_rows - 1))
+        self.assertTrue("Xbit_r{0}_c{1} bl[{1}] br[{1}] wl[{0}] vdd gnd cell_6t".format(row, cols[0])
+                        in trimmed_cells)
+        # every other wordline and bitline has a lumped load
+        self.assertEqual(len([x for x in trimmed if x.startswith("Rwl[")]), s.bank.num_rows - 1)
+        self.assertEqual(len([x for x in trimmed if x.startswith("Cbl[")]),
+                         s.bank.num_cols - len(cols))
+        # the rest of the hierarchy is the same
+        trimmed_only = ("Xbit_r", "Rwl[", "Rbl[", "Rbr[", "Cwl[", "Cbl[", "Cbr[")
+        self.assertEqual(len([x for x in full if not x.startswith("Xbit_r")]),
+                         len([x for x in trimmed if not x.startswith(trimmed_only)]))
+
+        os.remove(fullspice)
+        os.remove(trimspice)
+        globals.end_openram()
+
+    def subckt(self, lines, name):
+        """ Returns the lines of a subcircuit in a netlist. """
+        start = [x.startswith(".SUBCKT {0} ".format(name)) for x in lines].index(True)
+        end = lines.index(".ENDS {0}".format(name))
+        return lines[start:end]
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python2.7
+"""
+Characterize the worst of several probes with one simulation of each
+point
+"""
+
+import unittest
+from testutils import header,isclose
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+
+OPTS = globals.get_opts()
+
+#@unittest.skip("SKIPPING 21_worst_case_probe_test")
+class worst_case_probe_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+        # we will manually run lvs/drc
+        OPTS.check_lvsdrc = False
+        # the analytic simulator doesn't need a spice license
+        OPTS.spice_version="analytic"
+        use_sim_cache = OPTS.use_sim_cache
+        OPTS.use_sim_cache = False
+        OPTS.worst_case_probes = True
+        globals.set_spice()
+
+        import sram
+        import tech
+        import lib
+        import delay
+
+        debug.info(1, "Testing the worst case probes of a 2 bit, 32 words SRAM with 2 banks")
+        s = sram.sram(word_size=2,
+                      num_words=32,
+                      num_banks=2,
+                      name="sram_2_32_2_{0}".format(OPTS.tech_name))
+        OPTS.check_lvsdrc = True
+
+        # the far and near cells of each bank
+        probes = lib.probes(s)
+        self.assertEqual(probes, [("1" * (s.addr_size-1) + "0", 1),
+                                  ("0" * (s.addr_size-1) + "0", 0),
+                                  ("1" * (s.addr_size-1) + "1", 1),
+                                  ("0" * (s.addr_size-1) + "1", 0)])
+
+        tempspice = OPTS.openram_temp + "temp.sp"
+        s.sp_write(tempspice)
+        d = delay.delay(s,tempspice)
+
+        # every probe is written and read with its own measures
+        slew = tech.spice["rise_time"]*2
+        load = tech.spice["FF_in_cap"]*4
+        d.set_probes(probes)
+        d.write_stimulus(10.0, load, slew)
+        self.assertEqual(len(d.cycle_times), 7*len(probes) + 1)
+        stim = open(OPTS.openram_temp + "stim.sp").read()
+        for index in range(len(probes)):
+            self.assertTrue("DELAY1_PROBE{0} TRIG v(clk)".format(index) in stim)
+            self.assertTrue("READ0_POWER_PROBE{0} ".format(index) in stim)
+        self.assertTrue("TARG v(D[0])" in stim and "TARG v(D[1])" in stim)
+
+        # the results are the largest of the probes and fail with any of them
+        measures = {"delay0_probe0": 1e-10, "delay0_probe1": 3e-10,
+                    "delay0_probe2": 2e-10, "delay0_probe3": 1e-10,
+                    "delay1_probe0": 1e-10, "delay1_probe1": False,
+                    "delay1_probe2": 1e-10, "delay1_probe3": 1e-10}
+        worst = d.worst_probe(measures)
+        self.assertEqual(worst["delay0"], 3e-10)
+        self.assertEqual(worst["delay1"], False)
+        self.assertEqual(worst["slew0"], False)
+
+        # the analytical model is the same at every probe
+        data = d.analyze_probes(probes, [slew], [load])
+        (model_delay, model_slew) = s.analytical_delay(slew, load)
+        self.assertTrue(isclose(data["delay0"][0], float(model_delay)))
+        self.assertTrue(isclose(data["slew1"][0], float(model_slew)))
+
+        # reset these options
+        OPTS.spice_version="hspice"
+        OPTS.use_sim_cache = use_sim_cache
+        OPTS.worst_case_probes = False
+        globals.set_spice()
+
+        os.remove(tempspice)
+
+        globals.end_openram()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
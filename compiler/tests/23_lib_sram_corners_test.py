@@ -0,0 +1,66 @@
+#!/usr/bin/env python2.7
+"""
+Check the .lib files of several PVT corners of an SRAM
+"""
+
+import unittest
+from testutils import header
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+
+OPTS = globals.get_opts()
+
+#@unittest.skip("SKIPPING 23_lib_sram_corners_test")
+class lib_corners_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+        # we will manually run lvs/drc
+        OPTS.check_lvsdrc = False
+
+        import sram
+        import lib
+        import tech
+
+        debug.info(1, "Testing corners of a sample 2 bit, 16 words SRAM with 1 bank")
+        s = sram.sram(word_size=2,
+                      num_words=OPTS.config.num_words,
+                      num_banks=OPTS.config.num_banks,
+                      name="sram_2_16_1_{0}".format(OPTS.tech_name))
+        OPTS.check_lvsdrc = True
+
+        tempspice = OPTS.openram_temp + "temp.sp"
+        s.sp_write(tempspice)
+
+        models = tech.spice["fet_models"]
+        vdd = tech.spice["supply_voltage"]
+        corners = [("FF", models, 1.1*vdd, -40),
+                   ("SS", models, 0.9*vdd, 125)]
+        path = OPTS.openram_temp + s.name
+        libnames = lib.write_corners(path, s, tempspice, corners, use_model=True)
+        self.assertEqual(libnames, [path + "_FF.lib", path + "_SS.lib"])
+
+        for (libname, corner) in zip(libnames, corners):
+            text = open(libname).read()
+            self.assertTrue("library ({0}_{1}_lib)".format(s.name, corner[0]) in text)
+            self.assertTrue("cell ({0})".format(s.name) in text)
+            self.assertTrue("operating_conditions({0})".format(corner[0]) in text)
+            self.assertTrue("default_operating_conditions : {0};".format(corner[0]) in text)
+            self.assertTrue("voltage : {0} ;".format(corner[2]) in text)
+            self.assertTrue("temperature : {0:.3f} ;".format(corner[3]) in text)
+            os.remove(libname)
+
+        # the nominal corner is restored
+        self.assertEqual(tech.spice["supply_voltage"], vdd)
+
+        globals.end_openram()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
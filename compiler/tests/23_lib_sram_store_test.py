@@ -0,0 +1,123 @@
+#!/usr/bin/env python2.7
+"""
+Check that the .lib is written from the characterization store and that
+only the missing arcs are simulated
+"""
+
+import unittest
+from testutils import header
+import sys,os
+sys.path.append(os.path.join(sys.path[0],".."))
+import globals
+import debug
+import calibre
+
+OPTS = globals.get_opts()
+
+#@unittest.skip("SKIPPING 23_lib_sram_store_test")
+class lib_store_test(unittest.TestCase):
+
+    def runTest(self):
+        globals.init_openram("config_20_{0}".format(OPTS.tech_name))
+        # we will manually run lvs/drc
+        OPTS.check_lvsdrc = False
+        # the analytic simulator doesn't need a spice license
+        spice_version = OPTS.spice_version
+        OPTS.spice_version = "analytic"
+        use_sim_cache = OPTS.use_sim_cache
+        OPTS.use_sim_cache = False
+        OPTS.use_char_store = True
+        OPTS.char_store_file = OPTS.openram_temp + "characterization.db"
+        globals.set_spice()
+
+        import sram
+        import lib
+        import stimuli
+        import sqlite3
+
+        debug.info(1, "Testing the stored arcs of a sample 2 bit, 16 words SRAM with 1 bank")
+        s = sram.sram(word_size=2,
+                      num_words=OPTS.config.num_words,
+                      num_banks=OPTS.config.num_banks,
+                      name="sram_2_16_1_{0}".format(OPTS.tech_name))
+        OPTS.check_lvsdrc = True
+
+        tempspice = OPTS.openram_temp + "temp.sp"
+        s.sp_write(tempspice)
+
+        # count the simulations
+        run_sim = stimuli.run_sim
+        simulations = []
+        def counting_run_sim(*args, **kwargs):
+            simulations.append(args)
+            return run_sim(*args, **kwargs)
+        stimuli.run_sim = counting_run_sim
+
+        libname = OPTS.openram_temp + "stored.lib"
+        lib.lib(libname, s, tempspice, use_model=False)
+        first_simulations = len(simulations)
+        self.assertTrue(first_simulations > 0)
+        golden = open(libname).read()
+
+        # every arc is stored with its provenance
+        db = sqlite3.connect(OPTS.char_store_file)
+        rows = db.execute("SELECT pin, metric, simulator, version FROM arcs WHERE macro=?", (s.name,)).fetchall()
+        self.assertEqual(len([row for row in rows if row[1] == "delay1"]), 9)
+        # the power tables are from the same simulations
+        self.assertEqual(len([row for row in rows if row[1] == "read1_internal_power"]), 9)
+        # the leakage is a single value
+        self.assertEqual(len([row for row in rows if row[1] == "leakage_power"]), 1)
+        self.assertTrue("cell_leakage_power" in golden)
+        self.assertTrue("rise_power(POWER_TABLE)" in golden)
+        self.assertEqual(set(row[2] for row in rows), set(["analytic"]))
+        self.assertEqual(set(row[3] for row in rows), set([globals.VERSION]))
+        self.assertEqual(db.execute("SELECT COUNT(*) FROM arcs WHERE macro='ms_flop'").fetchone()[0], 4*9)
+
+        # writing it again doesn't simulate anything
+        del simulations[:]
+        lib.lib(libname, s, tempspice, use_model=False)
+        self.assertEqual(len(simulations), 0)
+        self.assertEqual(open(libname).read(), golden)
+
+        # only the missing arcs are simulated
+        db.execute("DELETE FROM arcs WHERE macro=? AND metric='delay0' AND slew=(SELECT MAX(slew) FROM arcs)", (s.name,))
+        db.execute("DELETE FROM arcs WHERE macro='ms_flop' AND metric='hold_times_LH' AND slew=(SELECT MIN(slew) FROM arcs)")
+        db.commit()
+        db.close()
+        lib.lib(libname, s, tempspice, use_model=False)
+        self.assertTrue(0 < len(simulations) < first_simulations)
+        self.assertEqual(open(libname).read(), golden)
+
+        # the analytic arcs don't depend on the device model files, so
+        # they don't have to exist
+        import tech
+        models = tech.spice["fet_models"]
+        tech.spice["fet_models"] = [OPTS.openram_temp + "missing_models.sp"]
+        del simulations[:]
+        lib.lib(libname, s, tempspice, use_model=False)
+        self.assertEqual(len(simulations), 0)
+        self.assertEqual(open(libname).read(), golden)
+        tech.spice["fet_models"] = models
+
+        # a different time step is a different characterization
+        import char_store
+        conditions = char_store.conditions_hash()
+        tran_steps_per_period = OPTS.tran_steps_per_period
+        OPTS.tran_steps_per_period = 2*tran_steps_per_period
+        self.assertNotEqual(char_store.conditions_hash(), conditions)
+        OPTS.tran_steps_per_period = tran_steps_per_period
+
+        stimuli.run_sim = run_sim
+        OPTS.spice_version = spice_version
+        OPTS.use_char_store = False
+        OPTS.use_sim_cache = use_sim_cache
+        OPTS.char_store_file = os.path.expanduser("~/.openram/characterization.db")
+        globals.set_spice()
+        globals.end_openram()
+
+# instantiate a copy of the class to actually run the test
+if __name__ == "__main__":
+    (OPTS, args) = globals.parse_args()
+    del sys.argv[1:]
+    header(__file__, OPTS.tech_name)
+    unittest.main()
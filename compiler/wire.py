@@ -1,5 +1,6 @@
 from tech import drc
 import debug
+import factory
 from contact import contact
 from path import path
 
@@ -39,8 +40,8 @@ class wire(path):
 
         self.horiz_layer_name = horiz_layer
         self.horiz_layer_width = drc["minwidth_{0}".format(horiz_layer)]
-        via_connect = contact(self.layer_stack,
-                              (1, 1))
+        via_connect = factory.create(contact, self.layer_stack,
+                                     (1, 1))
         self.node_to_node = [drc["minwidth_" + str(self.horiz_layer_name)] \
                                          + via_connect.width,
                                      drc["minwidth_" + str(self.horiz_layer_name)] \
@@ -49,7 +50,7 @@ class wire(path):
     # create a 1x1 contact
     def create_vias(self):
         """ Add a via and corner square at every corner of the path."""
-        self.c=contact(self.layer_stack, (1, 1))
+        self.c=factory.create(contact, self.layer_stack, (1, 1))
         c_width = self.c.width
         c_height = self.c.height
         
@@ -67,22 +67,27 @@ class write_driver_array(design.design):
 
     def create_write_array(self):
         for i in range(self.word_size):
-            name = "Xwrite_driver%d" % i
             x_off = (i* self.driver.width * self.words_per_row)
             self.driver_positions.append(vector(x_off, 0))
-            self.add_inst(name=name,
-                          mod=self.driver,
-                          offset=[x_off, 0])
-            if (self.words_per_row == 1):
-                self.connect_inst(["data_in[{0}]".format(i),
-                                   "bl[{0}]".format(i),
-                                   "br[{0}]".format(i),
-                                   "wen", "vdd", "gnd"])
-            else:
-                self.connect_inst(["data_in[{0}]".format(i),
-                                   "bl_out[{0}]".format(i * self.words_per_row),
-                                   "br_out[{0}]".format(i * self.words_per_row),
-                                   "wen", "vdd", "gnd"])
+        self.add_inst_array(name="Xwrite_driver{col}",
+                            mod=self.driver,
+                            offset=[0, 0],
+                            cols=self.word_size,
+                            rows=1,
+                            pitch=[self.driver.width * self.words_per_row, 0])
+        self.connect_inst_array(self.write_driver_conns)
+
+    def write_driver_conns(self, row, col):
+        """ Returns the nets of the write driver of a data bit. """
+        if (self.words_per_row == 1):
+            return ["data_in[{0}]".format(col),
+                    "bl[{0}]".format(col),
+                    "br[{0}]".format(col),
+                    "wen", "vdd", "gnd"]
+        return ["data_in[{0}]".format(col),
+                "bl_out[{0}]".format(col * self.words_per_row),
+                "br_out[{0}]".format(col * self.words_per_row),
+                "wen", "vdd", "gnd"]
 
     def add_metal_rails(self):
         base = vector(0, - 0.5*drc["minwidth_metal1"])
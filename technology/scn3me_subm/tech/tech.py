@@ -217,4 +217,5 @@ spice["msflop_setup"] = 9        # DFF setup time in ps
 spice["msflop_hold"] = 1         # DFF hold time in ps
 spice["msflop_delay"] = 20.5     # DFF Clk-to-q delay in ps
 spice["msflop_slew"] = 13.1      # DFF output slew in ps w/ no load
+spice["pelgrom_avt"] = 0.014     # Threshold voltage mismatch (Pelgrom) coefficient in [Volt*micro-meter]
 